@@ -8,14 +8,54 @@ Os arquivos são salvos em subpastas dentro do diretório do projeto:
   - Engineer → Outputs/Documentation/
   - Assembly → Outputs/Assemble/
 As pastas são criadas automaticamente se não existirem.
+
+Todas as BOMs (views) são geradas numa única passada pelos grupos; cada view
+pode sair em CSV, JSON, HTML e XLSX (este último precisa do openpyxl).
+
+Uso: python MyScriptBOM.py <arquivo_entrada.xml> <arquivo_saida_base> [--formats csv,json,html,xlsx]
+                           [--config MyScriptBOM.json]
+     python MyScriptBOM.py --batch <pasta_ou_manifesto.json> [-j N]
+
+Agrupamento, exclusões, variantes de montagem, views e formatos podem vir de
+um arquivo JSON do projeto (--config, ou MyScriptBOM.json na pasta do projeto):
+    {
+      "group_by": ["Value", "Footprint", "Manufacturer", "Manufacturer_PN"],
+      "exclude_fields": ["Exclude_from_BOM", "DNP"],
+      "variant_field": "Variant",
+      "variants": {
+        "Full": {},
+        "Lite": {"dnp": ["U5", "R10-R12"]}
+      },
+      "formats": ["csv", "html"]
+    }
+No campo de variante do componente, "-Lite" tira a peça da variante Lite e
+"+Full +Pro" a deixa só nessas variantes. Todas as variantes saem de uma
+única leitura da netlist e uma única passada de agrupamento.
+
+No modo lote (--batch) os projetos são processados em paralelo, o banco é
+consultado uma única vez para todos e é gerada uma BOM de compras
+consolidada por MyPN (Outputs/BOM_Purchasing_<data>.csv).
 """
 
 import sys
 import os
 import datetime
 import csv
+import json
+import html
+import re
+import sqlite3
+import argparse
+from operator import itemgetter
+from multiprocessing import Pool
+from pathlib import Path
 import xml.etree.ElementTree as ET
 
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None  # XLSX fica indisponível
+
 # =============================================================================
 # LISTA DE TODAS AS COLUNAS DISPONÍVEIS (baseada na tabela fornecida)
 # =============================================================================
@@ -196,6 +236,61 @@ ENGINEERING_COLUMNS = [
     'Exclude_from_Board'
 ]
 
+# =============================================================================
+# CONFIGURAÇÃO DAS VIEWS (nome, colunas, subpasta em Outputs/)
+# Acrescente aqui novas BOMs (ex: pick-and-place, custos): todas são geradas
+# na mesma passada pelos grupos.
+# =============================================================================
+BOM_VIEWS = [
+    {"name": "Buyer",    "columns": BUYER_COLUMNS,       "subdir": "Fabrication"},
+    {"name": "Engineer", "columns": ENGINEERING_COLUMNS, "subdir": "Documentation"},
+    {"name": "Assembly", "columns": ASSEMBLY_COLUMNS,    "subdir": "Assembly"},
+]
+
+# Formatos gerados por padrão (csv, json, html, xlsx)
+OUTPUT_FORMATS = ["csv"]
+
+# =============================================================================
+# CONFIGURAÇÃO DO ENRIQUECIMENTO (dados atuais do banco por MyPN)
+# =============================================================================
+
+# Banco padrão: Library/1_Database_Library (este script fica em Library/6_Templates)
+DEFAULT_DATABASE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "1_Database_Library", "MyKiCadLibDatabase.sqlite"
+)
+
+# Campos lidos do banco; substituem os valores (desatualizados) da netlist
+ENRICH_FIELDS = [
+    'Stock_Qty',
+    'Stock_Location',
+    'Stock_Unit',
+    'Price',
+    'Currency',
+    'Last_Purchase_Date',
+    'Last_Purchase_Price',
+]
+
+# =============================================================================
+# CONFIGURAÇÃO DAS REFERÊNCIAS E DA QUANTIDADE
+# =============================================================================
+
+# Compacta sequências de referências: "C1-C48, C52"
+COMPACT_REFS = True
+# Tamanho mínimo de uma sequência para virar intervalo (C1, C2 continua assim)
+REF_RANGE_MIN = 3
+REF_SEPARATOR = ", "
+
+# Componentes com algum destes campos "verdadeiros" não entram na Ref nem na Qty
+EXCLUDE_FIELDS = ["Exclude_from_BOM", "DNP"]
+TRUE_VALUES = {"1", "true", "yes", "y", "sim", "x"}
+
+# Propriedades da netlist (KiCad 7+) -> campo equivalente
+NETLIST_FLAGS = {
+    "exclude_from_bom": "Exclude_from_BOM",
+    "dnp": "DNP",
+}
+
 # =============================================================================
 # CONFIGURAÇÃO DE AGRUPAMENTO
 # =============================================================================
@@ -206,66 +301,434 @@ GROUP_BY_FIELDS = [
     "Manufacturer_PN",
 ]
 
+# Agrupar sem diferenciar maiúsculas/minúsculas e espaços nas pontas
+GROUP_CASE_INSENSITIVE = False
+
+# =============================================================================
+# CONFIGURAÇÃO DO PROJETO (arquivo JSON opcional) E VARIANTES
+# =============================================================================
+
+# Procurado na pasta do projeto quando --config não é informado
+PROJECT_CONFIG_NAME = "MyScriptBOM.json"
+
+# Campo do componente com as marcações de variante ("+Full -Lite")
+VARIANT_FIELD = "Variant"
+
 # =============================================================================
 # FUNÇÕES DE LEITURA DO XML
 # =============================================================================
 
+def parse_component(comp):
+    """
+    Converte um elemento <comp> da netlist num dicionário com todos os campos
+    (incluindo os personalizados).
+    """
+    ref = comp.get("ref")  # referência (R1, C2, etc.)
+
+    # Valor (value)
+    value_elem = comp.find("value")
+    value = value_elem.text if value_elem is not None else ""
+
+    # Footprint
+    footprint_elem = comp.find("footprint")
+    footprint = footprint_elem.text if footprint_elem is not None else ""
+
+    # Datasheet
+    datasheet_elem = comp.find("datasheet")
+    datasheet = datasheet_elem.text if datasheet_elem is not None else ""
+
+    # Campos de libsource (símbolo, lib) – podem ser úteis
+    libsource = comp.find("libsource")
+    lib = libsource.get("lib") if libsource is not None else ""
+    part = libsource.get("part") if libsource is not None else ""
+
+    # Campos personalizados (fields)
+    fields = {
+        "Ref": ref,
+        "Value": value,
+        "Footprint": footprint,
+        "Datasheet": datasheet,
+        "Symbol": part,          # nome do símbolo
+        "Library": lib,
+    }
+
+    for field in comp.iter("field"):
+        name = field.get("name")
+        text = field.text if field.text is not None else ""
+        fields[name] = text
+
+    # KiCad 7+: atributos do símbolo viram <property name="dnp"/> etc.
+    for prop in comp.iter("property"):
+        field = NETLIST_FLAGS.get(prop.get("name"))
+        if field and not fields.get(field):
+            fields[field] = "1"
+
+    return fields
+
+
+def iter_netlist_components(xml_file):
+    """
+    Lê a netlist XML do KiCad em streaming (iterparse) e gera um dicionário
+    por componente.
+
+    Só os elementos <comp> são montados; cada um é descartado logo depois de
+    convertido e a leitura para no fim de <components>, antes de <libparts> e
+    <nets> (a maior parte do arquivo em projetos grandes). A memória usada não
+    depende do número de redes.
+    """
+    with open(xml_file, 'rb') as f:
+        container = None
+        for event, elem in ET.iterparse(f, events=("start", "end")):
+            if event == "start":
+                if elem.tag == "components":
+                    container = elem
+                elif elem.tag in ("libparts", "libraries", "nets"):
+                    # Netlist sem <components> antes destas seções: nada a ler
+                    break
+                continue
+
+            if elem.tag == "comp":
+                yield parse_component(elem)
+                # Solta o componente já convertido (e seus filhos)
+                elem.clear()
+                if container is not None:
+                    container.remove(elem)
+            elif elem.tag == "components":
+                break
+
+
 def parse_netlist(xml_file):
     """
     Lê o arquivo XML de netlist do KiCad e retorna uma lista de dicionários,
     cada dicionário representando um componente com todos os campos (incluindo
     os personalizados).
     """
-    tree = ET.parse(xml_file)
-    root = tree.getroot()
+    return list(iter_netlist_components(xml_file))
 
-    components = []
+# =============================================================================
+# ENRIQUECIMENTO COM O BANCO DE DADOS
+# =============================================================================
+
+# Máximo de parâmetros por consulta IN (...) (limite antigo do SQLite: 999)
+SQL_BATCH_SIZE = 500
+
+
+def _batches(items, size=SQL_BATCH_SIZE):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+class PartDatabase:
+    """
+    Consulta o banco de peças por MyPN em lote.
 
-    # O elemento <components> contém todos os componentes
-    for comp in root.findall(".//comp"):
-        ref = comp.get("ref")  # referência (R1, C2, etc.)
+    Um índice de roteamento MyPN -> tabela fica num arquivo ao lado do banco
+    (<banco>.routing) e só é refeito quando o banco muda. Assim cada lote de
+    MyPNs vira uma consulta no índice e uma consulta IN (...) por tabela que
+    realmente tem peças do projeto, em vez de uma consulta por peça por tabela.
+    Resultados ficam em memória (self.cache) para reaproveitar entre projetos.
+    """
 
-        # Valor (value)
-        value_elem = comp.find("value")
-        value = value_elem.text if value_elem is not None else ""
+    def __init__(self, db_path, fields=ENRICH_FIELDS, routing_path=None):
+        self.db_path = os.path.abspath(db_path)
+        self.fields = list(fields)
+        self.routing_path = routing_path or self.db_path + ".routing"
+        self.cache = {}
+        # URI montada pelo pathlib: espaços, '#' e '?' no caminho ficam escapados
+        self.conn = sqlite3.connect(Path(self.db_path).as_uri() + "?mode=ro", uri=True)
+        self.tables = self._part_tables()
+        self.routing = self._open_routing()
 
-        # Footprint
-        footprint_elem = comp.find("footprint")
-        footprint = footprint_elem.text if footprint_elem is not None else ""
+    def close(self):
+        self.conn.close()
+        self.routing.close()
 
-        # Datasheet
-        datasheet_elem = comp.find("datasheet")
-        datasheet = datasheet_elem.text if datasheet_elem is not None else ""
+    def __enter__(self):
+        return self
 
-        # Campos de libsource (símbolo, lib) – podem ser úteis
-        libsource = comp.find("libsource")
-        lib = libsource.get("lib") if libsource is not None else ""
-        part = libsource.get("part") if libsource is not None else ""
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-        # Campos personalizados (fields)
-        fields = {
-            "Ref": ref,
-            "Value": value,
-            "Footprint": footprint,
-            "Datasheet": datasheet,
-            "Symbol": part,          # nome do símbolo
-            "Library": lib,
+    def _part_tables(self):
+        """{tabela: campos de ENRICH_FIELDS que ela tem} das tabelas com MyPN"""
+        tables = {}
+        rows = self.conn.execute(
+            "SELECT m.name, p.name FROM sqlite_master AS m JOIN pragma_table_info(m.name) AS p "
+            "WHERE m.type = 'table' AND m.name NOT LIKE 'sqlite_%' ORDER BY m.name, p.cid"
+        )
+        for table, column in rows:
+            tables.setdefault(table, set()).add(column)
+        return {
+            table: [f for f in self.fields if f in columns]
+            for table, columns in tables.items() if "MyPN" in columns
         }
 
-        for field in comp.findall(".//field"):
-            name = field.get("name")
-            text = field.text if field.text is not None else ""
-            fields[name] = text
+    def _state(self):
+        """Identifica a versão do banco em disco (tamanho e mtime, incluindo o -wal)"""
+        state = []
+        for path in (self.db_path, self.db_path + "-wal"):
+            if os.path.exists(path):
+                stat = os.stat(path)
+                state.append(f"{stat.st_size}:{stat.st_mtime_ns}")
+        return ";".join(state)
+
+    def _open_routing(self):
+        """Abre o índice de roteamento, refazendo-o se o banco mudou"""
+        state = self._state()
+        try:
+            routing = sqlite3.connect(self.routing_path)
+            routing.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        except sqlite3.Error:
+            # Pasta sem permissão de escrita: índice só em memória nesta execução
+            routing = sqlite3.connect(":memory:")
+            routing.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+
+        saved = routing.execute("SELECT value FROM meta WHERE key = 'state'").fetchone()
+        if saved is None or saved[0] != state:
+            with routing:
+                routing.execute("DROP TABLE IF EXISTS routing")
+                routing.execute("CREATE TABLE routing (MyPN TEXT PRIMARY KEY, tbl TEXT NOT NULL) WITHOUT ROWID")
+                for table in self.tables:
+                    routing.executemany(
+                        "INSERT OR IGNORE INTO routing (MyPN, tbl) VALUES (?, ?)",
+                        ((mypn, table) for (mypn,) in self.conn.execute(f'SELECT MyPN FROM "{table}"'))
+                    )
+                routing.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('state', ?)", (state,))
+        return routing
+
+    def lookup(self, mypns):
+        """
+        Retorna {MyPN: {campo: valor}} para os MyPNs encontrados no banco.
+        Só os MyPNs ainda fora do cache são consultados.
+        """
+        wanted = {p for p in mypns if p}
+        pending = sorted(p for p in wanted if p not in self.cache)
+
+        by_table = {}
+        for batch in _batches(pending):
+            marks = ",".join("?" * len(batch))
+            for mypn, table in self.routing.execute(
+                    f"SELECT MyPN, tbl FROM routing WHERE MyPN IN ({marks})", batch):
+                by_table.setdefault(table, []).append(mypn)
+
+        for table, table_pns in by_table.items():
+            fields = self.tables.get(table, [])
+            columns = ", ".join(["MyPN"] + [f'"{f}"' for f in fields])
+            for batch in _batches(table_pns):
+                marks = ",".join("?" * len(batch))
+                for row in self.conn.execute(
+                        f'SELECT {columns} FROM "{table}" WHERE MyPN IN ({marks})', batch):
+                    self.cache[row[0]] = {
+                        field: "" if value is None else str(value)
+                        for field, value in zip(fields, row[1:])
+                    }
+
+        for mypn in pending:
+            self.cache.setdefault(mypn, None)  # não existe no banco
+        return {p: self.cache[p] for p in wanted if self.cache[p] is not None}
 
-        components.append(fields)
 
-    return components
+def enrich_components(components, database):
+    """
+    Substitui nos componentes os campos de ENRICH_FIELDS pelos valores atuais
+    do banco (por MyPN). Retorna (MyPNs encontrados, MyPNs não encontrados).
+    """
+    mypns = {comp.get("MyPN", "") for comp in components} - {""}
+    parts = database.lookup(mypns)
+    apply_parts(components, parts)
+    return len(parts), sorted(mypns - set(parts))
+
+
+def apply_parts(components, parts):
+    """Aplica nos componentes os dados já consultados ({MyPN: {campo: valor}})"""
+    for comp in components:
+        data = parts.get(comp.get("MyPN", ""))
+        if data:
+            comp.update(data)
+
+# =============================================================================
+# REFERÊNCIAS (ordem natural e intervalos)
+# =============================================================================
+
+REF_RE = re.compile(r"^(.*?)(\d+)$")
+
+
+def ref_key(ref):
+    """Chave de ordem natural: C2 antes de C10, agrupando pelo prefixo"""
+    match = REF_RE.match(ref)
+    if match:
+        return (match.group(1), int(match.group(2)), ref)
+    return (ref, -1, ref)
+
+
+def compact_refs(refs, min_range=REF_RANGE_MIN, separator=REF_SEPARATOR):
+    """
+    Ordena as referências (ordem natural, sem repetições) e junta sequências
+    consecutivas em intervalos: ["C3", "C1", "C2", "C52"] -> "C1-C3, C52"
+    """
+    items = []
+    run = []  # [(prefixo, número, ref)] consecutivos
+
+    def flush():
+        if len(run) >= min_range:
+            items.append(f"{run[0][2]}-{run[-1][2]}")
+        else:
+            items.extend(r[2] for r in run)
+        run.clear()
+
+    for key in sorted({ref_key(r) for r in refs}):
+        prefix, number, ref = key
+        if run and number >= 0 and run[-1][0] == prefix and run[-1][1] == number - 1:
+            run.append(key)
+            continue
+        flush()
+        if number >= 0:
+            run.append(key)
+        else:
+            items.append(ref)
+    flush()
+    return separator.join(items)
+
+
+def is_excluded(comp, fields=None):
+    """True se o componente está marcado como Exclude_from_BOM ou DNP"""
+    if fields is None:
+        fields = EXCLUDE_FIELDS
+    return any(comp.get(field, "").strip().lower() in TRUE_VALUES for field in fields)
+
+
+def expand_refs(refs):
+    """Expande listas com intervalos: ["R10-R12", "U5"] -> {"R10", "R11", "R12", "U5"}"""
+    result = set()
+    for item in refs:
+        for ref in re.split(r"[,\s]+", item.strip()):
+            if not ref:
+                continue
+            first, sep, last = ref.partition("-")
+            a, b = REF_RE.match(first), REF_RE.match(last)
+            if sep and a and b and a.group(1) == b.group(1):
+                result.update(f"{a.group(1)}{n}" for n in range(int(a.group(2)), int(b.group(2)) + 1))
+            else:
+                result.add(ref)
+    return result
+
+
+def group_refs(group_comps):
+    """
+    Devolve (texto da Ref, Qty) de um grupo. Os componentes já chegam sem os
+    excluídos/DNP (pré-filtro em fitted_variants); cada referência conta uma vez.
+    """
+    refs = {c.get("Ref", "") for c in group_comps}
+    if COMPACT_REFS:
+        text = compact_refs(refs)
+    else:
+        text = ",".join(sorted(refs, key=ref_key))
+    return text, len(refs)
+
+# =============================================================================
+# LEITURA DA CONFIGURAÇÃO E VARIANTES
+# =============================================================================
+
+def default_config():
+    """Configuração padrão, a partir das constantes deste script"""
+    return {
+        "group_by": list(GROUP_BY_FIELDS),
+        "case_insensitive": GROUP_CASE_INSENSITIVE,
+        "exclude_fields": list(EXCLUDE_FIELDS),
+        "variant_field": VARIANT_FIELD,
+        "variants": {},
+        "views": BOM_VIEWS,
+        "formats": list(OUTPUT_FORMATS),
+    }
+
+
+def load_config(config_file=None, project_dir=None):
+    """
+    Lê o JSON de configuração do projeto (chaves ausentes ficam com o padrão).
+    Sem config_file procura PROJECT_CONFIG_NAME em project_dir.
+    Retorna (config, caminho usado ou None).
+    """
+    config = default_config()
+    if config_file is None and project_dir is not None:
+        candidate = os.path.join(project_dir, PROJECT_CONFIG_NAME)
+        if os.path.isfile(candidate):
+            config_file = candidate
+    if config_file is None:
+        return config, None
+
+    with open(config_file, "r", encoding="utf-8") as f:
+        loaded = json.load(f)
+    unknown = set(loaded) - set(config)
+    if unknown:
+        raise ValueError(f"Chaves desconhecidas em {config_file}: {', '.join(sorted(unknown))}")
+    config.update(loaded)
+    if isinstance(config["variants"], list):
+        config["variants"] = {name: {} for name in config["variants"]}
+    for view in config["views"]:
+        view.setdefault("subdir", view["name"])
+    return config, config_file
+
+
+def fitted_variants(components, config):
+    """
+    Pré-filtro, uma passada: gera (componente, variantes em que ele é montado).
+    Lista vazia = excluído/DNP em todas. Sem variantes configuradas existe uma
+    única variante "" (a BOM normal). +Nome/-Nome de variante que não está na
+    configuração é ignorado com aviso (a peça não some da BOM por um nome
+    errado); se nenhum +Nome sobra, a peça é montada em todas.
+
+    >>> config = dict(default_config(), variant_field="Variant")
+    >>> [f for _, f in fitted_variants([{"Ref": "R1", "Variant": "+Full"}], config)]
+    Aviso: R1: variante desconhecida 'Full' no campo Variant (ignorada)
+    [['']]
+    >>> config["variants"] = {"Full": {}, "Lite": {}}
+    >>> [f for _, f in fitted_variants([{"Ref": "R2", "Variant": "+Ful"},
+    ...                                 {"Ref": "R3", "Variant": "+Lite -Max"}], config)]
+    Aviso: R2: variante desconhecida 'Ful' no campo Variant (ignorada)
+    Aviso: R3: variante desconhecida 'Max' no campo Variant (ignorada)
+    [['Full', 'Lite'], ['Lite']]
+    """
+    variants = list(config["variants"]) or [""]
+    exclude_fields = config["exclude_fields"]
+    variant_field = config["variant_field"]
+    dnp = {name: expand_refs(spec.get("dnp", [])) for name, spec in config["variants"].items()}
+    by_lower_name = {name.lower(): name for name in config["variants"]}
+
+    for comp in components:
+        if is_excluded(comp, exclude_fields):
+            yield comp, []
+            continue
+
+        fitted = variants
+        ref = comp.get("Ref", "")
+        tokens = comp.get(variant_field, "").replace(",", " ").split() if variant_field else []
+        if tokens:
+            only, removed = set(), set()
+            for token in tokens:
+                if token[:1] not in "+-":
+                    continue
+                name = by_lower_name.get(token[1:].lower())
+                if name is None:
+                    print(f"Aviso: {ref}: variante desconhecida '{token[1:]}' no campo {variant_field} (ignorada)")
+                elif token[0] == "+":
+                    only.add(name)
+                else:
+                    removed.add(name)
+            fitted = [v for v in fitted if (not only or v in only) and v not in removed]
+        yield comp, [v for v in fitted if ref not in dnp.get(v, ())]
 
 # =============================================================================
 # FUNÇÕES DE AGRUPAMENTO
 # =============================================================================
 
-def group_components(components, group_fields):
+def group_key(comp, group_fields, case_insensitive=False):
+    """Chave (hashable) do grupo: valores dos campos de agrupamento ("" se ausente)"""
+    if case_insensitive:
+        return tuple(comp.get(field, "").strip().casefold() for field in group_fields)
+    return tuple(comp.get(field, "") for field in group_fields)
+
+
+def group_components(components, group_fields, case_insensitive=False):
     """
     Agrupa os componentes com base nos campos especificados.
     Retorna um dicionário: chave = tupla dos valores dos campos de agrupamento,
@@ -273,60 +736,495 @@ def group_components(components, group_fields):
     """
     groups = {}
     for comp in components:
-        # Extrai os valores dos campos de agrupamento (se o campo não existir, usa string vazia)
-        key = tuple(comp.get(field, "") for field in group_fields)
-        if key not in groups:
-            groups[key] = []
-        groups[key].append(comp)
+        groups.setdefault(group_key(comp, group_fields, case_insensitive), []).append(comp)
     return groups
 
+
+def group_variants(components, config):
+    """
+    Agrupa todas as variantes numa única passada, já sem os excluídos/DNP.
+    Retorna {variante: {chave: [componentes]}}, na ordem das variantes.
+    """
+    variants = list(config["variants"]) or [""]
+    result = {variant: {} for variant in variants}
+    fields = config["group_by"]
+    case_insensitive = config["case_insensitive"]
+    for comp, fitted in fitted_variants(components, config):
+        if not fitted:
+            continue
+        key = group_key(comp, fields, case_insensitive)
+        for variant in fitted:
+            result[variant].setdefault(key, []).append(comp)
+    return result
+
 # =============================================================================
-# FUNÇÃO PARA ESCREVER CSV
+# RENDERIZAÇÃO DAS BOMs
 # =============================================================================
 
+def group_rows(groups, columns):
+    """
+    Calcula uma vez a linha de cada grupo com todas as colunas pedidas por
+    alguma view. Gera listas na ordem ["Ref", "Qty"] + columns.
+    Grupos vazios são omitidos.
+    """
+    for group_comps in groups.values():
+        refs, qty = group_refs(group_comps)
+        if not qty:
+            continue
+        # Usa o primeiro componente como representante
+        rep = group_comps[0]
+        yield [refs, str(qty)] + [rep.get(field, "") for field in columns]
+
+
+class CsvViewWriter:
+    extension = "csv"
+
+    def __init__(self, filepath, columns, title):
+        self.file = open(filepath, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow(columns)
+
+    def write_row(self, row):
+        self.writer.writerow(row)
+
+    def close(self):
+        self.file.close()
+
+
+class JsonViewWriter:
+    """Lista de objetos {coluna: valor}, gravada linha a linha"""
+    extension = "json"
+
+    def __init__(self, filepath, columns, title):
+        self.file = open(filepath, 'w', encoding='utf-8')
+        self.columns = columns
+        self.separator = "\n  "
+        self.file.write("[")
+
+    def write_row(self, row):
+        self.file.write(self.separator + json.dumps(dict(zip(self.columns, row)), ensure_ascii=False))
+        self.separator = ",\n  "
+
+    def close(self):
+        self.file.write("\n]\n")
+        self.file.close()
+
+
+class HtmlViewWriter:
+    extension = "html"
+
+    def __init__(self, filepath, columns, title):
+        self.file = open(filepath, 'w', encoding='utf-8')
+        self.file.write(
+            "<!DOCTYPE html>\n<html>\n<head>\n<meta charset=\"utf-8\">\n"
+            f"<title>{html.escape(title)}</title>\n"
+            "<style>table{border-collapse:collapse;font-family:sans-serif;font-size:12px}"
+            "th,td{border:1px solid #999;padding:2px 6px}th{background:#ddd}</style>\n"
+            f"</head>\n<body>\n<h1>{html.escape(title)}</h1>\n<table>\n<tr>"
+            + "".join(f"<th>{html.escape(c)}</th>" for c in columns) + "</tr>\n"
+        )
+
+    def write_row(self, row):
+        self.file.write("<tr>" + "".join(f"<td>{html.escape(v)}</td>" for v in row) + "</tr>\n")
+
+    def close(self):
+        self.file.write("</table>\n</body>\n</html>\n")
+        self.file.close()
+
+
+class XlsxViewWriter:
+    """Planilha em modo write_only (não guarda as linhas na memória)"""
+    extension = "xlsx"
+
+    def __init__(self, filepath, columns, title):
+        self.filepath = filepath
+        self.workbook = openpyxl.Workbook(write_only=True)
+        self.sheet = self.workbook.create_sheet(title[:31])
+        self.sheet.append(columns)
+
+    def write_row(self, row):
+        self.sheet.append(row)
+
+    def close(self):
+        self.workbook.save(self.filepath)
+
+
+VIEW_WRITERS = {
+    "csv": CsvViewWriter,
+    "json": JsonViewWriter,
+    "html": HtmlViewWriter,
+    "xlsx": XlsxViewWriter,
+}
+
+
+def available_formats(formats):
+    """Remove (com aviso) formatos desconhecidos ou sem dependência instalada"""
+    result = []
+    for fmt in formats:
+        if fmt not in VIEW_WRITERS:
+            print(f"Formato desconhecido ignorado: {fmt}")
+        elif fmt == "xlsx" and openpyxl is None:
+            print("Formato xlsx ignorado: instale o openpyxl (pip install openpyxl)")
+        elif fmt not in result:
+            result.append(fmt)
+    return result
+
+
+def write_boms(groups, views, output_dir, project_name, date_str, formats=OUTPUT_FORMATS):
+    """
+    Gera todas as views em todos os formatos numa única passada pelos grupos.
+    views: lista de {"name", "columns", "subdir"} (ver BOM_VIEWS)
+    Retorna {nome_da_view: [arquivos gerados]}.
+    """
+    # União das colunas de todas as views, na ordem em que aparecem
+    all_columns = []
+    seen = set()
+    for view in views:
+        for field in view["columns"]:
+            if field not in seen:
+                seen.add(field)
+                all_columns.append(field)
+    position = {field: i + 2 for i, field in enumerate(all_columns)}
+
+    formats = available_formats(formats)
+    outputs = []  # (projeção da linha, writer)
+    files = {}
+    try:
+        for view in views:
+            header = ["Ref", "Qty"] + view["columns"]
+            project = itemgetter(0, 1, *[position[f] for f in view["columns"]])
+            view_dir = os.path.join(output_dir, view["subdir"])
+            # Garante que o diretório de destino existe
+            os.makedirs(view_dir, exist_ok=True)
+            for fmt in formats:
+                writer_class = VIEW_WRITERS[fmt]
+                filepath = os.path.join(
+                    view_dir, f"BOM_{project_name}_{view['name']}_{date_str}.{writer_class.extension}")
+                title = f"BOM {project_name} - {view['name']}"
+                outputs.append((project, writer_class(filepath, header, title)))
+                files.setdefault(view["name"], []).append(filepath)
+
+        for row in group_rows(groups, all_columns):
+            for project, writer in outputs:
+                writer.write_row(list(project(row)))
+    finally:
+        for _, writer in outputs:
+            writer.close()
+    return files
+
+
 def write_csv(filepath, columns, groups):
     """
     Escreve um arquivo CSV com as colunas especificadas, a partir dos grupos.
     columns: lista de nomes de colunas (sem "Ref" e "Qty", que são sempre adicionadas)
     filepath: caminho completo do arquivo a ser criado.
     """
-    all_columns = ["Ref", "Qty"] + columns
     # Garante que o diretório de destino existe
-    os.makedirs(os.path.dirname(filepath), exist_ok=True)
-    with open(filepath, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.writer(csvfile)
-        writer.writerow(all_columns)
-        for group_comps in groups.values():
-            # Usa o primeiro componente como representante
-            rep = group_comps[0]
-            row = []
-            # Referências concatenadas
-            refs = ','.join([c.get("Ref", "") for c in group_comps])
-            row.append(refs)
-            # Quantidade
-            row.append(str(len(group_comps)))
-            # Demais campos
-            for field in columns:
-                row.append(rep.get(field, ""))
-            writer.writerow(row)
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    writer = CsvViewWriter(filepath, ["Ref", "Qty"] + columns, "")
+    try:
+        for row in group_rows(groups, columns):
+            writer.write_row(row)
+    finally:
+        writer.close()
+
+# =============================================================================
+# GERAÇÃO DE UM PROJETO
+# =============================================================================
+
+def generate_project_boms(components, output_base, config, date_str):
+    """
+    Agrupa (todas as variantes) e grava as BOMs de um projeto em
+    <pasta do projeto>/Outputs. Retorna ({variante: grupos}, {variante: {view: [arquivos]}}).
+    """
+    # O diretório do projeto é o diretório onde o output_base está
+    project_dir = os.path.dirname(output_base)
+    # Nome base do projeto (sem caminho e sem extensão)
+    project_name = os.path.basename(output_base)
+
+    # Pré-filtro (Exclude_from_BOM/DNP/variantes) e agrupamento de todas as variantes
+    variant_groups = group_variants(components, config)
+
+    # Estrutura: project_dir/Outputs/{Fabrication, Documentation, Assembly}/BOM_project_name[_variante]_{tipo}_{data}.{ext}
+    base_output_dir = os.path.join(project_dir, "Outputs")
+    files = {}
+    for variant, groups in variant_groups.items():
+        name = f"{project_name}_{variant}" if variant else project_name
+        files[variant] = write_boms(groups, config["views"], base_output_dir, name, date_str, config["formats"])
+    return variant_groups, files
+
+
+def enrich_from_database(components, db_path):
+    """Etapa de enriquecimento do modo de um projeto, com as mensagens para o usuário"""
+    if not os.path.isfile(db_path):
+        print(f"Aviso: banco não encontrado ({db_path}); BOM sem estoque/preço atualizados")
+        return
+    try:
+        with PartDatabase(db_path) as database:
+            found, missing = enrich_components(components, database)
+    except sqlite3.Error as e:
+        print(f"Aviso: não foi possível consultar o banco {db_path}: {e}")
+        return
+    print(f"Banco de peças: {found} MyPN atualizados, {len(missing)} não encontrados")
+    if missing:
+        print(f"  Não encontrados: {', '.join(missing[:10])}" + (" ..." if len(missing) > 10 else ""))
+
+# =============================================================================
+# MODO LOTE (vários projetos) E BOM DE COMPRAS CONSOLIDADA
+# =============================================================================
+
+# Colunas da BOM de compras consolidada (além de Qty_Total e Projects)
+PURCHASE_COLUMNS = [
+    'MyPN',
+    'Name',
+    'Description',
+    'Value',
+    'Footprint',
+    'Manufacturer',
+    'Manufacturer_PN',
+    'Stock_Qty',
+    'Stock_Unit',
+    'Price',
+    'Currency',
+]
+
+
+def find_batch_jobs(path):
+    """
+    Lista os projetos do lote. path pode ser:
+      - uma pasta: todas as netlists XML do KiCad (<export ...>) encontradas nela
+        e nas subpastas (exceto Outputs/)
+      - um manifesto JSON: {"projects": [{"netlist": "A/A.xml", "boards": 10,
+        "variant": "Lite", "config": "A/bom.json"}, ...]} (caminhos relativos ao manifesto)
+    Cada projeto vira {"netlist", "output_base", "boards", "variant", "config"}.
+    """
+    jobs = []
+    if os.path.isdir(path):
+        for current_dir, subdirs, files in os.walk(path):
+            subdirs[:] = sorted(d for d in subdirs if d != "Outputs" and not d.startswith("."))
+            for name in sorted(files):
+                if not name.lower().endswith(".xml"):
+                    continue
+                netlist = os.path.join(current_dir, name)
+                with open(netlist, "rb") as f:
+                    if b"<export" not in f.read(512):
+                        continue
+                jobs.append({"netlist": netlist})
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        base_dir = os.path.dirname(os.path.abspath(path))
+        entries = manifest["projects"] if isinstance(manifest, dict) else manifest
+        for entry in entries:
+            if isinstance(entry, str):
+                entry = {"netlist": entry}
+            job = dict(entry)
+            job["netlist"] = os.path.join(base_dir, entry["netlist"])
+            if entry.get("output"):
+                job["output_base"] = os.path.join(base_dir, entry["output"])
+            if entry.get("config"):
+                job["config"] = os.path.join(base_dir, entry["config"])
+            jobs.append(job)
+
+    for job in jobs:
+        job.setdefault("output_base", os.path.splitext(job["netlist"])[0])
+        job["output_base"] = os.path.splitext(job["output_base"])[0]
+        job.setdefault("boards", 1)
+        job.setdefault("variant", None)
+        job.setdefault("config", None)
+    return jobs
+
+
+def _batch_parse(job):
+    """Worker: lê a netlist de um projeto"""
+    try:
+        return job, parse_netlist(job["netlist"]), None
+    except Exception as e:
+        return job, None, str(e)
+
+
+def _batch_render(task):
+    """
+    Worker: aplica os dados do banco já consultados, agrupa e grava as BOMs de
+    um projeto. Devolve as linhas de compra {chave: [qty, campos]} da variante
+    escolhida (a do manifesto ou a primeira).
+    """
+    job, components, parts, formats, date_str = task
+    try:
+        config, _ = load_config(job["config"], os.path.dirname(job["output_base"]))
+        if formats:
+            config["formats"] = formats
+        apply_parts(components, parts)
+        variant_groups, files = generate_project_boms(components, job["output_base"], config, date_str)
+    except Exception as e:
+        return job, None, None, str(e)
+
+    variant = job["variant"] if job["variant"] is not None else next(iter(variant_groups))
+    if variant not in variant_groups:
+        return job, files, None, f"variante '{variant}' não existe na configuração"
+
+    purchase = {}
+    for group_comps in variant_groups[variant].values():
+        rep = group_comps[0]
+        _, qty = group_refs(group_comps)
+        mypn = rep.get("MyPN", "")
+        # Sem MyPN: agrupa pelo código do fabricante (ou valor + footprint)
+        key = mypn or f"?{rep.get('Manufacturer_PN') or rep.get('Value', '')}|{rep.get('Footprint', '')}"
+        line = purchase.setdefault(key, [0, {c: rep.get(c, "") for c in PURCHASE_COLUMNS}])
+        line[0] += qty
+    return job, files, purchase, None
+
+
+def write_purchase_bom(filepath, purchases):
+    """
+    Grava a BOM de compras consolidada: uma linha por MyPN com a soma de
+    (quantidade por placa x placas) de todos os projetos.
+    purchases: lista de (nome do projeto, placas, {chave: [qty, campos]})
+    """
+    totals = {}
+    for project_name, boards, lines in purchases:
+        for key, (qty, fields) in lines.items():
+            total = totals.setdefault(key, [0, fields, []])
+            total[0] += qty * boards
+            total[2].append(f"{project_name} ({qty}x{boards})" if boards != 1 else f"{project_name} ({qty})")
+
+    os.makedirs(os.path.dirname(filepath) or ".", exist_ok=True)
+    with open(filepath, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(PURCHASE_COLUMNS + ["Qty_Total", "Shortfall", "Projects"])
+        for key in sorted(totals, key=lambda k: (k.startswith("?"), k)):
+            qty, fields, projects = totals[key]
+            stock = fields.get("Stock_Qty", "")
+            shortfall = max(0, qty - int(float(stock))) if _is_number(stock) else ""
+            writer.writerow([fields.get(c, "") for c in PURCHASE_COLUMNS] + [qty, shortfall, "; ".join(projects)])
+    return len(totals)
+
+
+def _is_number(text):
+    try:
+        float(text)
+        return True
+    except (TypeError, ValueError):
+        return False
+
+
+def run_batch(path, jobs=None, db_path=None, formats=None, purchase_file=None):
+    """
+    Gera as BOMs de todos os projetos do lote em processos paralelos:
+      1. lê as netlists (pool)
+      2. consulta o banco uma única vez com os MyPNs de todos os projetos
+      3. agrupa e grava as BOMs de cada projeto (pool)
+      4. grava a BOM de compras consolidada por MyPN
+    Retorna o número de projetos com erro.
+    """
+    batch_jobs = find_batch_jobs(path)
+    if not batch_jobs:
+        print(f"Nenhuma netlist encontrada em {path}")
+        return 1
+    print(f"Projetos no lote: {len(batch_jobs)}")
+
+    date_str = datetime.datetime.now().strftime("%Y%m%d")
+    errors = 0
+    processes = max(1, min(jobs or os.cpu_count() or 1, len(batch_jobs)))
+    pool = Pool(processes) if processes > 1 else None
+    try:
+        run = pool.imap if pool else map
+
+        parsed = []
+        for job, components, error in run(_batch_parse, batch_jobs):
+            if error:
+                print(f"  ERRO {job['netlist']}: {error}")
+                errors += 1
+            else:
+                parsed.append((job, components))
+
+        # Um único cache de peças para todos os projetos
+        parts = {}
+        if db_path:
+            if os.path.isfile(db_path):
+                mypns = {c.get("MyPN", "") for _, comps in parsed for c in comps} - {""}
+                try:
+                    with PartDatabase(db_path) as database:
+                        parts = database.lookup(mypns)
+                    print(f"Banco de peças: {len(parts)} de {len(mypns)} MyPN encontrados")
+                except sqlite3.Error as e:
+                    print(f"Aviso: não foi possível consultar o banco {db_path}: {e}")
+            else:
+                print(f"Aviso: banco não encontrado ({db_path}); BOMs sem estoque/preço atualizados")
+
+        purchases = []
+        tasks = [(job, comps, parts, formats, date_str) for job, comps in parsed]
+        for job, files, purchase, error in run(_batch_render, tasks):
+            name = os.path.basename(job["output_base"])
+            if error:
+                print(f"  ERRO {name}: {error}")
+                errors += 1
+                continue
+            count = sum(len(paths) for views in files.values() for paths in views.values())
+            print(f"  {name}: {count} arquivos, {len(purchase)} itens de compra x {job['boards']} placa(s)")
+            purchases.append((name, job["boards"], purchase))
+    finally:
+        if pool:
+            pool.close()
+            pool.join()
+
+    if purchases:
+        if purchase_file is None:
+            base_dir = path if os.path.isdir(path) else os.path.dirname(os.path.abspath(path))
+            purchase_file = os.path.join(base_dir, "Outputs", f"BOM_Purchasing_{date_str}.csv")
+        items = write_purchase_bom(purchase_file, purchases)
+        print(f"BOM de compras consolidada ({items} itens): {purchase_file}")
+    return errors
 
 # =============================================================================
 # PRINCIPAL
 # =============================================================================
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Gera as BOMs customizadas a partir da netlist XML do KiCad")
+    parser.add_argument("input_file", nargs="?", help="Netlist XML exportada pelo KiCad (%%I)")
+    parser.add_argument("output_base", nargs="?", help="Caminho base de saída (%%O)")
+    parser.add_argument("--formats",
+                        help="Formatos separados por vírgula: csv,json,html,xlsx (padrão: os da configuração)")
+    parser.add_argument("--database", default=DEFAULT_DATABASE,
+                        help="Banco de peças para estoque/preço atualizados (padrão: MyKiCadLibDatabase.sqlite)")
+    parser.add_argument("--no-enrich", action="store_true",
+                        help="Não consulta o banco (usa só os campos da netlist)")
+    parser.add_argument("--config",
+                        help=f"JSON de configuração do projeto (padrão: {PROJECT_CONFIG_NAME} na pasta do projeto)")
+    parser.add_argument("--batch", metavar="PASTA_OU_MANIFESTO",
+                        help="Gera as BOMs de vários projetos (pasta com netlists ou manifesto JSON)")
+    parser.add_argument("-j", "--jobs", type=int, help="Processos no modo lote (padrão: todos os núcleos)")
+    parser.add_argument("--purchase-output", help="CSV da BOM de compras consolidada do lote")
+    args = parser.parse_args(argv)
+    if not args.batch and not (args.input_file and args.output_base):
+        parser.error("informe <arquivo_entrada.xml> <arquivo_saida_base> ou --batch")
+    return args
+
+
 if __name__ == "__main__":
-    if len(sys.argv) != 3:
-        print("Uso: python bom_customizado.py <arquivo_entrada.xml> <arquivo_saida_base>")
-        sys.exit(1)
+    args = parse_args()
+    formats = [f.strip().lower() for f in args.formats.split(",") if f.strip()] if args.formats else None
+
+    if args.batch:
+        db_path = None if args.no_enrich else args.database
+        sys.exit(1 if run_batch(args.batch, args.jobs, db_path, formats, args.purchase_output) else 0)
 
-    input_file = sys.argv[1]
-    output_base = sys.argv[2]
+    input_file = args.input_file
+    output_base = args.output_base
     output_base = os.path.splitext(output_base)[0]  # remove eventual extensão
 
-    # O diretório do projeto é o diretório onde o output_base está
-    project_dir = os.path.dirname(output_base)
-    # Nome base do projeto (sem caminho e sem extensão)
-    project_name = os.path.basename(output_base)
+    # Configuração do projeto (agrupamento, exclusões, variantes, views)
+    try:
+        config, config_file = load_config(args.config, os.path.dirname(output_base))
+    except (OSError, ValueError) as e:
+        print(f"Erro ao ler a configuração: {e}")
+        sys.exit(1)
+    if config_file:
+        print(f"Configuração: {config_file}")
+    if formats:
+        config["formats"] = formats
 
     # Carrega os componentes do XML
     try:
@@ -336,39 +1234,20 @@ if __name__ == "__main__":
         print(f"Erro ao ler o arquivo XML: {e}")
         sys.exit(1)
 
-    # (Opcional) Filtrar componentes com Exclude_from_BOM = 1
-    # filtered = []
-    # for comp in components:
-    #     if comp.get("Exclude_from_BOM", "").lower() not in ["1", "true", "yes"]:
-    #         filtered.append(comp)
-    # components = filtered
-
-    # Agrupa
-    groups = group_components(components, GROUP_BY_FIELDS)
+    # Estoque e preço atualizados a partir do banco de peças
+    if not args.no_enrich:
+        enrich_from_database(components, args.database)
 
     # Data para o nome do arquivo
     date_str = datetime.datetime.now().strftime("%Y%m%d")
 
-    # Define os caminhos de saída conforme a estrutura solicitada
-    # Estrutura: project_dir/Outputs/{Fabrication, Documentation, Assemble}/project_name_{tipo}_{data}.csv
-    base_output_dir = os.path.join(project_dir, "Outputs")
-
-    # Buyer (Fabrication)
-    buyer_dir = os.path.join(base_output_dir, "Fabrication")
-    buyer_file = os.path.join(buyer_dir, f"BOM_{project_name}_Buyer_{date_str}.csv")
-    write_csv(buyer_file, BUYER_COLUMNS, groups)
-
-    # Engineer (Documentation)
-    engineer_dir = os.path.join(base_output_dir, "Documentation")
-    engineer_file = os.path.join(engineer_dir, f"BOM_{project_name}_Engineer_{date_str}.csv")
-    write_csv(engineer_file, ENGINEERING_COLUMNS, groups)
-
-    # Assembly (Assemble)
-    assembly_dir = os.path.join(base_output_dir, "Assembly")
-    assembly_file = os.path.join(assembly_dir, f"BOM_{project_name}_Assembly_{date_str}.csv")
-    write_csv(assembly_file, ASSEMBLY_COLUMNS, groups)
+    variant_groups, files = generate_project_boms(components, output_base, config, date_str)
 
     print("BOMs geradas com sucesso:")
-    print(f"  Buyer    : {buyer_file}")
-    print(f"  Engineer : {engineer_file}")
-    print(f"  Assembly : {assembly_file}")
\ No newline at end of file
+    for variant, views in files.items():
+        if variant:
+            groups = variant_groups[variant]
+            print(f"  Variante {variant} ({sum(len(g) for g in groups.values())} componentes montados)")
+        for view_name, paths in views.items():
+            for path in paths:
+                print(f"  {view_name:<9}: {path}")
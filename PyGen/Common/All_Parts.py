@@ -0,0 +1,227 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Tabela única All_Parts com as colunas comuns de todas as tabelas de componentes
+Arquivo: PyGen/Common/All_Parts.py
+
+O banco tem uma tabela por categoria (Resistor_0603, Connector_PIN, ...) e o
+KiCad lê cada uma separado. Perguntas globais ("em que tabela está o MyPN X?",
+"quem usa o MPN Y?", "que peças usam este footprint?") viravam um UNION sobre
+todas as tabelas. All_Parts é uma cópia materializada das colunas comuns
+(COLUMNS) com índices próprios e FTS5 sobre nome/valor/descrição/MPN, então a
+busca global é uma consulta só.
+
+Como a cópia é mantida:
+    - build cria All_Parts, o FTS5 e os gatilhos (SQL puro) de cada tabela
+      de componentes, e recopia tudo
+    - os gatilhos repetem em All_Parts cada INSERT/UPDATE/DELETE feito na
+      tabela de origem, venha ele dos geradores, do DB Browser ou de outro
+      programa
+    - tabela nova no banco: rode build de novo para ela ganhar os gatilhos
+
+Uso pela linha de comando:
+    python All_Parts.py --db banco.sqlite build
+    python All_Parts.py --db banco.sqlite mypn EL-RES-000123
+    python All_Parts.py --db banco.sqlite mpn AA0603FR-074K7L
+    python All_Parts.py --db banco.sqlite search "ldo 3.3"
+"""
+
+import sys
+import sqlite3
+import argparse
+
+TABLE = 'All_Parts'
+FTS_TABLE = 'All_Parts_fts'
+
+# Colunas copiadas de cada tabela de componentes (NULL se a tabela não tem)
+COLUMNS = ('MyPN', 'Name', 'Value', 'Description', 'Manufacturer', 'Manufacturer_PN', 'Footprint', 'Category')
+
+# Colunas do FTS5
+FTS_COLUMNS = ('Name', 'Value', 'Description', 'Manufacturer_PN')
+
+# Tabelas que não são de componentes, mesmo que tenham MyPN
+INTERNAL_PREFIXES = (TABLE, 'MyPN_', 'sqlite_')
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS {TABLE} (
+    ID INTEGER PRIMARY KEY,
+    Source_Table TEXT NOT NULL,
+    {', '.join(f'{c} TEXT' for c in COLUMNS)},
+    UNIQUE (Source_Table, MyPN)
+);
+CREATE INDEX IF NOT EXISTS idx_all_parts_mypn ON {TABLE}(MyPN, Source_Table);
+CREATE INDEX IF NOT EXISTS idx_all_parts_mpn ON {TABLE}(Manufacturer_PN, MyPN, Source_Table);
+CREATE INDEX IF NOT EXISTS idx_all_parts_footprint ON {TABLE}(Footprint, MyPN);
+
+-- FTS5 com conteúdo externo: o texto fica só em {TABLE}
+CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+    {', '.join(FTS_COLUMNS)},
+    content='{TABLE}', content_rowid='ID', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS all_parts_ai AFTER INSERT ON {TABLE} BEGIN
+    INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+    VALUES (new.ID, {', '.join(f'new.{c}' for c in FTS_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS all_parts_ad AFTER DELETE ON {TABLE} BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+    VALUES ('delete', old.ID, {', '.join(f'old.{c}' for c in FTS_COLUMNS)});
+END;
+CREATE TRIGGER IF NOT EXISTS all_parts_au AFTER UPDATE ON {TABLE} BEGIN
+    INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, {', '.join(FTS_COLUMNS)})
+    VALUES ('delete', old.ID, {', '.join(f'old.{c}' for c in FTS_COLUMNS)});
+    INSERT INTO {FTS_TABLE}(rowid, {', '.join(FTS_COLUMNS)})
+    VALUES (new.ID, {', '.join(f'new.{c}' for c in FTS_COLUMNS)});
+END;
+"""
+
+
+def is_internal(table):
+    return table.startswith(INTERNAL_PREFIXES)
+
+
+def part_tables(conn):
+    """Tabelas de componentes (têm MyPN e não são internas): {tabela: colunas}"""
+    tables = {}
+    for table, column in conn.execute(
+            "SELECT m.name, p.name FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+            "WHERE m.type = 'table' ORDER BY m.name, p.cid"):
+        tables.setdefault(table, []).append(column)
+    return {table: columns for table, columns in tables.items()
+            if 'MyPN' in columns and not is_internal(table)}
+
+
+def _source_values(columns, row):
+    """Expressões das COLUMNS a partir de row ('NEW'/'OLD' ou nome da tabela)"""
+    return ', '.join(f'{row}."{c}"' if c in columns else 'NULL' for c in COLUMNS)
+
+
+def trigger_sql(table, columns):
+    """Gatilhos que repetem em All_Parts as mudanças de uma tabela de componentes"""
+    quoted = f'"{table}"'
+    literal = "'" + table.replace("'", "''") + "'"
+    column_list = ', '.join(COLUMNS)
+    mirrored = ', '.join(f'"{c}"' for c in COLUMNS if c in columns)
+    assignments = ', '.join(f'{c} = NEW."{c}"' if c in columns else f'{c} = NULL' for c in COLUMNS)
+    # A linha antiga é apagada antes de inserir: um INSERT OR REPLACE na
+    # origem não dispara o gatilho de DELETE e deixaria a cópia velha
+    return [
+        f'DROP TRIGGER IF EXISTS "all_parts_{table}_ai"',
+        f'DROP TRIGGER IF EXISTS "all_parts_{table}_au"',
+        f'DROP TRIGGER IF EXISTS "all_parts_{table}_ad"',
+        f'CREATE TRIGGER "all_parts_{table}_ai" AFTER INSERT ON {quoted} BEGIN '
+        f'DELETE FROM {TABLE} WHERE Source_Table = {literal} AND MyPN = NEW."MyPN"; '
+        f'INSERT INTO {TABLE} (Source_Table, {column_list}) VALUES ({literal}, {_source_values(columns, "NEW")}); '
+        f'END',
+        f'CREATE TRIGGER "all_parts_{table}_au" AFTER UPDATE OF {mirrored} ON {quoted} BEGIN '
+        f'UPDATE {TABLE} SET {assignments} WHERE Source_Table = {literal} AND MyPN = OLD."MyPN"; '
+        f'END',
+        f'CREATE TRIGGER "all_parts_{table}_ad" AFTER DELETE ON {quoted} BEGIN '
+        f'DELETE FROM {TABLE} WHERE Source_Table = {literal} AND MyPN = OLD."MyPN"; '
+        f'END',
+    ]
+
+
+def exists(conn):
+    return conn.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?",
+                        (TABLE,)).fetchone() is not None
+
+
+def sync_table(conn, table, columns=None):
+    """
+    Recria os gatilhos de uma tabela e recopia as linhas dela em All_Parts
+    (ex: depois de a tabela ser reconstruída). Não abre transação.
+    Retorna quantas linhas foram copiadas.
+    """
+    if columns is None:
+        columns = [row[1] for row in conn.execute("SELECT * FROM pragma_table_info(?)", (table,))]
+    for sql in trigger_sql(table, columns):
+        conn.execute(sql)
+    conn.execute(f"DELETE FROM {TABLE} WHERE Source_Table = ?", (table,))
+    source = f'"{table}"'
+    return conn.execute(
+        f'INSERT INTO {TABLE} (Source_Table, {", ".join(COLUMNS)}) '
+        f'SELECT ?, {_source_values(columns, source)} FROM {source}', (table,)).rowcount
+
+
+def build(conn):
+    """
+    Cria All_Parts, o FTS5 e os gatilhos de todas as tabelas de componentes e
+    recopia as linhas numa transação (conn em autocommit, isolation_level=None).
+    Pode rodar de novo (ex: depois de criar tabelas).
+    Retorna {tabela: linhas copiadas}.
+    """
+    conn.executescript(SCHEMA)
+    conn.execute("BEGIN")
+    try:
+        conn.execute(f"DELETE FROM {TABLE}")
+        counts = {table: sync_table(conn, table, columns) for table, columns in part_tables(conn).items()}
+        conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+    return counts
+
+
+def find_mypn(conn, mypn):
+    """Linhas de All_Parts com o MyPN (normalmente uma)"""
+    return conn.execute(f"SELECT Source_Table, {', '.join(COLUMNS)} FROM {TABLE} WHERE MyPN = ?",
+                        (mypn,)).fetchall()
+
+
+def find_mpn(conn, mpn):
+    """Linhas de All_Parts com o MPN do fabricante (igualdade exata)"""
+    return conn.execute(f"SELECT Source_Table, {', '.join(COLUMNS)} FROM {TABLE} WHERE Manufacturer_PN = ?",
+                        (mpn,)).fetchall()
+
+
+def search(conn, text, limit=50):
+    """Busca FTS5 (sintaxe do FTS5, ex: 'ldo 3.3', 'AA0603*'), mais relevantes primeiro"""
+    return conn.execute(
+        f"SELECT t.Source_Table, {', '.join('t.' + c for c in COLUMNS)} "
+        f"FROM {FTS_TABLE} f JOIN {TABLE} t ON t.ID = f.rowid "
+        f"WHERE {FTS_TABLE} MATCH ? ORDER BY rank LIMIT ?", (text, limit)).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Tabela All_Parts: busca global em todas as tabelas de componentes")
+    parser.add_argument("--db", required=True, help="Banco da biblioteca")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="Cria/recria All_Parts, o FTS5 e os gatilhos")
+    mypn = sub.add_parser("mypn", help="Em que tabela está o MyPN")
+    mypn.add_argument("valor")
+    mpn = sub.add_parser("mpn", help="Quais MyPN têm o MPN do fabricante")
+    mpn.add_argument("valor")
+    text = sub.add_parser("search", help="Busca por texto (FTS5)")
+    text.add_argument("valor", help="Consulta FTS5 (ex: 'ldo 3.3', 'AA0603*')")
+    text.add_argument("--limite", type=int, default=50)
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        if args.command == "build":
+            counts = build(conn)
+            print(f"✅ {sum(counts.values())} linhas de {len(counts)} tabelas em {TABLE}")
+            return 0
+
+        try:
+            if args.command == "mypn":
+                rows = find_mypn(conn, args.valor)
+            elif args.command == "mpn":
+                rows = find_mpn(conn, args.valor)
+            else:
+                rows = search(conn, args.valor, args.limite)
+        except sqlite3.OperationalError as e:
+            print(f"❌ {e} (rode 'build' antes?)", file=sys.stderr)
+            return 2
+        print('\t'.join(('Source_Table',) + COLUMNS))
+        for row in rows:
+            print('\t'.join('' if v is None else str(v) for v in row))
+        return 0 if rows else 1
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Carga em massa das linhas geradas direto no banco SQLite
+Arquivo: PyGen/Common/Bulk_Loader.py
+
+Os geradores (Gerar_Insert_*) entregam as linhas como listas/tuplas de
+valores Python e o loader grava com executemany e parâmetros (?), sem montar
+texto SQL: nada de aspas escapadas à mão nem arquivos .sql intermediários.
+
+Durante a carga o banco fica em journal_mode=WAL e a conexão em
+synchronous=OFF, e cada chamada de load() é uma única transação (tudo ou nada
+por tabela). O journal_mode fica gravado no arquivo, então close() volta ao
+modo original (o banco da biblioteca é aberto pelo KiCad/DB Browser sem
+os arquivos -wal/-shm); o synchronous vale só para esta conexão.
+
+Uso típico:
+    with BulkLoader("MyKiCadLibDatabase.sqlite") as loader:
+        loader.load("Resistor_0603", COLUNAS, linhas)
+
+Modo mesclar (merge): cada linha recebe um hash do conteúdo e é comparada com
+o hash da linha de mesmo MyPN já gravada; só as novas e as que mudaram passam
+por INSERT ... ON CONFLICT(MyPN) DO UPDATE. Rodar de novo um gerador depois de
+corrigir um datasheet mexe só nas linhas afetadas, e as diferenças aplicadas
+podem ser gravadas num relatório CSV (write_report). Com owned (os MyPN que
+são do gerador, ex: o bloco de MyPN_Allocator) as linhas gravadas desse
+conjunto que o gerador não produz mais entram no relatório como 'missing':
+ficam no banco (podem estar em esquemáticos), só são apontadas.
+
+Tabelas com colunas de parâmetros numéricas (<coluna>_SI, ver Parametric.py)
+têm essas colunas preenchidas na mesma transação da carga.
+
+O texto "datetime('now')" (NOW), usado pelos geradores em Created_At, vira a
+data/hora UTC atual no mesmo formato do datetime('now') do SQLite.
+Para manter o .sql como alternativa existem write_insert_sql() e write_sql_file().
+"""
+
+import os
+import re
+import csv
+import hashlib
+import sqlite3
+from datetime import datetime, timezone
+
+from Parametric import shadowed_columns, refresh_table
+
+# Marcador de "agora" usado pelos geradores
+NOW = "datetime('now')"
+
+# O que fazer quando a linha já existe (MyPN é UNIQUE)
+CONFLICT_CLAUSES = {
+    None: "INSERT",
+    'ignore': "INSERT OR IGNORE",
+    'replace': "INSERT OR REPLACE",
+}
+
+# Modos de gravação dos geradores (ver add_database_arguments)
+MODE_INSERT = 'insert'
+MODE_REPLACE = 'replace'
+MODE_MERGE = 'merge'
+
+# Chave usada para casar as linhas na mesclagem
+MERGE_KEY = 'MyPN'
+
+# Colunas que não entram no hash nem são sobrescritas ao mesclar
+MERGE_IGNORED = frozenset({'Created_At', 'Created_By', 'Modified_At', 'Modified_By'})
+
+# Quantos MyPN por consulta ao buscar os valores antigos do relatório
+SQL_BATCH_SIZE = 500
+
+# Colunas do relatório de diferenças
+REPORT_COLUMNS = ['Table', 'MyPN', 'Action', 'Column', 'Old', 'New']
+
+
+def sqlite_now():
+    """Data/hora UTC atual no formato do datetime('now') do SQLite"""
+    return datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def quote_identifier(name):
+    """Nome de tabela/coluna entre aspas duplas para o SQL"""
+    return '"' + name.replace('"', '""') + '"'
+
+
+def sql_literal(value):
+    """Converte um valor Python em literal SQL (usado só no .sql de alternativa)"""
+    if value is None:
+        return "NULL"
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, (int, float)):
+        return str(value)
+    if value == NOW:
+        return value
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+# Texto que o SQLite converte em número numa coluna INTEGER/REAL/NUMERIC
+NUMERIC_TEXT = re.compile(r'\s*[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?\s*')
+
+
+def column_affinity(declared_type):
+    """Afinidade do SQLite para o tipo declarado da coluna (regras de datatype3)"""
+    declared = (declared_type or '').upper()
+    if 'INT' in declared:
+        return 'INTEGER'
+    if 'CHAR' in declared or 'CLOB' in declared or 'TEXT' in declared:
+        return 'TEXT'
+    if not declared or 'BLOB' in declared:
+        return 'BLOB'
+    if 'REAL' in declared or 'FLOA' in declared or 'DOUB' in declared:
+        return 'REAL'
+    return 'NUMERIC'
+
+
+def apply_affinity(value, affinity):
+    """
+    Valor como o SQLite o gravaria numa coluna com essa afinidade: 1.0 vira 1
+    em INTEGER/NUMERIC, 1 vira 1.0 em REAL, '5' vira 5 fora de TEXT/BLOB.
+    """
+    if isinstance(value, bool):
+        value = int(value)
+    if value is None or affinity in ('TEXT', 'BLOB') or value == NOW:
+        return value
+    if isinstance(value, str):
+        if not NUMERIC_TEXT.fullmatch(value):
+            return value
+        try:
+            value = int(value)
+        except ValueError:
+            value = float(value)
+    if not isinstance(value, (int, float)):
+        return value
+    if affinity == 'REAL':
+        return float(value)
+    if isinstance(value, float) and value.is_integer() and abs(value) < 2 ** 63:
+        return int(value)
+    return value
+
+
+def _text(value):
+    """Valor como o SQLite devolve numa coluna TEXT (None continua None)"""
+    if value is None:
+        return None
+    if isinstance(value, bool):
+        return str(int(value))
+    return str(value)
+
+
+def row_hash(values, affinities=None):
+    """
+    Hash (blake2b) do conteúdo de uma linha, insensível a int/float vs texto.
+    Com affinities (uma por valor) os valores passam antes por apply_affinity,
+    para que o 1.0 do gerador e o 1 gravado numa coluna INTEGER tenham o mesmo hash.
+    """
+    if affinities is not None:
+        values = map(apply_affinity, values, affinities)
+    digest = hashlib.blake2b(digest_size=16)
+    for value in values:
+        text = _text(value)
+        digest.update(b'\x00' if text is None else b'\x01' + text.encode('utf-8'))
+        digest.update(b'\x1f')
+    return digest.digest()
+
+
+def add_database_arguments(parser):
+    """Adiciona --database, --substituir, --mesclar e --relatorio a um gerador"""
+    parser.add_argument("--database", metavar="SQLITE",
+                        help="Grava direto neste banco em vez de gerar os arquivos .sql")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--substituir", action="store_true",
+                       help="Com --database, substitui as linhas cujo MyPN já existe")
+    group.add_argument("--mesclar", action="store_true",
+                       help="Com --database, grava só as linhas novas ou alteradas (chave MyPN)")
+    parser.add_argument("--relatorio", metavar="CSV",
+                        help="Com --mesclar, grava neste CSV as diferenças aplicadas")
+
+
+def mode_from_args(args):
+    """Modo de gravação escolhido na linha de comando"""
+    if args.mesclar:
+        return MODE_MERGE
+    if args.substituir:
+        return MODE_REPLACE
+    return MODE_INSERT
+
+
+def write_insert_sql(f, table, columns, rows):
+    """
+    Escreve num arquivo texto aberto um INSERT com todas as linhas, no mesmo
+    formato que os geradores usavam para colar no DB Browser. Retorna quantas
+    linhas foram escritas (0 não escreve nada).
+    """
+    count = 0
+    for row in rows:
+        if count == 0:
+            f.write(f"INSERT INTO {table} ({', '.join(columns)}) VALUES\n")
+        else:
+            f.write(",\n")
+        f.write("(" + ", ".join(sql_literal(v) for v in row) + ")")
+        count += 1
+    if count:
+        f.write(";\n")
+    return count
+
+
+def write_sql_file(path, table, columns, rows, comments=()):
+    """Grava um arquivo .sql com os comentários (-- ...) e o INSERT das linhas"""
+    with open(path, "w", encoding="utf-8") as f:
+        for comment in comments:
+            f.write(f"-- {comment}\n")
+        f.write("\n")
+        return write_insert_sql(f, table, columns, rows)
+
+
+class BulkLoader:
+    """
+    Conexão de carga: valida tabela e colunas contra o banco e grava as linhas
+    em uma transação por chamada de load()/merge(). stats guarda
+    {tabela: linhas gravadas} e changes as diferenças aplicadas por merge().
+    mode define o que store() usa (MODE_INSERT, MODE_REPLACE ou MODE_MERGE).
+    """
+
+    def __init__(self, db_path, mode=MODE_INSERT):
+        if not os.path.isfile(db_path):
+            raise FileNotFoundError(f"Banco não encontrado: {db_path}")
+        self.db_path = os.path.abspath(db_path)
+        self.mode = mode
+        self.stats = {}
+        self.changes = []
+        self._columns = {}
+        self._affinities = {}
+        self.conn = sqlite3.connect(self.db_path, isolation_level=None)
+        self._journal_mode = self.conn.execute("PRAGMA journal_mode").fetchone()[0]
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=OFF")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def columns(self, table):
+        """Colunas da tabela no banco (ValueError se ela não existe)"""
+        if table not in self._columns:
+            info = self.conn.execute("SELECT name, type FROM pragma_table_info(?)", (table,)).fetchall()
+            if not info:
+                raise ValueError(f"Tabela '{table}' não existe em {os.path.basename(self.db_path)}")
+            self._columns[table] = [name for name, _ in info]
+            self._affinities[table] = {name: column_affinity(declared) for name, declared in info}
+        return self._columns[table]
+
+    def affinities(self, table, columns):
+        """Afinidade do SQLite de cada coluna de columns em table"""
+        self.columns(table)
+        return [self._affinities[table][c] for c in columns]
+
+    def _check_columns(self, table, columns):
+        existing = set(self.columns(table))
+        missing = [c for c in columns if c not in existing]
+        if missing:
+            raise ValueError(f"Colunas inexistentes em {table}: {', '.join(missing)}")
+
+    def load(self, table, columns, rows, on_conflict=None):
+        """
+        Grava rows (iterável de sequências na ordem de columns) em table numa
+        única transação e retorna quantas linhas foram gravadas.
+        on_conflict: None (erro se o MyPN já existe), 'ignore' ou 'replace'.
+        Em caso de erro nada da chamada fica gravado.
+        """
+        if on_conflict not in CONFLICT_CLAUSES:
+            raise ValueError(f"on_conflict inválido: {on_conflict!r}")
+        self._check_columns(table, columns)
+
+        sql = (f"{CONFLICT_CLAUSES[on_conflict]} INTO {quote_identifier(table)} "
+               f"({', '.join(quote_identifier(c) for c in columns)}) "
+               f"VALUES ({', '.join('?' * len(columns))})")
+
+        now = sqlite_now()
+        width = len(columns)
+
+        def bind(rows):
+            for row in rows:
+                if len(row) != width:
+                    raise ValueError(f"{table}: linha com {len(row)} valores para {width} colunas")
+                if NOW in row:
+                    row = [now if v == NOW else v for v in row]
+                yield row
+
+        self.conn.execute("BEGIN")
+        try:
+            count = self.conn.executemany(sql, bind(rows)).rowcount
+            self._refresh_parameters(table)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+        self.stats[table] = self.stats.get(table, 0) + count
+        return count
+
+    def merge(self, table, columns, rows, key=MERGE_KEY, owned=None):
+        """
+        Mescla rows em table pela coluna key: linhas novas são inseridas, as
+        que mudaram são atualizadas (Modified_At = agora) e as iguais não são
+        tocadas. Colunas de MERGE_IGNORED não contam na comparação e não são
+        sobrescritas. owned: chaves que pertencem a quem gerou rows; as
+        gravadas que não vieram em rows são contadas/relatadas como 'missing'
+        (sem owned a tabela pode ter linhas de outros geradores e nada é
+        relatado). Retorna {'inserted', 'updated', 'unchanged', 'missing'}.
+        """
+        self._check_columns(table, columns)
+        if key not in columns:
+            raise ValueError(f"{table}: a coluna {key} é obrigatória para mesclar")
+        key_index = columns.index(key)
+        compared = [i for i, c in enumerate(columns) if c != key and c not in MERGE_IGNORED]
+        names = [columns[i] for i in compared]
+        quoted = [quote_identifier(c) for c in names]
+        affinities = self.affinities(table, names)
+
+        stored = {
+            row[0]: row_hash(row[1:])
+            for row in self.conn.execute(
+                f"SELECT {quote_identifier(key)}, {', '.join(quoted)} FROM {quote_identifier(table)}")
+        }
+
+        width = len(columns)
+        pending = []
+        updated = []
+        unchanged = 0
+        generated = set()
+        for row in rows:
+            if len(row) != width:
+                raise ValueError(f"{table}: linha com {len(row)} valores para {width} colunas")
+            generated.add(row[key_index])
+            values = [row[i] for i in compared]
+            old_hash = stored.get(row[key_index])
+            if old_hash == row_hash(values, affinities):
+                unchanged += 1
+                continue
+            pending.append(row)
+            if old_hash is not None:
+                updated.append((row[key_index], values))
+        inserted = len(pending) - len(updated)
+
+        missing = self._missing(table, stored, generated, owned)
+        result = {'inserted': inserted, 'updated': len(updated), 'unchanged': unchanged,
+                  'missing': len(missing)}
+        if not pending:
+            self.changes.extend(missing)
+            return result
+
+        set_clause = [f"{q} = excluded.{q}" for q in quoted]
+        if 'Modified_At' in self.columns(table) and 'Modified_At' not in columns:
+            set_clause.append('"Modified_At" = datetime(\'now\')')
+        sql = (f"INSERT INTO {quote_identifier(table)} "
+               f"({', '.join(quote_identifier(c) for c in columns)}) "
+               f"VALUES ({', '.join('?' * width)}) "
+               f"ON CONFLICT({quote_identifier(key)}) DO UPDATE SET {', '.join(set_clause)}")
+
+        changes = self._diff(table, key, names, quoted, updated, affinities)
+        now = sqlite_now()
+        self.conn.execute("BEGIN")
+        try:
+            self.conn.executemany(sql, ([now if v == NOW else v for v in row] for row in pending))
+            self._refresh_parameters(table)
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
+
+        self.changes.extend([table, row[key_index], 'insert', '', '', '']
+                            for row in pending if row[key_index] not in stored)
+        self.changes.extend(changes)
+        self.changes.extend(missing)
+        self.stats[table] = self.stats.get(table, 0) + len(pending)
+        return result
+
+    def _refresh_parameters(self, table):
+        """Preenche as colunas _SI das linhas recém-gravadas (se a tabela as tem)"""
+        if shadowed_columns(self.columns(table)):
+            refresh_table(self.conn, table)
+
+    def _diff(self, table, key, names, quoted, updated, affinities):
+        """Linhas do relatório (uma por coluna alterada) das linhas atualizadas"""
+        new_values = dict(updated)
+        keys = list(new_values)
+        changes = []
+        for start in range(0, len(keys), SQL_BATCH_SIZE):
+            batch = keys[start:start + SQL_BATCH_SIZE]
+            sql = (f"SELECT {quote_identifier(key)}, {', '.join(quoted)} FROM {quote_identifier(table)} "
+                   f"WHERE {quote_identifier(key)} IN ({', '.join('?' * len(batch))})")
+            for row in self.conn.execute(sql, batch):
+                for name, affinity, old, new in zip(names, affinities, row[1:], new_values[row[0]]):
+                    if _text(old) != _text(apply_affinity(new, affinity)):
+                        changes.append([table, row[0], 'update', name, old, new])
+        return changes
+
+    @staticmethod
+    def _missing(table, stored, generated, owned):
+        """Linhas do relatório das chaves de owned gravadas em table que não foram geradas"""
+        if owned is None:
+            return []
+        owned = set(owned)
+        return [[table, key, 'missing', '', '', ''] for key in sorted(stored)
+                if key in owned and key not in generated]
+
+    def store(self, table, columns, rows, owned=None):
+        """
+        Grava as linhas conforme o modo do loader e mostra o resultado.
+        Erros (tabela/coluna inexistente, MyPN repetido) viram aviso e nada
+        da tabela é gravado. owned: ver merge().
+        """
+        try:
+            if self.mode == MODE_MERGE:
+                result = self.merge(table, columns, rows, owned=owned)
+            else:
+                on_conflict = 'replace' if self.mode == MODE_REPLACE else None
+                count = self.load(table, columns, rows, on_conflict)
+        except sqlite3.IntegrityError as e:
+            print(f"⚠️ {table}: nada gravado ({e}); use --mesclar ou --substituir para regravar")
+            return None
+        except (ValueError, sqlite3.Error) as e:
+            print(f"⚠️ {table}: nada gravado ({e})")
+            return None
+        if self.mode == MODE_MERGE:
+            print(f"Tabela {table}: {result['inserted']} novas, {result['updated']} alteradas, "
+                  f"{result['unchanged']} iguais")
+            if result['missing']:
+                print(f"⚠️ {table}: {result['missing']} linhas gravadas não são mais geradas "
+                      f"(ficam no banco; veja 'missing' no relatório)")
+            return result
+        print(f"Tabela {table}: {count} linhas gravadas")
+        return count
+
+    def write_report(self, path):
+        """Grava o CSV de diferenças das mesclagens; retorna quantas linhas"""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(REPORT_COLUMNS)
+            writer.writerows(self.changes)
+        return len(self.changes)
+
+    def close(self):
+        if self.conn is None:
+            return
+        mode = self.conn.execute(f"PRAGMA journal_mode={self._journal_mode}").fetchone()[0]
+        if mode != self._journal_mode:
+            print(f"⚠️ Banco ficou em journal_mode={mode} (outra conexão aberta?); "
+                  f"o original era {self._journal_mode}")
+        self.conn.close()
+        self.conn = None
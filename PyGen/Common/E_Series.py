@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Séries E (IEC 60063) de E3 a E192 e códigos dos valores de passivos
+Arquivo: PyGen/Common/E_Series.py
+
+Os valores são Decimal exatos (mantissa inteira x potência de 10), então não
+há arredondamento de float: 4.7 * 1000 é 4700 e E24 + E96 não gera "1.1" e
+"1.10" repetidos. As grades (séries x faixa) e os códigos de cada valor são
+calculados uma só vez e reaproveitados, então gerar todos os tamanhos x
+tolerâncias x séries de um fabricante custa o mesmo que gerar uma linha.
+
+Uso típico:
+    e_values(('E24', 'E96'), 1, 10_000_000)        # [Decimal('1'), ..., Decimal('1E+7')]
+    rkm_code(Decimal('4700'))                       # '4K7'
+    rkm_code(Decimal('0.5'))                        # '0R5'
+    rkm_code(Decimal('4700'), RKM_CAPACITANCE)      # '4n7' (valor em pF)
+    eia_code(Decimal('100000'))                     # '104' (valor em pF)
+
+    linhas = [{'size': s, 'tolerance': t, 'series': 'E192', 'min': 10, 'max': 1_000_000}
+              for s in ('0402', '0603') for t in ('0.1%', '0.5%')]
+    for linha, valor in expand(linhas):
+        ...
+"""
+
+from decimal import Decimal
+from functools import lru_cache
+
+# Mantissas normalizadas da IEC 60063 (E24 com 2 dígitos, E192 com 3)
+E24 = (10, 11, 12, 13, 15, 16, 18, 20, 22, 24, 27, 30,
+       33, 36, 39, 43, 47, 51, 56, 62, 68, 75, 82, 91)
+
+E192 = (
+    100, 101, 102, 104, 105, 106, 107, 109, 110, 111, 113, 114, 115, 117, 118, 120,
+    121, 123, 124, 126, 127, 129, 130, 132, 133, 135, 137, 138, 140, 142, 143, 145,
+    147, 149, 150, 152, 154, 156, 158, 160, 162, 164, 165, 167, 169, 172, 174, 176,
+    178, 180, 182, 184, 187, 189, 191, 193, 196, 198, 200, 203, 205, 208, 210, 213,
+    215, 218, 221, 223, 226, 229, 232, 234, 237, 240, 243, 246, 249, 252, 255, 258,
+    261, 264, 267, 271, 274, 277, 280, 284, 287, 291, 294, 298, 301, 305, 309, 312,
+    316, 320, 324, 328, 332, 336, 340, 344, 348, 352, 357, 361, 365, 370, 374, 379,
+    383, 388, 392, 397, 402, 407, 412, 417, 422, 427, 432, 437, 442, 448, 453, 459,
+    464, 470, 475, 481, 487, 493, 499, 505, 511, 517, 523, 530, 536, 542, 549, 556,
+    562, 569, 576, 583, 590, 597, 604, 612, 619, 626, 634, 642, 649, 657, 665, 673,
+    681, 690, 698, 706, 715, 723, 732, 741, 750, 759, 768, 777, 787, 796, 806, 816,
+    825, 835, 845, 856, 866, 876, 887, 898, 909, 920, 931, 942, 953, 965, 976, 988,
+)
+
+# As séries menores são subconjuntos: E12 = E24 de 2 em 2, E96 = E192 de 2 em 2...
+SERIES = {
+    'E3': E24[::8],
+    'E6': E24[::4],
+    'E12': E24[::2],
+    'E24': E24,
+    'E48': E192[::4],
+    'E96': E192[::2],
+    'E192': E192,
+}
+
+# Letras do código RKM (IEC 60062) com o expoente de cada uma, da maior para a menor
+RKM_RESISTANCE = (('M', 6), ('K', 3), ('R', 0))       # valor em ohms
+RKM_CAPACITANCE = (('u', 6), ('n', 3), ('p', 0))      # valor em pF
+RKM_INDUCTANCE = (('m', 6), ('u', 3), ('n', 0))       # valor em nH
+
+
+def to_decimal(value):
+    """Converte int/float/str em Decimal sem herdar o erro binário do float"""
+    if isinstance(value, Decimal):
+        return value
+    if isinstance(value, float):
+        return Decimal(repr(value))
+    return Decimal(value)
+
+
+def _canonical(value):
+    """Decimal sem zeros à direita e sem notação exponencial (4700, não 4.70E+3)"""
+    value = value.normalize()
+    if value.as_tuple().exponent > 0:
+        value = value.quantize(Decimal(1))
+    return value
+
+
+def _series_names(series):
+    names = (series,) if isinstance(series, str) else tuple(series)
+    for name in names:
+        if name not in SERIES:
+            raise ValueError(f"Série desconhecida: {name} (use {', '.join(SERIES)})")
+    return names
+
+
+@lru_cache(maxsize=None)
+def _grid(names, minimum, maximum):
+    values = set()
+    for name in names:
+        mantissas = SERIES[name]
+        digits = len(str(mantissas[0]))
+        for exponent in range(minimum.adjusted(), maximum.adjusted() + 1):
+            for mantissa in mantissas:
+                value = Decimal(mantissa).scaleb(exponent - digits + 1)
+                if minimum <= value <= maximum:
+                    values.add(_canonical(value))
+    return tuple(sorted(values))
+
+
+def e_values(series, minimum, maximum):
+    """
+    Valores das séries (nome ou lista de nomes, ex: ('E24', 'E96')) entre
+    minimum e maximum, inclusive, em ordem crescente e sem repetição.
+    """
+    minimum, maximum = to_decimal(minimum), to_decimal(maximum)
+    if minimum <= 0 or maximum < minimum:
+        raise ValueError(f"Faixa inválida: {minimum} .. {maximum}")
+    return list(_grid(_series_names(series), minimum, maximum))
+
+
+def expand(lines, series_key='series', min_key='min', max_key='max'):
+    """
+    Gera (linha, valor) para cada linha de produto e cada valor da sua grade.
+    Cada linha é um dict com a série e a faixa (series/min/max) e o que mais
+    o gerador precisar (tamanho, tolerância, potência...). Linhas com a mesma
+    grade reaproveitam os mesmos valores.
+    """
+    for line in lines:
+        for value in e_values(line[series_key], line[min_key], line[max_key]):
+            yield line, value
+
+
+@lru_cache(maxsize=None)
+def rkm_code(value, letters=RKM_RESISTANCE):
+    """
+    Código RKM: a letra do multiplicador faz o papel da vírgula.
+    Resistência (ohms): 0.5 -> 0R5, 100 -> 100R, 4700 -> 4K7, 10000 -> 10K, 2200000 -> 2M2
+    Capacitância (pF, RKM_CAPACITANCE): 2.2 -> 2p2, 4700 -> 4n7, 100000 -> 100n
+    """
+    value = to_decimal(value)
+    for letter, exponent in letters:
+        if value >= Decimal(1).scaleb(exponent):
+            break
+    scaled = _canonical(value.scaleb(-exponent))
+    text = format(scaled, 'f')
+    if '.' not in text:
+        return f"{text}{letter}"
+    return text.replace('.', letter)
+
+
+@lru_cache(maxsize=None)
+def eia_code(value, significant=2):
+    """
+    Código numérico EIA: dígitos significativos + número de zeros.
+    Capacitância em pF: 100000 -> 104, 10 -> 100, 4.7 -> 4R7, 0.22 -> 0R22
+    Resistor 1% (significant=3): 4990 -> 4991, 49.9 -> 49R9
+    Valores abaixo de 10**(significant-1) usam R como vírgula.
+    """
+    value = to_decimal(value)
+    if value < Decimal(10) ** (significant - 1):
+        text = format(_canonical(value), 'f')
+        if '.' not in text:
+            text += '.0'
+        return text.replace('.', 'R')
+    exponent = value.adjusted() - (significant - 1)
+    mantissa = value.scaleb(-exponent)
+    if mantissa != mantissa.to_integral_value():
+        raise ValueError(f"{value} não cabe em {significant} dígitos significativos")
+    return f"{int(mantissa)}{exponent}"
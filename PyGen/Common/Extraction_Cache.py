@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Cache persistente (SQLite) para os extratores de footprints e símbolos
+Arquivo: PyGen/Common/Extraction_Cache.py
+
+Cada arquivo de biblioteca é identificado por caminho, tamanho, mtime e hash
+do conteúdo. Se tamanho e mtime não mudaram o resultado salvo é reaproveitado
+sem abrir o arquivo; se só o mtime mudou (checkout do git, cópia) o hash decide.
+Só os arquivos realmente alterados voltam a ser analisados.
+
+A assinatura (file_signature) deve ser tirada ANTES de ler o arquivo, de
+preferência no próprio worker: assim o hash não pesa no processo principal e
+uma edição feita durante a leitura deixa o mtime salvo desatualizado, o que
+força nova leitura na próxima execução. Quando reler o arquivo custa menos que
+o hash (footprints: só o cabeçalho é lido) a assinatura pode ir sem hash; aí
+uma mudança de mtime é sempre tratada como arquivo alterado.
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+
+# Tamanho do bloco usado para calcular o hash
+HASH_BLOCK_SIZE = 1024 * 1024
+
+
+def file_hash(path):
+    """Retorna o hash (blake2b) do conteúdo do arquivo"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(HASH_BLOCK_SIZE), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def file_signature(path, with_hash=True):
+    """
+    Retorna (tamanho, mtime_ns, hash) do arquivo, ou None se ele mudou
+    enquanto o hash era calculado (nesse caso o resultado não deve ir ao cache).
+    Sem with_hash o hash fica vazio.
+    """
+    before = os.stat(path)
+    if not with_hash:
+        return before.st_size, before.st_mtime_ns, ''
+    hash_ = file_hash(path)
+    after = os.stat(path)
+    if (before.st_size, before.st_mtime_ns) != (after.st_size, after.st_mtime_ns):
+        return None
+    return before.st_size, before.st_mtime_ns, hash_
+
+
+class ExtractionCache:
+    """
+    Cache de resultados de extração, separado por namespace
+    (ex: 'footprints:v1', 'simbolos:v1'). Trocar a versão do namespace
+    invalida tudo que foi salvo por uma versão anterior do parser.
+    """
+
+    def __init__(self, db_path, namespace):
+        self.db_path = os.path.abspath(db_path)
+        self.namespace = namespace
+        self.hits = 0
+        self.misses = 0
+        # Entradas novas, gravadas de uma vez (executemany) em commit()
+        self._pending = {}
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS arquivos (
+                namespace TEXT NOT NULL,
+                caminho TEXT NOT NULL,
+                tamanho INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                dados TEXT NOT NULL,
+                PRIMARY KEY (namespace, caminho)
+            )
+        """)
+        self._entries = {
+            caminho: (tamanho, mtime_ns, hash_, dados)
+            for caminho, tamanho, mtime_ns, hash_, dados in self.conn.execute(
+                "SELECT caminho, tamanho, mtime_ns, hash, dados FROM arquivos WHERE namespace = ?",
+                (namespace,)
+            )
+        }
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.commit()
+        self.close()
+
+    def get(self, path):
+        """
+        Retorna o resultado salvo para o arquivo, ou None se ele mudou
+        (ou nunca foi processado)
+        """
+        key = os.path.abspath(path)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        size, mtime_ns, saved_hash, data = entry
+        stat = os.stat(key)
+        if stat.st_size == size and stat.st_mtime_ns == mtime_ns:
+            self.hits += 1
+            return json.loads(data)
+
+        if saved_hash and stat.st_size == size and file_hash(key) == saved_hash:
+            # Conteúdo igual, só o mtime mudou: atualiza a chave e reaproveita
+            self._entries[key] = (size, stat.st_mtime_ns, saved_hash, data)
+            self.conn.execute(
+                "UPDATE arquivos SET mtime_ns = ? WHERE namespace = ? AND caminho = ?",
+                (stat.st_mtime_ns, self.namespace, key)
+            )
+            self.hits += 1
+            return json.loads(data)
+
+        self.misses += 1
+        return None
+
+    def put(self, path, data, signature):
+        """
+        Salva o resultado da extração de um arquivo (precisa ser serializável
+        em JSON). signature é o file_signature() tirado antes da leitura; None
+        (arquivo mudou durante a leitura) não salva nada.
+        """
+        if signature is None:
+            return
+        key = os.path.abspath(path)
+        entry = tuple(signature) + (json.dumps(data, ensure_ascii=False),)
+        self._entries[key] = entry
+        self._pending[key] = entry
+
+    def prune(self, root, existing_paths):
+        """
+        Remove do cache os arquivos dentro de root que não existem mais
+        (não estão em existing_paths). Entradas de outras pastas são mantidas.
+        """
+        prefix = os.path.join(os.path.abspath(root), '')
+        keep = {os.path.abspath(p) for p in existing_paths}
+        stale = [key for key in self._entries if key.startswith(prefix) and key not in keep]
+        for key in stale:
+            del self._entries[key]
+            self._pending.pop(key, None)
+        self.conn.executemany(
+            "DELETE FROM arquivos WHERE namespace = ? AND caminho = ?",
+            [(self.namespace, key) for key in stale]
+        )
+        return len(stale)
+
+    def commit(self):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO arquivos (namespace, caminho, tamanho, mtime_ns, hash, dados) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            [(self.namespace, key) + entry for key, entry in self._pending.items()]
+        )
+        self._pending.clear()
+        self.conn.commit()
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Saída dos extratores: logging com níveis, contador de progresso e resumo JSON
+Arquivo: PyGen/Common/Extraction_Log.py
+
+Níveis usados pelos extratores:
+    DEBUG   -> uma linha por arquivo/símbolo/footprint (--verbose)
+    INFO    -> cabeçalhos e resumo (padrão)
+    WARNING -> problemas encontrados (sempre exibidos, inclusive com --quiet)
+"""
+
+import json
+import logging
+import sys
+import time
+
+
+def add_output_arguments(parser):
+    """Adiciona --verbose, --quiet e --json-summary a um argparse.ArgumentParser"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("-v", "--verbose", action="store_true",
+                       help="Mostra uma linha por item processado")
+    group.add_argument("-q", "--quiet", action="store_true",
+                       help="Mostra só avisos e erros (sem progresso), para CI")
+    parser.add_argument("--json-summary", metavar="ARQUIVO",
+                        help="Grava um resumo da execução em JSON (use '-' para stdout)")
+
+
+def setup_logging(verbose=False, quiet=False):
+    """Configura o logging do script: mensagens puras, sem prefixo de nível"""
+    if verbose:
+        level = logging.DEBUG
+    elif quiet:
+        level = logging.WARNING
+    else:
+        level = logging.INFO
+    logging.basicConfig(level=level, format="%(message)s", stream=sys.stdout, force=True)
+    return level
+
+
+class ProgressCounter:
+    """
+    Contador "processados/total" que se redesenha no máximo a cada
+    min_interval segundos, independente de quantos itens passam por ele.
+    Fica desligado se o logger não está em INFO (ex: --quiet) ou está em DEBUG
+    (as linhas por item já mostram o andamento).
+    """
+
+    def __init__(self, total, label, logger, min_interval=0.5, stream=None):
+        self.total = total
+        self.label = label
+        self.count = 0
+        self.min_interval = min_interval
+        self.stream = stream or sys.stderr
+        self.enabled = logger.getEffectiveLevel() == logging.INFO
+        self.interactive = hasattr(self.stream, "isatty") and self.stream.isatty()
+        self.start = time.perf_counter()
+        self._last_draw = self.start
+
+    def update(self, n=1):
+        self.count += n
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        # Fora de um terminal cada desenho vira uma linha: desenha bem menos
+        interval = self.min_interval if self.interactive else self.min_interval * 20
+        if now - self._last_draw >= interval:
+            self._last_draw = now
+            self._draw(now)
+
+    def rate(self):
+        elapsed = time.perf_counter() - self.start
+        return self.count / elapsed if elapsed > 0 else 0.0
+
+    def _draw(self, now):
+        elapsed = now - self.start
+        rate = self.count / elapsed if elapsed > 0 else 0.0
+        text = f"   {self.label}: {self.count}/{self.total} ({rate:.0f}/s)"
+        if self.interactive:
+            self.stream.write("\r" + text)
+        else:
+            self.stream.write(text + "\n")
+        self.stream.flush()
+
+    def close(self):
+        if not self.enabled:
+            return
+        self._draw(time.perf_counter())
+        if self.interactive:
+            self.stream.write("\n")
+            self.stream.flush()
+
+
+def write_json_summary(destination, summary):
+    """Grava o resumo em JSON num arquivo ('-' escreve no stdout)"""
+    text = json.dumps(summary, indent=2, ensure_ascii=False)
+    if destination == "-":
+        print(text)
+        return
+    with open(destination, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
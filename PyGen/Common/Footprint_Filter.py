@@ -0,0 +1,212 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Resolve os ki_fp_filters dos símbolos contra todos os footprints da biblioteca
+Arquivo: PyGen/Common/Footprint_Filter.py
+
+Cada conjunto de filtros (ex: "C_* CP_Elec*") é compilado uma única vez numa só
+regex e testado contra os footprints já indexados (Library_Index.py). Símbolos
+com o mesmo conjunto de filtros reaproveitam o resultado.
+
+Regras do KiCad seguidas aqui:
+    - filtros separados por espaço; basta um casar
+    - * e ? são curingas, sem diferenciar maiúsculas/minúsculas
+    - filtro sem ':' casa só com o nome do footprint; com ':' casa com "Biblioteca:Nome"
+
+Uso:
+    python Footprint_Filter.py                     # gera Footprint_Filter_Candidatos.csv
+    python Footprint_Filter.py --lib MyLib_Connector --pares pares.csv
+"""
+
+import os
+import re
+import sys
+import csv
+import time
+import fnmatch
+import argparse
+import logging
+from functools import lru_cache
+
+from Library_Index import LibraryIndex, DEFAULT_DB
+from Extraction_Log import add_output_arguments, setup_logging, write_json_summary
+
+log = logging.getLogger("Footprint_Filter")
+
+# Relativo à pasta atual, como os CSVs dos extratores (não suja PyGen/Common)
+DEFAULT_OUTPUT = 'Footprint_Filter_Candidatos.csv'
+
+# Situação do Footprint atual do símbolo
+STATUS_OK = 'ok'                    # existe e casa com os filtros
+STATUS_FORA_DO_FILTRO = 'fora_do_filtro'
+STATUS_INEXISTENTE = 'inexistente'  # não existe na biblioteca indexada
+STATUS_VAZIO = 'vazio'
+
+
+def glob_to_regex(pattern):
+    """Converte um filtro do KiCad em regex que casa com 'Biblioteca:Nome'"""
+    regex = fnmatch.translate(pattern)
+    if ':' in pattern:
+        return regex
+    # Sem biblioteca no filtro: qualquer biblioteca
+    return r'[^:]*:' + regex
+
+
+@lru_cache(maxsize=None)
+def compile_filters(filters):
+    """
+    Compila um conjunto de filtros (texto do ki_fp_filters) numa única regex,
+    ou None se não há filtros. O resultado fica em cache por texto.
+    """
+    patterns = filters.split()
+    if not patterns:
+        return None
+    return re.compile('|'.join(f'(?:{glob_to_regex(p)})' for p in patterns), re.I)
+
+
+def match_footprints(filters, footprints):
+    """Footprints ('Biblioteca:Nome') que casam com o texto de ki_fp_filters"""
+    matcher = compile_filters(filters)
+    if matcher is None:
+        return []
+    match = matcher.match
+    return [fp for fp in footprints if match(fp)]
+
+
+def resolve_symbols(symbols, footprints):
+    """
+    Resolve cada símbolo contra a lista de footprints.
+    symbols: iterável de (lib_id, ki_fp_filters, footprint_atual)
+    Gera (lib_id, filtros, footprint_atual, status, candidatos).
+    """
+    existing = set(footprints)
+    resolved = {}
+    for lib_id, filters, current in symbols:
+        key = ' '.join((filters or '').split())
+        if key not in resolved:
+            resolved[key] = match_footprints(key, footprints)
+        candidates = resolved[key]
+
+        if not current:
+            status = STATUS_VAZIO
+        elif current not in existing:
+            status = STATUS_INEXISTENTE
+        elif key and not compile_filters(key).match(current):
+            status = STATUS_FORA_DO_FILTRO
+        else:
+            status = STATUS_OK
+        yield lib_id, key, current, status, candidates
+
+
+def gerar_candidatos_csv(index, arquivo_saida=DEFAULT_OUTPUT, library=None, max_candidatos=50,
+                         arquivo_pares=None):
+    """
+    Gera o CSV símbolo -> footprints candidatos a partir do índice.
+    Footprint_Sugerido é preenchido quando há exatamente um candidato e o
+    footprint atual não está ok. Com arquivo_pares grava também um CSV
+    longo com todos os pares (Symbol, Footprint).
+    """
+    inicio = time.perf_counter()
+    footprints = index.footprint_names()
+    symbols = [(row['lib_id'], row['fp_filters'], row['footprint'])
+               for row in index.search_symbols(library=library)]
+    log.info(f"📚 {len(symbols)} símbolos x {len(footprints)} footprints")
+
+    contagem = {STATUS_OK: 0, STATUS_FORA_DO_FILTRO: 0, STATUS_INEXISTENTE: 0, STATUS_VAZIO: 0}
+    sem_filtro = 0
+    sem_candidatos = 0
+    sugeridos = 0
+    pares = 0
+
+    pares_file = open(arquivo_pares, 'w', newline='', encoding='utf-8') if arquivo_pares else None
+    try:
+        pares_writer = None
+        if pares_file:
+            pares_writer = csv.writer(pares_file, quoting=csv.QUOTE_ALL)
+            pares_writer.writerow(['Symbol', 'Footprint'])
+
+        with open(arquivo_saida, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.writer(f, quoting=csv.QUOTE_ALL)
+            writer.writerow(['Symbol', 'Footprint_Filter', 'Footprint', 'Footprint_Status',
+                             'Candidates', 'Footprint_Sugerido', 'Candidate_List'])
+
+            for lib_id, filters, current, status, candidates in resolve_symbols(symbols, footprints):
+                contagem[status] += 1
+                if not filters:
+                    sem_filtro += 1
+                elif not candidates:
+                    sem_candidatos += 1
+                    log.debug(f"   ⚠️ {lib_id}: nenhum footprint casa com '{filters}'")
+
+                sugerido = ''
+                if status != STATUS_OK and len(candidates) == 1:
+                    sugerido = candidates[0]
+                    sugeridos += 1
+
+                lista = candidates[:max_candidatos] if max_candidatos else candidates
+                writer.writerow([lib_id, filters, current, status, len(candidates), sugerido, ';'.join(lista)])
+
+                if pares_writer:
+                    pares_writer.writerows([lib_id, fp] for fp in candidates)
+                    pares += len(candidates)
+    finally:
+        if pares_file:
+            pares_file.close()
+
+    duracao = time.perf_counter() - inicio
+    log.info("\n" + "=" * 60)
+    log.info("✅ RESUMO:")
+    log.info(f"   Símbolos: {len(symbols)} ({sem_filtro} sem ki_fp_filters, "
+             f"{compile_filters.cache_info().currsize} conjuntos de filtros distintos)")
+    log.info(f"   Footprint atual: {contagem[STATUS_OK]} ok, {contagem[STATUS_FORA_DO_FILTRO]} fora do filtro, "
+             f"{contagem[STATUS_INEXISTENTE]} inexistentes, {contagem[STATUS_VAZIO]} vazios")
+    log.info(f"   Sugestões (candidato único): {sugeridos}")
+    log.info(f"   Tempo: {duracao:.2f}s")
+    log.info(f"   Arquivo gerado: {os.path.abspath(arquivo_saida)}")
+    if sem_candidatos:
+        log.warning(f"⚠️ {sem_candidatos} símbolos com filtros que não casam com nenhum footprint")
+
+    return {
+        'arquivo_saida': os.path.abspath(arquivo_saida),
+        'arquivo_pares': os.path.abspath(arquivo_pares) if arquivo_pares else None,
+        'simbolos': len(symbols),
+        'footprints': len(footprints),
+        'status': contagem,
+        'sem_filtro': sem_filtro,
+        'sem_candidatos': sem_candidatos,
+        'sugeridos': sugeridos,
+        'pares': pares,
+        'duracao_s': round(duracao, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Resolve ki_fp_filters dos símbolos contra os footprints indexados")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Banco do índice (Library_Index.py build)")
+    parser.add_argument("-o", "--saida", default=DEFAULT_OUTPUT, help=f"CSV símbolo -> candidatos (padrão: {DEFAULT_OUTPUT} na pasta atual)")
+    parser.add_argument("--lib", help="Só os símbolos desta biblioteca (ex: MyLib_Capacitor)")
+    parser.add_argument("--max-candidatos", type=int, default=50,
+                        help="Máximo de candidatos listados por símbolo (0 = todos)")
+    parser.add_argument("--pares", metavar="ARQUIVO", help="Grava também todos os pares (Symbol, Footprint)")
+    add_output_arguments(parser)
+    args = parser.parse_args(argv)
+    setup_logging(args.verbose, args.quiet)
+
+    try:
+        index = LibraryIndex(args.db)
+    except ValueError as e:
+        log.error(f"❌ {e}")
+        return 2
+    with index:
+        if index.count('footprints') == 0:
+            log.error("❌ Índice vazio: rode 'python Library_Index.py build' antes")
+            return 1
+        summary = gerar_candidatos_csv(index, args.saida, args.lib, args.max_candidatos, args.pares)
+
+    if args.json_summary:
+        write_json_summary(args.json_summary, summary)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
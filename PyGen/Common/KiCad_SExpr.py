@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Leitor de S-expressions do KiCad (.kicad_sym, .kicad_mod, .kicad_pcb ...)
+Arquivo: PyGen/Common/KiCad_SExpr.py
+
+Tokenização em uma única passada, linear no tamanho do arquivo, lendo em
+blocos (o arquivo nunca é carregado inteiro na memória). Strings entre aspas
+são tratadas corretamente, inclusive escapes como \\" e parênteses dentro de
+textos, então o balanceamento nunca é enganado pelo conteúdo de uma string.
+
+Uso típico:
+    for nome, props in iter_symbols("MyLib_Connector.kicad_sym"):
+        print(nome, props.get("Value"))
+
+    nome = read_head("R_0603.kicad_mod")  # ('footprint', 'R_0603')
+    tipo, nome, campos = read_header("R_0603.kicad_mod", {'descr', 'tags'})
+"""
+
+import re
+
+# Um token: '(' | ')' | string entre aspas | átomo
+# A string não terminada consome até o fim do buffer (\Z), assim ela é sempre
+# o último token do bloco e fica guardada até o próximo bloco chegar.
+TOKEN_RE = re.compile(r'[()]|"(?:[^"\\]|\\.)*(?:"|\\?\Z)|[^\s()"]+', re.S)
+STRING_RE = re.compile(r'"((?:[^"\\]|\\.)*)"', re.S)
+ESCAPE_RE = re.compile(r'\\(.)', re.S)
+ESCAPES = {'n': '\n', 't': '\t', 'r': '\r'}
+
+# Tamanho padrão do bloco lido do arquivo
+CHUNK_SIZE = 1024 * 1024
+
+# Filhos que aparecem antes do conteúdo em .kicad_mod (KiCad 5 a 9)
+HEADER_HEADS = frozenset({'version', 'generator', 'generator_version', 'layer', 'tedit', 'tstamp', 'uuid'})
+
+
+class SExprError(ValueError):
+    """S-expression malformada (parênteses desbalanceados, string sem fim...)"""
+
+
+def atom(token):
+    """Converte um token em valor: strings perdem as aspas e os escapes"""
+    if token.startswith('"'):
+        match = STRING_RE.fullmatch(token)
+        if match is None:
+            raise SExprError(f"String não terminada: {token[:40]}")
+        body = match.group(1)
+        if '\\' in body:
+            body = ESCAPE_RE.sub(lambda m: ESCAPES.get(m.group(1), m.group(1)), body)
+        return body
+    return token
+
+
+def tokenize(text):
+    """Gera os tokens de um texto (brutos: strings ainda com aspas)"""
+    for match in TOKEN_RE.finditer(text):
+        yield match.group()
+
+
+def tokenize_file(source, chunk_size=CHUNK_SIZE, encoding='utf-8'):
+    """
+    Gera os tokens de um arquivo lendo em blocos de chunk_size caracteres
+
+    source pode ser um caminho ou um arquivo já aberto em modo texto.
+    Parar a iteração cedo (ex: só o cabeçalho) evita ler o resto do arquivo.
+    """
+    if hasattr(source, 'read'):
+        yield from _tokenize_stream(source, chunk_size)
+        return
+    with open(source, 'r', encoding=encoding, errors='ignore') as f:
+        yield from _tokenize_stream(f, chunk_size)
+
+
+def _tokenize_stream(f, chunk_size):
+    pending = ''
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            yield from tokenize(pending)
+            return
+        buffer = pending + chunk
+        last = None
+        for match in TOKEN_RE.finditer(buffer):
+            if last is not None:
+                yield last.group()
+            last = match
+        # O último token pode estar cortado no fim do bloco: guarda para o próximo
+        if last is None:
+            pending = ''
+        elif last.group() in '()':
+            yield last.group()
+            pending = buffer[last.end():]
+        else:
+            pending = buffer[last.start():]
+
+
+def _skip(tokens):
+    """Consome tokens até fechar a lista cujo '(' acabou de ser lido"""
+    depth = 1
+    for token in tokens:
+        if token == '(':
+            depth += 1
+        elif token == ')':
+            depth -= 1
+            if depth == 0:
+                return
+    raise SExprError("Parênteses desbalanceados (fim inesperado)")
+
+
+def _read_list(tokens, current):
+    """Monta a lista cujo '(' acabou de ser lido; current já tem os itens lidos"""
+    stack = [current]
+    for token in tokens:
+        if token == '(':
+            stack.append([])
+        elif token == ')':
+            done = stack.pop()
+            if not stack:
+                return done
+            stack[-1].append(done)
+        else:
+            stack[-1].append(atom(token))
+    raise SExprError("Parênteses desbalanceados (fim inesperado)")
+
+
+def parse(tokens):
+    """Monta a primeira expressão dos tokens como listas aninhadas"""
+    tokens = iter(tokens)
+    first = next(tokens, None)
+    if first is None:
+        raise SExprError("Nenhuma expressão encontrada")
+    if first != '(':
+        return atom(first)
+    return _read_list(tokens, [])
+
+
+def loads(text):
+    """Converte o texto em listas aninhadas (árvore completa)"""
+    return parse(tokenize(text))
+
+
+def load(path):
+    """Lê e converte um arquivo inteiro em listas aninhadas"""
+    return parse(tokenize_file(path))
+
+
+def iter_children(tokens, heads=None, keep=None):
+    """
+    Percorre os filhos diretos da expressão raiz em uma única passada
+
+    heads: só devolve filhos cujo primeiro átomo está em heads (os outros são
+           pulados sem montar nada)
+    keep:  se informado, dentro de cada filho só as sub-listas cujo primeiro
+           átomo está em keep são montadas; as demais (gráficos, pinos,
+           sub-símbolos) são puladas
+
+    Ex: iter_children(tokens, heads={'symbol'}, keep={'property'}) devolve cada
+    símbolo de primeiro nível só com nome, átomos e propriedades.
+    """
+    tokens = iter(tokens)
+    if next(tokens, None) != '(':
+        raise SExprError("O arquivo não começa com '('")
+    root_head = next(tokens, None)
+    if root_head in (None, '(', ')'):
+        raise SExprError("Expressão raiz sem nome")
+
+    for token in tokens:
+        if token == ')':
+            return
+        if token != '(':
+            continue
+        head = next(tokens, None)
+        if head is None:
+            break
+        if head == ')':
+            continue
+        if head == '(':
+            _skip(tokens)
+            _skip(tokens)
+            continue
+        if heads is not None and head not in heads:
+            _skip(tokens)
+            continue
+        if keep is None:
+            yield _read_list(tokens, [head])
+            continue
+
+        child = [head]
+        for sub in tokens:
+            if sub == ')':
+                break
+            if sub != '(':
+                child.append(atom(sub))
+                continue
+            sub_head = next(tokens, None)
+            if sub_head == ')':
+                continue
+            if sub_head in keep:
+                child.append(_read_list(tokens, [sub_head]))
+            elif sub_head == '(':
+                _skip(tokens)
+                _skip(tokens)
+            else:
+                _skip(tokens)
+        else:
+            raise SExprError("Parênteses desbalanceados (fim inesperado)")
+        yield child
+    raise SExprError("Parênteses desbalanceados (fim inesperado)")
+
+
+def properties(expr):
+    """
+    Devolve {nome: valor} das listas (property "Nome" "Valor" ...) filhas
+    diretas de expr. Se um nome se repetir vale o primeiro.
+    """
+    props = {}
+    for child in expr[1:]:
+        if isinstance(child, list) and len(child) >= 3 and child[0] == 'property':
+            props.setdefault(child[1], child[2])
+    return props
+
+
+def iter_symbols(source, chunk_size=CHUNK_SIZE):
+    """
+    Gera (nome, propriedades) para cada símbolo de primeiro nível de um
+    .kicad_sym. Sub-símbolos (unidades "Nome_0_1") não são devolvidos.
+    """
+    tokens = tokenize_file(source, chunk_size)
+    for expr in iter_children(tokens, heads={'symbol'}, keep={'property'}):
+        if len(expr) >= 2 and isinstance(expr[1], str):
+            yield expr[1], properties(expr)
+
+
+def read_head(source, chunk_size=512):
+    """
+    Lê só o início do arquivo e devolve (tipo, nome) da expressão raiz,
+    ex: ('footprint', 'R_0603_1608Metric') ou ('module', 'R_0603').
+    Devolve (None, None) se o arquivo não começa com '(tipo nome'.
+    """
+    tokens = tokenize_file(source, chunk_size)
+    try:
+        if next(tokens, None) != '(':
+            return None, None
+        kind = next(tokens, None)
+        name = next(tokens, None)
+        if kind in (None, '(', ')') or name in (None, '(', ')'):
+            return None, None
+        return kind, atom(name)
+    except SExprError:
+        return None, None
+    finally:
+        tokens.close()
+
+
+def read_header(source, fields, chunk_size=4096):
+    """
+    Lê só o cabeçalho da expressão raiz e devolve (tipo, nome, {campo: valor})
+    com o primeiro átomo de cada filho listado em fields, ex: (descr "...").
+    A leitura para no primeiro filho que não é campo nem HEADER_HEADS
+    (propriedades, gráficos, pads), então o resto do arquivo não é lido.
+    Devolve (None, None, {}) se o arquivo não começa com '(tipo nome'.
+    """
+    tokens = tokenize_file(source, chunk_size)
+    values = {}
+    try:
+        if next(tokens, None) != '(':
+            return None, None, values
+        kind = next(tokens, None)
+        name = next(tokens, None)
+        if kind in (None, '(', ')') or name in (None, '(', ')'):
+            return None, None, values
+        name = atom(name)
+
+        for token in tokens:
+            if token == ')':
+                break
+            if token != '(':
+                continue
+            head = next(tokens, None)
+            if head in fields:
+                expr = _read_list(tokens, [head])
+                if len(expr) >= 2 and isinstance(expr[1], str):
+                    values.setdefault(head, expr[1])
+            elif head in HEADER_HEADS:
+                _skip(tokens)
+            else:
+                break
+        return kind, name, values
+    except SExprError:
+        return None, None, {}
+    finally:
+        tokens.close()
@@ -0,0 +1,386 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Índice persistente (SQLite + FTS5) de todos os símbolos e footprints da biblioteca
+Arquivo: PyGen/Common/Library_Index.py
+
+Indexa Library/2_Symbols (*.kicad_sym) e Library/3_Footprints (*.pretty/*.kicad_mod)
+num único banco. A busca por texto usa FTS5 sobre nomes, descrições, keywords/tags
+e ki_fp_filters; biblioteca e pitch são colunas indexadas. A reconstrução é
+incremental: só os arquivos novos ou alterados (tamanho/mtime) são lidos.
+
+Uso pela linha de comando:
+    python Library_Index.py build
+    python Library_Index.py symbols "opamp dual"
+    python Library_Index.py footprints molex --lib MyLib_Connector_Molex --pitch 2.54
+
+Uso pelos geradores:
+    with LibraryIndex() as index:
+        for fp in index.search_footprints(library='MyLib_Connector_Molex', pitch=2.54):
+            print(fp['lib_id'])
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+import logging
+from pathlib import Path
+
+from KiCad_SExpr import iter_symbols, read_header
+from Extraction_Log import add_output_arguments, setup_logging, ProgressCounter, write_json_summary
+
+log = logging.getLogger("Library_Index")
+
+# Raiz do repositório (PyGen/Common -> PyGen -> raiz)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_SYMBOLS_DIR = os.path.join(REPO_ROOT, 'Library', '2_Symbols')
+DEFAULT_FOOTPRINTS_DIR = os.path.join(REPO_ROOT, 'Library', '3_Footprints')
+DEFAULT_DB = os.path.join(REPO_ROOT, 'Library', 'Library_Index.sqlite')
+
+# Mude quando o esquema ou a extração mudar: o índice é recriado do zero
+INDEX_VERSION = 1
+
+# Pitch no nome do footprint (convenção do KiCad: ..._P2.54mm_...) ou na descrição
+PITCH_NAME_RE = re.compile(r'_P(\d+(?:\.\d+)?)mm')
+PITCH_DESCR_RE = re.compile(r'pitch\s*(\d+(?:\.\d+)?)\s*mm', re.I)
+
+SCHEMA = """
+CREATE TABLE files (
+    path TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+
+CREATE TABLE symbols (
+    id INTEGER PRIMARY KEY,
+    lib_id TEXT NOT NULL,
+    library TEXT NOT NULL,
+    name TEXT NOT NULL,
+    value TEXT,
+    footprint TEXT,
+    description TEXT,
+    keywords TEXT,
+    fp_filters TEXT,
+    datasheet TEXT,
+    file TEXT NOT NULL
+);
+CREATE INDEX idx_symbols_lib_id ON symbols(lib_id);
+CREATE INDEX idx_symbols_library ON symbols(library, name);
+CREATE INDEX idx_symbols_file ON symbols(file);
+
+CREATE TABLE footprints (
+    id INTEGER PRIMARY KEY,
+    lib_id TEXT NOT NULL,
+    library TEXT NOT NULL,
+    name TEXT NOT NULL,
+    description TEXT,
+    tags TEXT,
+    pitch_mm REAL,
+    file TEXT NOT NULL
+);
+CREATE INDEX idx_footprints_lib_id ON footprints(lib_id);
+CREATE INDEX idx_footprints_library ON footprints(library, pitch_mm);
+CREATE INDEX idx_footprints_pitch ON footprints(pitch_mm);
+CREATE INDEX idx_footprints_file ON footprints(file);
+
+-- FTS5 com conteúdo externo: o texto fica só nas tabelas acima
+CREATE VIRTUAL TABLE symbols_fts USING fts5(
+    name, value, description, keywords, fp_filters,
+    content='symbols', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE VIRTUAL TABLE footprints_fts USING fts5(
+    name, description, tags,
+    content='footprints', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER symbols_ai AFTER INSERT ON symbols BEGIN
+    INSERT INTO symbols_fts(rowid, name, value, description, keywords, fp_filters)
+    VALUES (new.id, new.name, new.value, new.description, new.keywords, new.fp_filters);
+END;
+CREATE TRIGGER symbols_ad AFTER DELETE ON symbols BEGIN
+    INSERT INTO symbols_fts(symbols_fts, rowid, name, value, description, keywords, fp_filters)
+    VALUES ('delete', old.id, old.name, old.value, old.description, old.keywords, old.fp_filters);
+END;
+CREATE TRIGGER footprints_ai AFTER INSERT ON footprints BEGIN
+    INSERT INTO footprints_fts(rowid, name, description, tags)
+    VALUES (new.id, new.name, new.description, new.tags);
+END;
+CREATE TRIGGER footprints_ad AFTER DELETE ON footprints BEGIN
+    INSERT INTO footprints_fts(footprints_fts, rowid, name, description, tags)
+    VALUES ('delete', old.id, old.name, old.description, old.tags);
+END;
+"""
+
+
+def parse_pitch(name, description=''):
+    """Pitch em mm a partir do nome do footprint (ou da descrição), ou None"""
+    match = PITCH_NAME_RE.search(name) or PITCH_DESCR_RE.search(description or '')
+    return float(match.group(1)) if match else None
+
+
+def read_footprint(path):
+    """Lê o cabeçalho de um .kicad_mod e devolve (nome, descr, tags)"""
+    kind, name, fields = read_header(path, {'descr', 'tags'})
+    if kind not in ('footprint', 'module') or not name:
+        name = Path(path).stem
+    return name, fields.get('descr', ''), fields.get('tags', '')
+
+
+class LibraryIndex:
+    """
+    Índice de símbolos e footprints da biblioteca num banco SQLite.
+    Os resultados das buscas são sqlite3.Row (acesso por nome: row['lib_id']).
+    """
+
+    def __init__(self, db_path=DEFAULT_DB):
+        self.db_path = os.path.abspath(db_path)
+        self.conn = sqlite3.connect(self.db_path)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] != INDEX_VERSION:
+            self._create_schema()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        self.conn.close()
+
+    def _create_schema(self):
+        """Recria o banco do zero (índice novo ou de outra versão)"""
+        tables = [row[0] for row in self.conn.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table' AND name NOT LIKE 'sqlite%' "
+            "AND name NOT LIKE '%\\_fts\\_%' ESCAPE '\\'"
+        )]
+        if tables and 'files' not in tables:
+            # Nunca apaga um banco que não foi criado por este módulo
+            self.conn.close()
+            raise ValueError(f"{self.db_path} não é um índice da biblioteca")
+        with self.conn:
+            for table in tables:
+                self.conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+            self.conn.executescript(SCHEMA)
+            self.conn.execute(f"PRAGMA user_version = {INDEX_VERSION}")
+
+    # ------------------------------------------------------------------
+    # Construção
+    # ------------------------------------------------------------------
+
+    def build(self, symbols_dir=DEFAULT_SYMBOLS_DIR, footprints_dir=DEFAULT_FOOTPRINTS_DIR):
+        """
+        Atualiza o índice com os arquivos das duas pastas (qualquer uma pode ser None).
+        Arquivos sem alteração são pulados; arquivos removidos saem do índice.
+        Retorna um dicionário com o resumo.
+        """
+        inicio = time.perf_counter()
+        summary = {'db': self.db_path}
+        with self.conn:
+            if symbols_dir:
+                files = sorted(str(p.resolve()) for p in Path(symbols_dir).glob('*.kicad_sym'))
+                summary['symbols'] = self._update('symbol', symbols_dir, files, self._index_symbol_file)
+            if footprints_dir:
+                files = sorted(str(p.resolve()) for p in Path(footprints_dir).glob('*.pretty/*.kicad_mod'))
+                summary['footprints'] = self._update('footprint', footprints_dir, files, self._index_footprint_file)
+        summary['symbols_total'] = self.count('symbols')
+        summary['footprints_total'] = self.count('footprints')
+        summary['duracao_s'] = round(time.perf_counter() - inicio, 3)
+        return summary
+
+    def _update(self, kind, root, files, index_file):
+        """Reindexa os arquivos de um tipo que mudaram e remove os que sumiram"""
+        table = 'symbols' if kind == 'symbol' else 'footprints'
+        known = {
+            row['path']: (row['size'], row['mtime_ns'])
+            for row in self.conn.execute("SELECT path, size, mtime_ns FROM files WHERE kind = ?", (kind,))
+        }
+        prefix = os.path.join(os.path.abspath(root), '')
+        present = set(files)
+        removed = [path for path in known if path.startswith(prefix) and path not in present]
+        for path in removed:
+            self.conn.execute(f"DELETE FROM {table} WHERE file = ?", (path,))
+            self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+        indexed = 0
+        progresso = ProgressCounter(len(files), table.capitalize(), log)
+        for path in files:
+            progresso.update()
+            stat = os.stat(path)
+            state = (stat.st_size, stat.st_mtime_ns)
+            if known.get(path) == state:
+                continue
+            if path in known:
+                self.conn.execute(f"DELETE FROM {table} WHERE file = ?", (path,))
+            index_file(path)
+            self.conn.execute(
+                "INSERT OR REPLACE INTO files (path, kind, size, mtime_ns) VALUES (?, ?, ?, ?)",
+                (path, kind) + state
+            )
+            indexed += 1
+        progresso.close()
+
+        log.info(f"   {table}: {indexed} arquivos indexados, {len(files) - indexed} sem alteração, "
+                 f"{len(removed)} removidos")
+        return {'arquivos': len(files), 'indexados': indexed, 'removidos': len(removed)}
+
+    def _index_symbol_file(self, path):
+        library = Path(path).stem
+        rows = []
+        try:
+            for name, props in iter_symbols(path):
+                rows.append((
+                    f"{library}:{name}", library, name,
+                    props.get('Value', ''), props.get('Footprint', ''), props.get('Description', ''),
+                    props.get('ki_keywords', ''), props.get('ki_fp_filters', ''), props.get('Datasheet', ''),
+                    path
+                ))
+        except Exception as e:
+            log.warning(f"   ⚠️ Erro ao ler {os.path.basename(path)}: {e}")
+        self.conn.executemany(
+            "INSERT INTO symbols (lib_id, library, name, value, footprint, description, keywords, "
+            "fp_filters, datasheet, file) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        log.debug(f"   📄 {library}: {len(rows)} símbolos")
+
+    def _index_footprint_file(self, path):
+        library = os.path.basename(os.path.dirname(path))
+        if library.endswith('.pretty'):
+            library = library[:-7]
+        name, description, tags = read_footprint(path)
+        self.conn.execute(
+            "INSERT INTO footprints (lib_id, library, name, description, tags, pitch_mm, file) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (f"{library}:{name}", library, name, description, tags, parse_pitch(name, description), path)
+        )
+        log.debug(f"   ✓ {library}:{name}")
+
+    # ------------------------------------------------------------------
+    # Consultas
+    # ------------------------------------------------------------------
+
+    def count(self, table):
+        return self.conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+
+    def search_symbols(self, text=None, library=None, limit=None):
+        """
+        Busca símbolos. text usa a sintaxe do FTS5 (ex: 'opamp dual',
+        'keywords:mosfet', 'LM358*'); sem text lista por biblioteca/nome.
+        """
+        return self._search('symbols', text, {'library': library}, limit)
+
+    def search_footprints(self, text=None, library=None, pitch=None, limit=None):
+        """
+        Busca footprints por texto (FTS5), biblioteca e/ou pitch em mm,
+        ex: search_footprints(library='MyLib_Connector_Molex', pitch=2.54)
+        """
+        return self._search('footprints', text, {'library': library, 'pitch_mm': pitch}, limit)
+
+    def _search(self, table, text, filters, limit):
+        where = []
+        params = []
+        for column, value in filters.items():
+            if value is None:
+                continue
+            if column == 'pitch_mm':
+                # Pitch é float: compara com tolerância (2.54 == 2.540)
+                where.append("t.pitch_mm BETWEEN ? AND ?")
+                params += [value - 1e-6, value + 1e-6]
+            else:
+                where.append(f"t.{column} = ?")
+                params.append(value)
+
+        if text:
+            sql = (f"SELECT t.* FROM {table}_fts AS f JOIN {table} AS t ON t.id = f.rowid "
+                   f"WHERE {table}_fts MATCH ?")
+            params.insert(0, text)
+            if where:
+                sql += " AND " + " AND ".join(where)
+            sql += " ORDER BY f.rank"
+        else:
+            sql = f"SELECT t.* FROM {table} AS t"
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            sql += " ORDER BY t.library, t.name"
+
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return self.conn.execute(sql, params).fetchall()
+
+    def footprint_names(self, library=None):
+        """Todos os lib_id de footprints (opcionalmente de uma biblioteca), em ordem"""
+        if library:
+            rows = self.conn.execute(
+                "SELECT lib_id FROM footprints WHERE library = ? ORDER BY lib_id", (library,))
+        else:
+            rows = self.conn.execute("SELECT lib_id FROM footprints ORDER BY lib_id")
+        return [row[0] for row in rows]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Índice de símbolos e footprints da biblioteca (SQLite + FTS5)")
+    parser.add_argument("--db", default=DEFAULT_DB, help="Banco do índice (padrão: Library/Library_Index.sqlite)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="Cria/atualiza o índice")
+    build.add_argument("--simbolos", default=DEFAULT_SYMBOLS_DIR, help="Pasta com os .kicad_sym")
+    build.add_argument("--footprints", default=DEFAULT_FOOTPRINTS_DIR, help="Pasta com as pastas .pretty")
+    add_output_arguments(build)
+
+    symbols = sub.add_parser("symbols", help="Busca símbolos")
+    symbols.add_argument("texto", nargs="?", help="Consulta FTS5 (ex: 'opamp dual', 'LM358*')")
+    symbols.add_argument("--lib", help="Só esta biblioteca (ex: MyLib_Connector)")
+    symbols.add_argument("--limit", type=int, default=50, help="Máximo de resultados (0 = todos)")
+
+    footprints = sub.add_parser("footprints", help="Busca footprints")
+    footprints.add_argument("texto", nargs="?", help="Consulta FTS5 (ex: 'molex vertical')")
+    footprints.add_argument("--lib", help="Só esta biblioteca (ex: MyLib_Connector_Molex)")
+    footprints.add_argument("--pitch", type=float, help="Pitch em mm (ex: 2.54)")
+    footprints.add_argument("--limit", type=int, default=50, help="Máximo de resultados (0 = todos)")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    try:
+        index = LibraryIndex(args.db)
+    except ValueError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    if args.command == "build":
+        setup_logging(args.verbose, args.quiet)
+        log.info(f"🔍 Indexando biblioteca em {args.db}")
+        with index:
+            summary = index.build(args.simbolos, args.footprints)
+        log.info(f"✅ {summary['symbols_total']} símbolos, {summary['footprints_total']} footprints "
+                 f"({summary['duracao_s']:.2f}s)")
+        if args.json_summary:
+            write_json_summary(args.json_summary, summary)
+        return 0
+
+    with index:
+        try:
+            if args.command == "symbols":
+                rows = index.search_symbols(args.texto, args.lib, args.limit)
+            else:
+                rows = index.search_footprints(args.texto, args.lib, args.pitch, args.limit)
+        except sqlite3.OperationalError as e:
+            print(f"❌ Consulta inválida: {e}", file=sys.stderr)
+            return 2
+
+    for row in rows:
+        description = row['description'] or ''
+        print(f"{row['lib_id']}\t{description[:80]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
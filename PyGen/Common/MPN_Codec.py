@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Codificação e decodificação declarativa de part numbers (MPN) de fabricantes
+Arquivo: PyGen/Common/MPN_Codec.py
+
+Cada série é descrita por um modelo, ex: "AA{size}{tolerance}{packaging}-07{resistance}L",
+e por um campo para cada {nome}. O modelo é compilado uma vez em:
+    - encoder: parâmetros -> MPN (encode / encode_many, em lote)
+    - decoder: MPN -> parâmetros (uma regex com um grupo por campo)
+
+Com o MPN decodificado sabemos a tabela (ex: Resistor_0603) e o MPN canônico,
+então achar o MyPN de um rolo lido no recebimento é uma consulta por igualdade
+numa tabela só, em vez de um LIKE em todas (lookup_mypn).
+
+Uso pelos geradores:
+    mpn = YAGEO_AA.encode(size="0603", tolerance="1%", packaging="R", resistance=4700)
+    # 'AA0603FR-074K7L'
+
+Uso pela linha de comando:
+    python MPN_Codec.py decode AA0603FR-074K7L CC0402KRX7R9BB104
+    python MPN_Codec.py --db banco.sqlite lookup PA2512FKE070R005E
+"""
+
+import re
+import sys
+import string
+import sqlite3
+import argparse
+from decimal import Decimal
+from functools import lru_cache
+from pathlib import Path
+
+from E_Series import rkm_code, eia_code, to_decimal, _canonical, RKM_RESISTANCE
+
+
+# =============================================================================
+# CAMPOS
+# =============================================================================
+class Choice:
+    """Campo com valores fixos: {valor: código}, ex: {'1%': 'F', '5%': 'J'}"""
+
+    def __init__(self, codes):
+        if not isinstance(codes, dict):
+            codes = {code: code for code in codes}
+        self.codes = dict(codes)
+        self.values = {code: value for value, code in self.codes.items()}
+        # Códigos mais longos primeiro: '7W' não pode ser engolido por '7'
+        self.pattern = '|'.join(re.escape(c) for c in sorted(self.values, key=len, reverse=True))
+
+    def encode(self, value):
+        try:
+            return self.codes[value]
+        except KeyError:
+            raise ValueError(f"Valor sem código: {value!r} (aceitos: {', '.join(map(str, self.codes))})") from None
+
+    def decode(self, code):
+        return self.values[code]
+
+
+class RKM:
+    """Valor em código RKM (4K7, 0R5, 2M2); letters como em E_Series"""
+
+    def __init__(self, letters=RKM_RESISTANCE):
+        self.letters = letters
+        self.scale = {letter: exponent for letter, exponent in letters}
+        marks = ''.join(re.escape(letter) for letter, _ in letters)
+        self.pattern = rf'\d+[{marks}]\d*'
+        self._split = re.compile(rf'(\d+)([{marks}])(\d*)')
+
+    def encode(self, value):
+        return rkm_code(to_decimal(value), self.letters)
+
+    def decode(self, code):
+        whole, letter, fraction = self._split.fullmatch(code).groups()
+        return _canonical(Decimal(f"{whole}.{fraction or 0}").scaleb(self.scale[letter]))
+
+
+class EIA:
+    """Valor em código EIA: dígitos significativos + zeros (104), ou R como vírgula (4R7)"""
+
+    def __init__(self, significant=2):
+        self.significant = significant
+        self.pattern = rf'\d+R\d+|\d{{{significant + 1}}}'
+
+    def encode(self, value):
+        return eia_code(to_decimal(value), self.significant)
+
+    def decode(self, code):
+        if 'R' in code:
+            return _canonical(Decimal(code.replace('R', '.')))
+        return _canonical(Decimal(code[:-1]).scaleb(int(code[-1])))
+
+
+class Text:
+    """Trecho livre (sem significado numérico) que casa com a regex pattern"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+
+    def encode(self, value):
+        return str(value)
+
+    def decode(self, code):
+        return code
+
+
+# =============================================================================
+# CODEC
+# =============================================================================
+class MPNCodec:
+    """
+    Modelo de MPN de uma série. template usa {campo} para cada parâmetro;
+    table (opcional) é o modelo do nome da tabela do banco, ex: "Resistor_{size}".
+    """
+
+    def __init__(self, name, template, fields, manufacturer=None, table=None):
+        self.name = name
+        self.template = template
+        self.fields = fields
+        self.manufacturer = manufacturer
+        self.table = table
+
+        self._parts = []          # (texto fixo, nome do campo ou None)
+        regex = []
+        for literal, field, _, _ in string.Formatter().parse(template):
+            if field is not None and field not in fields:
+                raise ValueError(f"{name}: campo {{{field}}} sem definição")
+            self._parts.append((literal, field))
+            regex.append(re.escape(literal))
+            if field is not None:
+                regex.append(f'(?P<{field}>{fields[field].pattern})')
+        self.regex = re.compile(''.join(regex))
+        self._encoders = {field: lru_cache(maxsize=None)(spec.encode) for field, spec in fields.items()}
+
+    def __repr__(self):
+        return f"MPNCodec({self.name}: {self.template})"
+
+    def encode(self, **params):
+        """Monta o MPN a partir dos parâmetros (ValueError se falta algum ou não tem código)"""
+        out = []
+        for literal, field in self._parts:
+            out.append(literal)
+            if field is not None:
+                if field not in params:
+                    raise ValueError(f"{self.name}: falta o parâmetro {field}")
+                out.append(self._encoders[field](params[field]))
+        return ''.join(out)
+
+    def encode_many(self, rows):
+        """Monta os MPN de uma sequência de dicts de parâmetros (cada código é calculado uma vez)"""
+        encode = self.encode
+        return [encode(**row) for row in rows]
+
+    def decode(self, mpn):
+        """Parâmetros do MPN ({campo: valor}) ou None se ele não é desta série"""
+        match = self.regex.fullmatch(mpn.strip().upper())
+        if match is None:
+            return None
+        return {field: self.fields[field].decode(code) for field, code in match.groupdict().items()}
+
+    def table_for(self, params):
+        return self.table.format(**params) if self.table else None
+
+
+# =============================================================================
+# SÉRIES (conforme os datasheets usados pelos geradores)
+# =============================================================================
+YAGEO_RESISTOR_SIZES = ("0201", "0402", "0603", "0805", "1206", "1210", "1218", "2010", "2512")
+YAGEO_CAPACITOR_SIZES = ("0201", "0402", "0603", "0805", "1206", "1210", "1812", "2220")
+
+# Resistores Yageo: tolerância e embalagem (R = papel, K = embossed)
+YAGEO_RESISTOR_TOLERANCE = Choice({"0.1%": "B", "0.5%": "D", "1%": "F", "5%": "J"})
+YAGEO_PACKAGING = Choice(("R", "K"))
+
+# AA (Automotive Grade) - PYU-AA_51_ROHS_L.pdf; 07 = rolo de 7"
+YAGEO_AA = MPNCodec(
+    "Yageo AA", "AA{size}{tolerance}{packaging}-07{resistance}L",
+    {
+        "size": Choice(YAGEO_RESISTOR_SIZES),
+        "tolerance": YAGEO_RESISTOR_TOLERANCE,
+        "packaging": YAGEO_PACKAGING,
+        "resistance": RKM(),
+    },
+    manufacturer="Yageo", table="Resistor_{size}")
+
+# RC (General Purpose) - mesmo formato da AA
+YAGEO_RC = MPNCodec(
+    "Yageo RC", "RC{size}{tolerance}{packaging}-07{resistance}L",
+    {
+        "size": Choice(YAGEO_RESISTOR_SIZES),
+        "tolerance": YAGEO_RESISTOR_TOLERANCE,
+        "packaging": YAGEO_PACKAGING,
+        "resistance": RKM(),
+    },
+    manufacturer="Yageo", table="Resistor_{size}")
+
+# PA (Current Sensor) - PYU-PA_E_51_ROHS.pdf; potência e rolo num código só
+YAGEO_PA = MPNCodec(
+    "Yageo PA", "PA{size}{tolerance}{packaging}{tcr}{power}{resistance}E",
+    {
+        "size": Choice(("2512",)),
+        "tolerance": YAGEO_RESISTOR_TOLERANCE,
+        "packaging": YAGEO_PACKAGING,
+        "tcr": Choice({50: "E", 75: "M", 100: "F"}),
+        "power": Choice({"1W": "07", "2W": "7W", "3W": "7T"}),
+        "resistance": RKM((("R", 0),)),
+    },
+    manufacturer="Yageo", table="Resistor_{size}")
+
+# CC (MLCC) - capacitância em pF no código EIA de 2 dígitos; R = rolo de papel
+YAGEO_CC = MPNCodec(
+    "Yageo CC", "CC{size}{tolerance}R{dielectric}{voltage}BB{capacitance}",
+    {
+        "size": Choice(YAGEO_CAPACITOR_SIZES),
+        "tolerance": Choice({"1%": "F", "5%": "J", "10%": "K", "20%": "M"}),
+        "dielectric": Choice({"C0G": "NPO", "X5R": "X5R", "X7R": "X7R"}),
+        "voltage": Choice({4: "4", 6.3: "5", 10: "6", 16: "7", 25: "8", 50: "9",
+                           100: "1", 200: "2", 250: "A"}),
+        "capacitance": EIA(2),
+    },
+    manufacturer="Yageo", table="Capacitor_{size}")
+
+CODECS = {codec.name: codec for codec in (YAGEO_AA, YAGEO_RC, YAGEO_PA, YAGEO_CC)}
+
+
+def decode_any(mpn, codecs=None):
+    """(codec, parâmetros) da primeira série que reconhece o MPN, ou (None, None)"""
+    for codec in (codecs or CODECS.values()):
+        params = codec.decode(mpn)
+        if params is not None:
+            return codec, params
+    return None, None
+
+
+def lookup_mypn(conn, mpn, codecs=None):
+    """
+    MyPN do MPN lido (ex: etiqueta do rolo): decodifica, remonta o MPN
+    canônico e procura só na tabela da série. Devolve None se a série não é
+    conhecida ou o item não está no banco.
+    """
+    codec, params = decode_any(mpn, codecs)
+    if codec is None or not codec.table:
+        return None
+    table = codec.table_for(params)
+    try:
+        row = conn.execute(f'SELECT MyPN FROM "{table}" WHERE Manufacturer_PN = ? LIMIT 1',
+                           (codec.encode(**params),)).fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Decodifica MPNs e acha o MyPN correspondente")
+    parser.add_argument("--db", help="Banco da biblioteca (para lookup)")
+    sub = parser.add_subparsers(dest="command", required=True)
+    decode = sub.add_parser("decode", help="Mostra os parâmetros de cada MPN")
+    decode.add_argument("mpn", nargs="+")
+    lookup = sub.add_parser("lookup", help="Mostra o MyPN de cada MPN")
+    lookup.add_argument("mpn", nargs="+")
+    args = parser.parse_args(argv)
+
+    if args.command == "decode":
+        status = 0
+        for mpn in args.mpn:
+            codec, params = decode_any(mpn)
+            if codec is None:
+                print(f"{mpn}\t❌ série desconhecida")
+                status = 1
+                continue
+            print(f"{mpn}\t{codec.name}\t" + ', '.join(f"{k}={v}" for k, v in params.items()))
+        return status
+
+    if not args.db:
+        parser.error("lookup precisa de --db")
+    # URI montada pelo pathlib: espaços, '#' e '?' no caminho ficam escapados
+    conn = sqlite3.connect(Path(args.db).resolve().as_uri() + "?mode=ro", uri=True)
+    status = 0
+    for mpn in args.mpn:
+        mypn = lookup_mypn(conn, mpn)
+        if mypn is None:
+            status = 1
+        print(f"{mpn}\t{mypn or '❌ não encontrado'}")
+    conn.close()
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
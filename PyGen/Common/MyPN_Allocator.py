@@ -0,0 +1,371 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Alocador central de MyPN, guardado no próprio banco da biblioteca
+Arquivo: PyGen/Common/MyPN_Allocator.py
+
+Cada prefixo (ex: "EL-RES-", "EL-CON_") tem um próximo número livre na tabela
+MyPN_Prefix e cada reserva vira um bloco contíguo em MyPN_Block. A reserva é
+feita numa transação BEGIN IMMEDIATE, então geradores rodando em paralelo no
+mesmo banco nunca recebem números repetidos.
+
+Blocos com dono (owner, ex: "Yageo AA 0603") são estáveis: pedir de novo o
+mesmo dono devolve os mesmos números, e se ele precisar de mais o bloco é
+estendido (ou ganha um segmento novo).
+
+O MyPN de uma peça não pode depender da posição dela na lista gerada (tirar
+um valor renumeraria todos os seguintes, e eles já estão em esquemáticos).
+assign_stable_mypns procura primeiro o MyPN já gravado de cada linha pela
+chave estável (Manufacturer_PN na tabela de destino) e só as linhas sem
+correspondência recebem números livres do bloco do dono. O modo mesclar casa
+as linhas pelo MyPN, e é esse MyPN recuperado que ele usa.
+
+legacy_first adota a faixa que o gerador usava antes do alocador, se ela já
+tem linhas gravadas no banco e não é de outro dono: os MyPN existentes não
+mudam. Num banco novo os blocos são alocados a partir do próximo livre.
+
+Uso pelos geradores:
+    allocator = MyPNAllocator(loader.conn)
+    bloco = assign_stable_mypns(allocator, linhas, COLUNAS, "Resistor_0603",
+                                "EL-RES-", "Yageo AA 0603", legacy_first=1)
+    loader.store("Resistor_0603", COLUNAS, linhas, owned=bloco)
+
+Uso pela linha de comando:
+    python MyPN_Allocator.py --db banco.sqlite reserve EL-RES- 100 --owner "Teste"
+    python MyPN_Allocator.py --db banco.sqlite blocks
+"""
+
+import os
+import sys
+import sqlite3
+import argparse
+
+# Raiz do repositório (PyGen/Common -> PyGen -> raiz)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DEFAULT_DATABASE = os.path.join(REPO_ROOT, 'Library', '1_Database_Library', 'MyKiCadLibDatabase.sqlite')
+
+# Dígitos do número no MyPN (EL-RES-000123)
+DIGITS = 6
+
+# Coluna que identifica a peça entre execuções (casa a linha gerada com o MyPN gravado)
+STABLE_KEY = 'Manufacturer_PN'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS MyPN_Prefix (
+    Prefix TEXT PRIMARY KEY,
+    Next_Number INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS MyPN_Block (
+    ID_Aux INTEGER PRIMARY KEY,
+    Prefix TEXT NOT NULL,
+    Owner TEXT,
+    First_Number INTEGER NOT NULL,
+    Count INTEGER NOT NULL,
+    Created_At TEXT DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS idx_mypn_block_owner ON MyPN_Block(Prefix, Owner);
+"""
+
+
+def format_mypn(prefix, number):
+    """MyPN com o número completado com zeros (EL-RES-000123)"""
+    return f"{prefix}{number:0{DIGITS}d}"
+
+
+def prefix_upper_bound(prefix):
+    """Menor texto maior que todos os que começam com prefix (busca por faixa no índice)"""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1)
+
+
+class MyPNBlock:
+    """
+    Números reservados para um gerador: um ou mais segmentos contíguos
+    (first, count). Iterar devolve os MyPN formatados, na ordem.
+    """
+
+    def __init__(self, prefix, segments):
+        self.prefix = prefix
+        self.segments = [(first, count) for first, count in segments if count > 0]
+
+    def __len__(self):
+        return sum(count for _, count in self.segments)
+
+    def numbers(self):
+        for first, count in self.segments:
+            yield from range(first, first + count)
+
+    def __iter__(self):
+        for number in self.numbers():
+            yield format_mypn(self.prefix, number)
+
+    def __repr__(self):
+        ranges = ', '.join(f"{format_mypn(self.prefix, first)}..{format_mypn(self.prefix, first + count - 1)}"
+                           for first, count in self.segments)
+        return f"MyPNBlock({ranges or 'vazio'})"
+
+
+def reserve_mypns(allocator, prefix, count, owner, legacy_first):
+    """
+    Reserva pelo alocador; sem banco (allocator None, ex: geração de .sql)
+    devolve a faixa histórica do gerador começando em legacy_first.
+    """
+    if allocator is None:
+        return MyPNBlock(prefix, [(legacy_first, count)])
+    return allocator.reserve(prefix, count, owner, legacy_first)
+
+
+def assign_mypns(rows, block, index=0):
+    """Grava os MyPN do bloco na coluna index de cada linha (listas)"""
+    if len(block) < len(rows):
+        raise ValueError(f"Bloco com {len(block)} MyPN para {len(rows)} linhas")
+    for row, mypn in zip(rows, block):
+        row[index] = mypn
+    return rows
+
+
+def assign_stable_mypns(allocator, rows, columns, table, prefix, owner, legacy_first, key=STABLE_KEY):
+    """
+    Preenche a coluna MyPN das linhas (listas na ordem de columns): quem já
+    está gravado em table com a mesma key mantém o MyPN, as demais recebem
+    números livres do bloco do dono. Sem banco (allocator None) usa a faixa
+    histórica por posição, como reserve_mypns.
+    Retorna o bloco inteiro do dono (para o relatório de linhas que sumiram).
+    """
+    if allocator is None:
+        block = reserve_mypns(None, prefix, len(rows), owner, legacy_first)
+        assign_mypns(rows, block, columns.index('MyPN'))
+        return block
+    return allocator.assign(rows, columns, table, prefix, owner, legacy_first, key)
+
+
+class MyPNAllocator:
+    """
+    Reserva blocos de MyPN no banco. db pode ser um caminho ou uma conexão
+    sqlite3 já aberta (ex: BulkLoader.conn); nesse caso ela não é fechada.
+    """
+
+    def __init__(self, db, timeout=30.0):
+        if isinstance(db, sqlite3.Connection):
+            self.conn = db
+            self._own_connection = False
+        else:
+            if not os.path.isfile(db):
+                raise FileNotFoundError(f"Banco não encontrado: {db}")
+            self.conn = sqlite3.connect(db, timeout=timeout, isolation_level=None)
+            self._own_connection = True
+        self.conn.executescript(SCHEMA)
+        self._tables = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        if self._own_connection and self.conn is not None:
+            self.conn.close()
+            self.conn = None
+
+    def mypn_tables(self):
+        """Tabelas do banco que têm a coluna MyPN"""
+        if self._tables is None:
+            self._tables = [name for (name,) in self.conn.execute(
+                "SELECT m.name FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+                "WHERE m.type = 'table' AND p.name = 'MyPN' ORDER BY m.name")]
+        return self._tables
+
+    def _existing_mypns(self, prefix):
+        """MyPN já gravados com o prefixo, em todas as tabelas (faixa no índice UNIQUE)"""
+        for table in self.mypn_tables():
+            for (mypn,) in self.conn.execute(
+                    f'SELECT MyPN FROM "{table}" WHERE MyPN >= ? AND MyPN < ?',
+                    (prefix, prefix_upper_bound(prefix))):
+                yield mypn
+
+    def _max_existing(self, prefix):
+        """Maior número já gravado com o prefixo"""
+        highest = 0
+        start = len(prefix)
+        for mypn in self._existing_mypns(prefix):
+            suffix = mypn[start:]
+            if suffix.isdigit():
+                highest = max(highest, int(suffix))
+        return highest
+
+    def existing_by_key(self, table, prefix, key=STABLE_KEY):
+        """{key: MyPN} das linhas de table com o prefixo (vazio se a tabela/coluna não existe)"""
+        try:
+            rows = self.conn.execute(
+                f'SELECT "{key}", MyPN FROM "{table}" WHERE MyPN >= ? AND MyPN < ? ORDER BY MyPN',
+                (prefix, prefix_upper_bound(prefix))).fetchall()
+        except sqlite3.OperationalError:
+            return {}
+        existing = {}
+        for value, mypn in rows:
+            if value not in (None, ''):
+                existing.setdefault(value, mypn)
+        return existing
+
+    def _exists(self, prefix, first, last):
+        """Há alguma linha gravada com MyPN entre first e last?"""
+        bounds = (format_mypn(prefix, first), format_mypn(prefix, last))
+        return any(
+            self.conn.execute(f'SELECT 1 FROM "{table}" WHERE MyPN BETWEEN ? AND ? LIMIT 1', bounds).fetchone()
+            for table in self.mypn_tables())
+
+    def _next_number(self, prefix):
+        row = self.conn.execute("SELECT Next_Number FROM MyPN_Prefix WHERE Prefix = ?", (prefix,)).fetchone()
+        if row is not None:
+            return row[0]
+        # Primeira reserva do prefixo: começa depois do que já está gravado
+        next_number = self._max_existing(prefix) + 1
+        self.conn.execute("INSERT INTO MyPN_Prefix (Prefix, Next_Number) VALUES (?, ?)", (prefix, next_number))
+        return next_number
+
+    def _overlaps(self, prefix, first, count):
+        return self.conn.execute(
+            "SELECT 1 FROM MyPN_Block WHERE Prefix = ? AND First_Number < ? AND First_Number + Count > ? LIMIT 1",
+            (prefix, first + count, first)).fetchone() is not None
+
+    def _add_block(self, prefix, owner, first, count):
+        self.conn.execute(
+            "INSERT INTO MyPN_Block (Prefix, Owner, First_Number, Count) VALUES (?, ?, ?, ?)",
+            (prefix, owner, first, count))
+
+    def reserve(self, prefix, count, owner=None, legacy_first=None):
+        """
+        Reserva count números do prefixo e devolve um MyPNBlock.
+        Sem owner é sempre um bloco novo. Com owner os números já reservados
+        para ele são reaproveitados e só o que faltar é alocado.
+        """
+        if count < 0:
+            raise ValueError(f"Quantidade inválida: {count}")
+        if legacy_first is not None and owner is None:
+            raise ValueError("legacy_first precisa de um owner")
+
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            segments = []
+            if owner is not None:
+                segments = [list(row) for row in self.conn.execute(
+                    "SELECT ID_Aux, First_Number, Count FROM MyPN_Block "
+                    "WHERE Prefix = ? AND Owner = ? ORDER BY ID_Aux", (prefix, owner))]
+            missing = count - sum(c for _, _, c in segments)
+
+            if missing > 0:
+                next_number = self._next_number(prefix)
+                if (not segments and legacy_first is not None
+                        and not self._overlaps(prefix, legacy_first, count)
+                        and self._exists(prefix, legacy_first, legacy_first + count - 1)):
+                    # Adota a faixa antiga que já está no banco
+                    self._add_block(prefix, owner, legacy_first, count)
+                    segments.append([None, legacy_first, count])
+                    next_number = max(next_number, legacy_first + count)
+                elif segments and segments[-1][1] + segments[-1][2] == next_number:
+                    # Ninguém reservou depois deste dono: estende o último segmento
+                    segments[-1][2] += missing
+                    self.conn.execute("UPDATE MyPN_Block SET Count = ? WHERE ID_Aux = ?",
+                                      (segments[-1][2], segments[-1][0]))
+                    next_number += missing
+                else:
+                    self._add_block(prefix, owner, next_number, missing)
+                    segments.append([None, next_number, missing])
+                    next_number += missing
+                self.conn.execute("UPDATE MyPN_Prefix SET Next_Number = ? WHERE Prefix = ?",
+                                  (next_number, prefix))
+            self.conn.execute("COMMIT")
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+
+        # Devolve só os count primeiros (o resto continua reservado para o dono)
+        taken = []
+        for _, first, size in segments:
+            size = min(size, count)
+            taken.append((first, size))
+            count -= size
+        return MyPNBlock(prefix, taken)
+
+    def owned_block(self, prefix, owner):
+        """Todos os números reservados para o dono (MyPNBlock, vazio se nenhum)"""
+        return MyPNBlock(prefix, self.conn.execute(
+            "SELECT First_Number, Count FROM MyPN_Block WHERE Prefix = ? AND Owner = ? ORDER BY ID_Aux",
+            (prefix, owner)).fetchall())
+
+    def assign(self, rows, columns, table, prefix, owner, legacy_first=None, key=STABLE_KEY):
+        """Ver assign_stable_mypns"""
+        index = columns.index('MyPN')
+        key_index = columns.index(key)
+        known = self.existing_by_key(table, prefix, key)
+
+        pending = []
+        taken = set()
+        for row in rows:
+            mypn = known.get(row[key_index])
+            if mypn is None or mypn in taken:
+                pending.append(row)
+            else:
+                row[index] = mypn
+                taken.add(mypn)
+
+        # Números do bloco que ninguém usa (nem as linhas antigas que sumiram
+        # da geração: elas continuam no banco com o MyPN delas)
+        used = set(self._existing_mypns(prefix)) | taken
+        count = len(rows)
+        while True:
+            free = [mypn for mypn in self.reserve(prefix, count, owner, legacy_first) if mypn not in used]
+            if len(free) >= len(pending):
+                break
+            count += len(pending) - len(free)
+        for row, mypn in zip(pending, free):
+            row[index] = mypn
+        return self.owned_block(prefix, owner)
+
+    def blocks(self, prefix=None):
+        """Blocos reservados: lista de (prefixo, dono, primeiro, quantidade)"""
+        sql = "SELECT Prefix, Owner, First_Number, Count FROM MyPN_Block"
+        params = ()
+        if prefix:
+            sql += " WHERE Prefix = ?"
+            params = (prefix,)
+        return self.conn.execute(sql + " ORDER BY Prefix, First_Number", params).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Reserva blocos de MyPN no banco da biblioteca")
+    parser.add_argument("--db", default=DEFAULT_DATABASE, help="Banco da biblioteca")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    reserve = sub.add_parser("reserve", help="Reserva números de um prefixo")
+    reserve.add_argument("prefixo", help="Prefixo do MyPN (ex: EL-RES-)")
+    reserve.add_argument("quantidade", type=int, help="Quantos números")
+    reserve.add_argument("--owner", help="Dono do bloco (pedir de novo devolve os mesmos números)")
+
+    blocks = sub.add_parser("blocks", help="Lista os blocos reservados")
+    blocks.add_argument("prefixo", nargs="?", help="Só este prefixo")
+    args = parser.parse_args(argv)
+
+    try:
+        allocator = MyPNAllocator(args.db)
+    except FileNotFoundError as e:
+        print(f"❌ {e}", file=sys.stderr)
+        return 2
+
+    with allocator:
+        if args.command == "reserve":
+            block = allocator.reserve(args.prefixo, args.quantidade, args.owner)
+            for first, count in block.segments:
+                print(f"{format_mypn(args.prefixo, first)} .. {format_mypn(args.prefixo, first + count - 1)}"
+                      f" ({count})")
+            return 0
+
+        for prefix, owner, first, count in allocator.blocks(args.prefixo):
+            print(f"{format_mypn(prefix, first)} .. {format_mypn(prefix, first + count - 1)}"
+                  f"\t{count}\t{owner or ''}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Colunas numéricas (SI) dos parâmetros elétricos, para busca paramétrica
+Arquivo: PyGen/Common/Parametric.py
+
+Os parâmetros ficam gravados como texto de exibição ("4K7", "1%", "1/10W",
+"850mA", "0.03Ω", "1n2"), então "indutores >= 10 µH com Isat >= 3 A" exigia
+ler a tabela inteira e interpretar cada texto em Python. Aqui cada coluna de
+PARAMETERS ganha uma coluna sombra REAL <coluna>_SI com o valor em unidades SI
+(ohm, F, H, A, V, W; tolerância como fração: 1% -> 0.01), e cada família de
+FAMILIES ganha índices cobrindo as colunas sombra + MyPN. A busca vira uma
+consulta por faixa no índice.
+
+Como as colunas são mantidas:
+    - BulkLoader preenche as sombras das linhas que grava, na mesma transação
+    - um gatilho (SQL puro) zera a sombra quando o texto muda por fora, ex: no
+      DB Browser; o KiCad e o DB Browser não precisam de nenhuma função extra
+    - refresh preenche as sombras vazias (linhas editadas/inseridas por fora)
+
+No layout V2 (create_tables_v2.sqlite) as tabelas não têm as colunas
+elétricas, só Price: install cria apenas Price_SI (gatilho e índice) nas
+tabelas Resistor/Capacitor/Inductor, e a busca fica restrita ao preço.
+
+Uso pela linha de comando:
+    python Parametric.py --db banco.sqlite install
+    python Parametric.py --db banco.sqlite refresh
+    python Parametric.py --db banco.sqlite search Inductor "Inductance>=10uH" "Saturation_Current>=3A"
+"""
+
+import re
+import sys
+import sqlite3
+import argparse
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+
+# Coluna de texto -> unidade SI da coluna sombra ('%' = fração, '' = número puro)
+PARAMETERS = {
+    'Resistance': 'Ω',
+    'DC_Resistance': 'Ω',
+    'Capacitance': 'F',
+    'Inductance': 'H',
+    'Tolerance': '%',
+    'Power_Rating': 'W',
+    'Voltage_Rating': 'V',
+    'Current_Rating': 'A',
+    'Saturation_Current': 'A',
+    'Price': '',
+}
+
+# Família (prefixo das tabelas) -> parâmetros; o primeiro é a chave do índice coberto
+FAMILIES = {
+    'Resistor': ('Resistance', 'Tolerance', 'Power_Rating', 'Price'),
+    'Capacitor': ('Capacitance', 'Voltage_Rating', 'Tolerance', 'Price'),
+    'Inductor': ('Inductance', 'Saturation_Current', 'Current_Rating', 'DC_Resistance', 'Tolerance', 'Price'),
+}
+
+SHADOW_SUFFIX = '_SI'
+
+# Outros nomes aceitos para cada unidade (o símbolo em PARAMETERS também vale)
+UNIT_ALIASES = {
+    'Ω': ('ohms', 'ohm'),
+    'F': ('farad',),
+    'H': ('henry',),
+}
+
+# Prefixos SI (e o R do código RKM); maiúsculo/minúsculo importa: M = mega, m = mili
+PREFIXES = {
+    'p': -12, 'n': -9, 'u': -6, 'µ': -6, 'μ': -6, 'm': -3,
+    'R': 0, 'k': 3, 'K': 3, 'M': 6, 'G': 9,
+}
+
+_NUMBER = re.compile(r'(\d+(?:\.\d+)?)\s*([pnuµμmRkKMG]?)(\d*)')
+_FRACTION = re.compile(r'(\d+)\s*/\s*(\d+)')
+_PRICE = re.compile(r'\d+(?:\.\d+)?')
+_CONDITION = re.compile(r'(\w+)\s*(>=|<=|=|>|<)\s*(.+)')
+
+
+def shadow_column(column):
+    """Nome da coluna sombra (Resistance -> Resistance_SI)"""
+    return column + SHADOW_SUFFIX
+
+
+@lru_cache(maxsize=None)
+def parse_si(text, unit):
+    """
+    Valor SI (float) do texto de exibição, ou None se não dá para interpretar.
+    Exemplos: ('4K7', 'Ω') -> 4700.0, ('0p22', 'F') -> 2.2e-13, ('1/10W', 'W') -> 0.1,
+              ('850mA', 'A') -> 0.85, ('±5%', '%') -> 0.05, ('R$ 1,20', '') -> 1.2
+    """
+    if text is None:
+        return None
+    if isinstance(text, (int, float)):
+        return float(text)
+    text = text.strip().lstrip('±').replace(',', '.')
+    if not text:
+        return None
+
+    if unit == '':
+        match = _PRICE.search(text)
+        return float(match.group()) if match else None
+
+    # Tira a unidade do fim (850mA -> 850m, 0.03 Ohm -> 0.03)
+    for suffix in (unit,) + UNIT_ALIASES.get(unit, ()):
+        if text.lower().endswith(suffix.lower()):
+            text = text[:-len(suffix)].rstrip()
+            break
+
+    if unit == '%':
+        try:
+            return float(Decimal(text) / 100)
+        except InvalidOperation:
+            return None
+
+    match = _FRACTION.fullmatch(text)
+    if match:
+        denominator = int(match.group(2))
+        return int(match.group(1)) / denominator if denominator else None
+
+    match = _NUMBER.fullmatch(text)
+    if match is None:
+        return None
+    number, prefix, fraction = match.groups()
+    if fraction:
+        # Código RKM: a letra é a vírgula (4K7, 1n2, 0R005)
+        if '.' in number:
+            return None
+        number = f"{number}.{fraction}"
+    return float(Decimal(number).scaleb(PREFIXES.get(prefix, 0)))
+
+
+def family_tables(conn, family):
+    """Tabelas da família (ex: Resistor_0402 ... Resistor_General)"""
+    return [name for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name LIKE ? ESCAPE '\\' ORDER BY name",
+        (family.replace('_', '\\_') + '\\_%',))]
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute("SELECT * FROM pragma_table_info(?)", (table,))]
+
+
+def is_own_object(table, name):
+    """Se o índice/gatilho name de table é um dos que install cria"""
+    return name == f'idx_{table}_param' or (
+        name.startswith((f'trg_{table}_', f'idx_{table}_')) and name.endswith(SHADOW_SUFFIX))
+
+
+def shadowed_columns(columns):
+    """Parâmetros que já têm coluna sombra, dada a lista de colunas da tabela"""
+    present = set(columns)
+    return [c for c in PARAMETERS if c in present and shadow_column(c) in present]
+
+
+def install(conn, families=None):
+    """
+    Cria (se faltar) as colunas sombra, os gatilhos e os índices nas tabelas
+    das famílias e preenche as sombras. Pode rodar de novo sem efeito.
+    Retorna {tabela: [parâmetros]}.
+    """
+    installed = {}
+    for family in (families or FAMILIES):
+        parameters = FAMILIES[family]
+        for table in family_tables(conn, family):
+            columns = table_columns(conn, table)
+            present = [p for p in parameters if p in columns]
+            if not present:
+                continue
+            for column in present:
+                shadow = shadow_column(column)
+                if shadow not in columns:
+                    conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{shadow}" REAL')
+                conn.execute(
+                    f'CREATE TRIGGER IF NOT EXISTS "trg_{table}_{shadow}" '
+                    f'AFTER UPDATE OF "{column}" ON "{table}" '
+                    f'WHEN NEW."{column}" IS NOT OLD."{column}" '
+                    f'BEGIN UPDATE "{table}" SET "{shadow}" = NULL WHERE rowid = NEW.rowid; END')
+
+            # Índice coberto: chave principal + demais parâmetros + MyPN
+            key = ', '.join(f'"{shadow_column(c)}"' for c in present)
+            conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_param" ON "{table}" ({key}, "MyPN")')
+            for column in present[1:]:
+                conn.execute(f'CREATE INDEX IF NOT EXISTS "idx_{table}_{shadow_column(column)}" '
+                             f'ON "{table}" ("{shadow_column(column)}", "MyPN")')
+            refresh_table(conn, table)
+            installed[table] = present
+    return installed
+
+
+def refresh_table(conn, table, rebuild=False):
+    """
+    Preenche as sombras vazias da tabela (rebuild=True recalcula todas).
+    Retorna quantos valores foram gravados.
+    """
+    count = 0
+    for column in shadowed_columns(table_columns(conn, table)):
+        shadow = shadow_column(column)
+        unit = PARAMETERS[column]
+        where = f'"{column}" IS NOT NULL' + ('' if rebuild else f' AND "{shadow}" IS NULL')
+        updates = []
+        for rowid, text in conn.execute(f'SELECT rowid, "{column}" FROM "{table}" WHERE {where}'):
+            value = parse_si(text, unit)
+            if value is not None or rebuild:
+                updates.append((value, rowid))
+        if updates:
+            conn.executemany(f'UPDATE "{table}" SET "{shadow}" = ? WHERE rowid = ?', updates)
+            count += len(updates)
+    return count
+
+
+def refresh(conn, families=None, rebuild=False):
+    """refresh_table em todas as tabelas das famílias; retorna {tabela: valores gravados}"""
+    return {table: refresh_table(conn, table, rebuild)
+            for family in (families or FAMILIES)
+            for table in family_tables(conn, family)}
+
+
+def parse_condition(condition):
+    """'Inductance>=10uH' -> ('Inductance', '>=', 1e-05)"""
+    match = _CONDITION.fullmatch(condition.strip())
+    if match is None:
+        raise ValueError(f"Condição inválida: {condition!r} (ex: Inductance>=10uH)")
+    column, operator, text = match.groups()
+    if column not in PARAMETERS:
+        raise ValueError(f"Parâmetro sem coluna numérica: {column} (use {', '.join(PARAMETERS)})")
+    value = parse_si(text, PARAMETERS[column])
+    if value is None:
+        raise ValueError(f"Valor inválido para {column}: {text!r}")
+    return column, operator, value
+
+
+def search(conn, family, conditions):
+    """
+    Linhas (tabela, MyPN, valores SI dos parâmetros) da família que atendem a
+    todas as condições, ex: [('Inductance', '>=', 1e-5), ('Saturation_Current', '>=', 3)].
+    """
+    parameters = FAMILIES[family]
+    for column, _, _ in conditions:
+        if column not in parameters:
+            raise ValueError(f"{family} não tem {column} (use {', '.join(parameters)})")
+
+    selects = []
+    params = []
+    for table in family_tables(conn, family):
+        present = shadowed_columns(table_columns(conn, table))
+        if any(column not in present for column, _, _ in conditions):
+            continue
+        values = ', '.join(f'"{shadow_column(c)}"' if c in present else 'NULL' for c in parameters)
+        where = ' AND '.join(f'"{shadow_column(c)}" {op} ?' for c, op, _ in conditions) or '1'
+        selects.append(f"SELECT '{table}', MyPN, {values} FROM \"{table}\" WHERE {where}")
+        params.extend(value for _, _, value in conditions)
+    if not selects:
+        return []
+    return conn.execute(' UNION ALL '.join(selects), params).fetchall()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Colunas numéricas dos parâmetros e busca paramétrica")
+    parser.add_argument("--db", required=True, help="Banco da biblioteca")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("install", help="Cria colunas _SI, gatilhos e índices e preenche os valores")
+    refresh_parser = sub.add_parser("refresh", help="Preenche os valores _SI que estão vazios")
+    refresh_parser.add_argument("--tudo", action="store_true", help="Recalcula todos os valores")
+    search_parser = sub.add_parser("search", help="Busca por faixa de parâmetros")
+    search_parser.add_argument("familia", choices=sorted(FAMILIES))
+    search_parser.add_argument("condicoes", nargs="*", help='ex: "Inductance>=10uH" "Saturation_Current>=3A"')
+    args = parser.parse_args(argv)
+
+    conn = sqlite3.connect(args.db, isolation_level=None)
+    try:
+        if args.command == "install":
+            conn.execute("BEGIN")
+            installed = install(conn)
+            conn.execute("COMMIT")
+            for table, present in installed.items():
+                print(f"{table}: {', '.join(present)}")
+            if not installed:
+                print("⚠️ Nenhuma tabela Resistor/Capacitor/Inductor com colunas de parâmetros")
+            return 0
+
+        if args.command == "refresh":
+            conn.execute("BEGIN")
+            counts = refresh(conn, rebuild=args.tudo)
+            conn.execute("COMMIT")
+            print(f"✅ {sum(counts.values())} valores gravados em {sum(1 for c in counts.values() if c)} tabelas")
+            return 0
+
+        try:
+            conditions = [parse_condition(c) for c in args.condicoes]
+            rows = search(conn, args.familia, conditions)
+        except ValueError as e:
+            print(f"❌ {e}", file=sys.stderr)
+            return 2
+        parameters = FAMILIES[args.familia]
+        print('\t'.join(('Table', 'MyPN') + parameters))
+        for row in rows:
+            print('\t'.join('' if v is None else f"{v:g}" if isinstance(v, float) else str(v) for v in row))
+        print(f"✅ {len(rows)} itens", file=sys.stderr)
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migrações versionadas do esquema do banco da biblioteca, direto de banco para banco
+Arquivo: PyGen/Common/Schema_Migrations.py
+
+A versão do esquema fica no PRAGMA user_version do próprio banco. Cada
+migração de MIGRATIONS leva o banco da versão N-1 para N dentro do SQLite:
+a tabela nova é criada com o layout de destino, os dados passam com um
+INSERT INTO ... SELECT (colunas casadas pelo nome, com as regras de valor
+da migração) e a tabela antiga é trocada pela nova. Nada de exportar o
+banco em .sql e reescrever o texto em Python (Change_Inserts_to_new_Tables.py
+continua existindo só para dumps .sql).
+
+Cada migração roda numa transação junto com o novo user_version: ou o banco
+vai inteiro para a versão N, ou fica como estava. Índices e gatilhos da
+tabela são recriados depois da troca (os que usam colunas que deixaram de
+existir são descartados e listados), All_Parts é ressincronizada e as
+colunas _SI de Parametric são recriadas onde ainda fizerem sentido.
+
+Uso:
+    python Schema_Migrations.py --db banco.sqlite status
+    python Schema_Migrations.py --db banco.sqlite upgrade --simular
+    python Schema_Migrations.py --db banco.sqlite upgrade
+    python Schema_Migrations.py --db banco_antigo.sqlite upgrade --saida banco_novo.sqlite
+"""
+
+import os
+import re
+import sys
+import time
+import sqlite3
+import argparse
+
+import All_Parts
+import Parametric
+
+# Raiz do repositório (PyGen/Common -> PyGen -> raiz)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+DDL_DIR = os.path.join(REPO_ROOT, 'PyGen', 'Gerar_Script_Create_Tables')
+V2_DDL = os.path.join(DDL_DIR, 'create_tables_v2.sqlite')
+
+# Prefixo das tabelas temporárias durante a reconstrução
+TMP_PREFIX = '_migrate_'
+
+
+class Migration:
+    """Migração da versão version-1 para version: apply(conn, report) faz o trabalho"""
+
+    def __init__(self, version, description, apply):
+        self.version = version
+        self.description = description
+        self.apply = apply
+
+    def __repr__(self):
+        return f"Migration({self.version}: {self.description})"
+
+
+# =============================================================================
+# FERRAMENTAS DAS MIGRAÇÕES
+# =============================================================================
+def get_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute("SELECT * FROM pragma_table_info(?)", (table,))]
+
+
+def part_tables(conn):
+    """Tabelas de componentes (com MyPN; All_Parts e MyPN_* ficam de fora)"""
+    return list(All_Parts.part_tables(conn))
+
+
+def load_layout(ddl_path):
+    """
+    Layout de destino a partir de um script de DDL gerado (create_tables*.sqlite):
+    {tabela: CREATE TABLE} mais o CREATE TABLE genérico (o da primeira tabela),
+    usado para tabelas do banco que não estão no script.
+    """
+    if not os.path.isfile(ddl_path):
+        raise FileNotFoundError(f"Script de tabelas não encontrado: {ddl_path}")
+    with open(ddl_path, encoding='utf-8') as f:
+        script = f.read()
+    scratch = sqlite3.connect(":memory:")
+    scratch.executescript(script)
+    tables = dict(scratch.execute(
+        "SELECT name, sql FROM sqlite_master WHERE type = 'table' ORDER BY rowid").fetchall())
+    scratch.close()
+    if not tables:
+        raise ValueError(f"Nenhum CREATE TABLE em {ddl_path}")
+    return tables
+
+
+def create_sql_for(layout, table, new_name):
+    """CREATE TABLE do layout para table, com o nome trocado para new_name"""
+    sql = layout.get(table) or next(iter(layout.values()))
+    return f'CREATE TABLE "{new_name}" (' + sql.split('(', 1)[1]
+
+
+def rebuild_table(conn, table, create_sql, rules=None):
+    """
+    Reconstrói table com o CREATE TABLE create_sql (que deve criar a tabela
+    TMP_PREFIX + table). Colunas de mesmo nome passam como estão; rules
+    {coluna: expressão SQL} troca a expressão de uma coluna (a expressão só
+    é usada se a coluna existe na tabela de origem). Colunas de origem que
+    não existem no destino são descartadas.
+    Retorna {'linhas', 'descartadas': {coluna: valores não vazios}, 'perdidos': [sql]}.
+    """
+    rules = rules or {}
+    tmp = TMP_PREFIX + table
+    old_columns = table_columns(conn, table)
+    saved = conn.execute(
+        "SELECT type, name, sql FROM sqlite_master WHERE tbl_name = ? AND type IN ('index', 'trigger') "
+        "AND sql IS NOT NULL ORDER BY type, name", (table,)).fetchall()
+
+    conn.execute(f'DROP TABLE IF EXISTS "{tmp}"')
+    conn.execute(create_sql)
+    new_columns = table_columns(conn, tmp)
+
+    targets, sources = [], []
+    for column in new_columns:
+        if column in old_columns:
+            targets.append(f'"{column}"')
+            sources.append(rules.get(column, f'"{column}"'))
+    rows = conn.execute(f'INSERT INTO "{tmp}" ({", ".join(targets)}) '
+                        f'SELECT {", ".join(sources)} FROM "{table}"').rowcount
+
+    dropped = {}
+    for column in old_columns:
+        # Colunas _SI de Parametric são derivadas: não contam como dado perdido
+        if column not in new_columns and not column.endswith(Parametric.SHADOW_SUFFIX):
+            count = conn.execute(f'SELECT count(*) FROM "{table}" WHERE "{column}" IS NOT NULL '
+                                 f'AND "{column}" <> \'\'').fetchone()[0]
+            if count:
+                dropped[column] = count
+
+    conn.execute(f'DROP TABLE "{table}"')
+    conn.execute(f'ALTER TABLE "{tmp}" RENAME TO "{table}"')
+
+    # O SQLite só confere as colunas do corpo de um gatilho no próximo
+    # ALTER TABLE, então o que cita coluna removida nem é recriado
+    removed = [column for column in old_columns if column not in new_columns]
+    mentions_removed = re.compile(r'\b(?:' + '|'.join(map(re.escape, removed)) + r')\b') if removed else None
+    lost = []
+    for kind, name, sql in saved:
+        # Os de Parametric são recriados por Parametric.install (rebuild_to_layout)
+        if Parametric.is_own_object(table, name):
+            continue
+        if mentions_removed and mentions_removed.search(sql):
+            lost.append(f"{kind} {name}")
+            continue
+        try:
+            conn.execute(sql)
+        except sqlite3.OperationalError:
+            lost.append(f"{kind} {name}")
+    return {'linhas': rows, 'descartadas': dropped, 'perdidos': lost}
+
+
+def rebuild_to_layout(conn, report, layout, rules=None):
+    """Reconstrói todas as tabelas de componentes no layout; detalhes em report"""
+    for table in part_tables(conn):
+        result = rebuild_table(conn, table, create_sql_for(layout, table, TMP_PREFIX + table), rules)
+        report[table] = result
+    # Dependências das tabelas reconstruídas
+    if All_Parts.exists(conn):
+        for table in report:
+            All_Parts.sync_table(conn, table)
+    Parametric.install(conn)
+
+
+# =============================================================================
+# MIGRAÇÕES
+# =============================================================================
+# Regras de valor do layout V2. Version segue Change_Inserts_to_new_Tables.py
+# (1 -> '1.0'), mas Created_At/Created_By não: o dump sempre troca por
+# CURRENT_TIMESTAMP/'Rogerio Fontanario', aqui datas e autores válidos do banco
+# são mantidos e só os vazios/inválidos recebem esses valores
+V2_RULES = {
+    'Version': "CASE WHEN \"Version\" IN (1, '1') THEN '1.0' ELSE \"Version\" END",
+    'Created_At': "CASE WHEN \"Created_At\" GLOB '[0-9][0-9][0-9][0-9]-*' THEN \"Created_At\" "
+                  "ELSE CURRENT_TIMESTAMP END",
+    'Created_By': "COALESCE(NULLIF(\"Created_By\", ''), 'Rogerio Fontanario')",
+}
+
+
+def migrate_v2_layout(conn, report):
+    rebuild_to_layout(conn, report, load_layout(V2_DDL), V2_RULES)
+
+
+MIGRATIONS = [
+    Migration(1, "Layout de colunas V2 (create_tables_v2.sqlite)", migrate_v2_layout),
+]
+
+LATEST = MIGRATIONS[-1].version
+
+
+def pending(conn, target=LATEST):
+    version = get_version(conn)
+    return [m for m in MIGRATIONS if version < m.version <= target]
+
+
+def upgrade(conn, target=LATEST, dry_run=False, log=print):
+    """
+    Aplica as migrações pendentes até target, cada uma numa transação com o
+    novo user_version. dry_run desfaz tudo no fim (só mostra o relatório).
+    Retorna {versão: relatório}.
+    """
+    reports = {}
+    for migration in pending(conn, target):
+        log(f"➡️  v{migration.version}: {migration.description}")
+        start = time.perf_counter()
+        report = {}
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            migration.apply(conn, report)
+            conn.execute(f"PRAGMA user_version = {int(migration.version)}")
+            if dry_run:
+                raise _DryRun()
+        except _DryRun:
+            conn.execute("ROLLBACK")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        else:
+            conn.execute("COMMIT")
+        reports[migration.version] = report
+        log_report(report, time.perf_counter() - start, log)
+        if dry_run:
+            # As próximas dependem desta, que foi desfeita
+            break
+    return reports
+
+
+class _DryRun(Exception):
+    pass
+
+
+def log_report(report, elapsed, log=print):
+    rows = sum(r['linhas'] for r in report.values())
+    log(f"   {len(report)} tabelas, {rows} linhas em {elapsed:.2f}s")
+    dropped = {}
+    for table, result in report.items():
+        for column, count in result['descartadas'].items():
+            dropped[column] = dropped.get(column, 0) + count
+        if result['perdidos']:
+            log(f"   ⚠️ {table}: não recriados (colunas removidas): {', '.join(result['perdidos'])}")
+    for column, count in sorted(dropped.items()):
+        log(f"   ⚠️ Coluna {column} removida com {count} valores preenchidos")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Migrações versionadas do banco da biblioteca (PRAGMA user_version)")
+    parser.add_argument("--db", required=True, help="Banco da biblioteca")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("status", help="Mostra a versão do banco e as migrações pendentes")
+    up = sub.add_parser("upgrade", help="Aplica as migrações pendentes")
+    up.add_argument("--ate", type=int, default=LATEST, help="Versão final (padrão: a mais nova)")
+    up.add_argument("--saida", help="Copia o banco para este arquivo e migra a cópia")
+    up.add_argument("--simular", action="store_true", help="Mostra o que mudaria e desfaz")
+    args = parser.parse_args(argv)
+
+    if not os.path.isfile(args.db):
+        print(f"❌ Banco não encontrado: {args.db}", file=sys.stderr)
+        return 2
+
+    db_path = args.db
+    if args.command == "upgrade" and args.saida:
+        if os.path.exists(args.saida):
+            print(f"❌ {args.saida} já existe", file=sys.stderr)
+            return 2
+        source = sqlite3.connect(args.db)
+        target = sqlite3.connect(args.saida)
+        source.backup(target)
+        target.close()
+        source.close()
+        db_path = args.saida
+
+    conn = sqlite3.connect(db_path, isolation_level=None)
+    try:
+        if args.command == "status":
+            print(f"Versão do banco: {get_version(conn)} (mais nova: {LATEST})")
+            for migration in pending(conn):
+                print(f"   pendente v{migration.version}: {migration.description}")
+            return 0
+
+        if not pending(conn, args.ate):
+            print(f"✅ Banco já está na versão {get_version(conn)}")
+            return 0
+        upgrade(conn, args.ate, args.simular)
+        if args.simular:
+            print("↩️  Simulação: nada foi gravado")
+        else:
+            print(f"✅ {os.path.basename(db_path)} na versão {get_version(conn)}")
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
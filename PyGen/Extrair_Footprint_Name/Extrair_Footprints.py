@@ -6,40 +6,97 @@ Data: 2024
 """
 
 import os
+import sys
 import csv
-import re
+import time
+import argparse
+import logging
+from functools import partial
+from multiprocessing import Pool
 from pathlib import Path
 
+# Módulos compartilhados em PyGen/Common
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Common'))
+from Extraction_Cache import ExtractionCache, file_signature
+from KiCad_SExpr import read_head
+from Extraction_Log import add_output_arguments, setup_logging, ProgressCounter, write_json_summary
+
+log = logging.getLogger("Extrair_Footprints")
+
+# Namespace do cache: mude a versão quando a extração do nome mudar
+CACHE_NAMESPACE = 'footprints:v1'
+
+# O nome do footprint está sempre no primeiro token do arquivo:
+#   (footprint "Nome" ...   (KiCad 6+)
+#   (module Nome ...        (formato antigo)
+# read_head lê só o primeiro bloco do arquivo
+TIPOS_FOOTPRINT = ('footprint', 'module')
+
+# Abaixo disso não compensa subir processos
+MIN_ARQUIVOS_PARALELO = 200
+
 def extrair_nome_footprint(arquivo):
     """
     Extrai o nome do footprint do arquivo .kicad_mod de forma robusta
     Lidando com aspas, vírgulas e caracteres especiais
+    Lê apenas o início do arquivo (o token (footprint/(module fica no cabeçalho)
     """
+    arquivo = Path(arquivo)
     try:
-        with open(arquivo, 'r', encoding='utf-8', errors='ignore') as f:
-            conteudo = f.read()
-        
-        # Primeira tentativa: captura conteúdo entre aspas (caso mais comum)
-        match = re.search(r'\(\s*module\s+"([^"]+)"', conteudo)
-        if match:
-            nome = match.group(1)
-            return nome
-        
-        # Segunda tentativa: captura conteúdo sem aspas
-        match = re.search(r'\(\s*module\s+([^\s\(]+)', conteudo)
-        if match:
-            nome = match.group(1)
+        tipo, nome = read_head(arquivo)
+        if tipo in TIPOS_FOOTPRINT and nome:
             # Remove aspas residuais (caso algo tenha escapado)
-            nome = nome.replace('"', '').replace("'", '')
-            return nome
+            return nome.replace('"', '').replace("'", '') if tipo == 'module' else nome
         
         # Fallback: usa o nome do arquivo se não encontrar no conteúdo
         return arquivo.stem
         
     except Exception as e:
-        print(f"   ⚠️ Erro ao ler {arquivo.name}: {e}")
+        log.warning(f"   ⚠️ Erro ao ler {arquivo.name}: {e}")
         return arquivo.stem
 
+def indexar_arquivo(tarefa, assinar=False):
+    """
+    Worker do pool: recebe (nome_pasta, caminho) e devolve
+    (nome_pasta, nome_arquivo, nome_footprint, assinatura). Com assinar, a
+    assinatura do cache é tirada aqui, antes da leitura (sem hash: reler o
+    cabeçalho custa menos que ler o arquivo inteiro); senão é None
+    """
+    nome_pasta, caminho = tarefa
+    assinatura = file_signature(caminho, with_hash=False) if assinar else None
+    nome_footprint = limpar_nome_footprint(extrair_nome_footprint(caminho))
+    return nome_pasta, os.path.basename(caminho), nome_footprint, assinatura
+
+def listar_tarefas(package_path):
+    """
+    Lista (nome_pasta_sem_pretty, caminho_arquivo) de todas as pastas,
+    ordenadas por "NomeDaPasta:nome_do_arquivo" (o nome do footprint quase
+    sempre é o nome do arquivo, então o CSV sai na mesma ordem de antes)
+    """
+    tarefas = []
+    total_pastas = 0
+    for pasta in sorted(package_path.iterdir()):
+        if not pasta.is_dir():
+            continue
+        total_pastas += 1
+        
+        # Remove .pretty do nome da pasta se existir
+        nome_pasta = pasta.name
+        if nome_pasta.endswith('.pretty'):
+            nome_pasta = nome_pasta[:-7]  # Remove os 7 caracteres '.pretty'
+        
+        with os.scandir(pasta) as entradas:
+            arquivos = [e.path for e in entradas if e.name.endswith('.kicad_mod') and e.is_file()]
+        
+        if not arquivos:
+            log.warning(f"   ⚠️ Nenhum arquivo .kicad_mod encontrado em {pasta.name}")
+            continue
+        
+        tarefas.extend((nome_pasta, arquivo) for arquivo in arquivos)
+    
+    tarefas.sort(key=lambda t: f"{t[0]}:{Path(t[1]).stem}")
+    return tarefas, total_pastas
+
 def limpar_nome_footprint(nome):
     """
     Limpa o nome do footprint removendo caracteres problemáticos
@@ -53,93 +110,144 @@ def limpar_nome_footprint(nome):
     
     return nome
 
-def gerar_footprints_csv(caminho_package, arquivo_saida="footprints_para_database.csv"):
+def gerar_footprints_csv(caminho_package, arquivo_saida="footprints_para_database.csv", processos=None,
+                         arquivo_cache=None):
     """
     Gera CSV com footprints no formato: NomeDaPasta:nomedofootprint
     Remove automaticamente a extensão .pretty do nome da pasta
     TODAS as linhas são envolvidas por aspas para consistência
+    
+    Os arquivos são indexados em paralelo (processos=None usa todos os núcleos,
+    processos=1 roda sem pool) e cada resultado é gravado no CSV assim que
+    chega, na ordem pasta/arquivo.
+    
+    Com arquivo_cache (SQLite), só os arquivos novos ou alterados desde a
+    última execução são lidos; os demais vêm do cache.
+    
+    Retorna um dicionário com o resumo da execução (ou None se a pasta não existe)
     """
     package_path = Path(caminho_package)
     
     if not package_path.exists():
-        print(f"❌ Pasta não encontrada: {package_path}")
-        return
+        log.error(f"❌ Pasta não encontrada: {package_path}")
+        return None
     
-    footprints = []
     erros = []
     
-    print(f"\n📁 Analisando: {package_path}")
-    print("=" * 60)
+    log.info(f"\n📁 Analisando: {package_path}")
+    log.info("=" * 60)
+    
+    inicio = time.perf_counter()
+    tarefas, total_pastas = listar_tarefas(package_path)
     
     # Estatísticas
     total_arquivos = 0
-    total_pastas = 0
+    total_unicos = 0
+    vistos = set()
     
-    # Percorre subpastas
-    for pasta in sorted(package_path.iterdir()):
-        if pasta.is_dir():
-            total_pastas += 1
-            
-            # Remove .pretty do nome da pasta se existir
-            nome_pasta = pasta.name
-            if nome_pasta.endswith('.pretty'):
-                nome_pasta = nome_pasta[:-7]  # Remove os 7 caracteres '.pretty'
-            
-            print(f"\n📂 {nome_pasta} (original: {pasta.name})")
-            
-            # Procura arquivos .kicad_mod
-            arquivos_kicad = list(pasta.glob("*.kicad_mod"))
-            
-            if not arquivos_kicad:
-                print(f"   ⚠️ Nenhum arquivo .kicad_mod encontrado")
-                continue
+    # Separa o que já está no cache do que precisa ser lido
+    cache = ExtractionCache(arquivo_cache, CACHE_NAMESPACE) if arquivo_cache else None
+    em_cache = {}
+    pendentes = tarefas
+    if cache:
+        pendentes = []
+        for tarefa in tarefas:
+            nome = cache.get(tarefa[1])
+            if nome is None:
+                pendentes.append(tarefa)
+            else:
+                em_cache[tarefa[1]] = nome
+    
+    if processos is None:
+        processos = os.cpu_count() or 1
+    usar_pool = processos > 1 and len(pendentes) >= MIN_ARQUIVOS_PARALELO
+    
+    # Salva CSV com QUOTE_ALL para colocar aspas em TODAS as linhas
+    with open(arquivo_saida, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_ALL)  # QUOTE_ALL força aspas em tudo
+        writer.writerow(['Footprint'])
+        
+        worker = partial(indexar_arquivo, assinar=cache is not None)
+        pool = Pool(processos) if usar_pool else None
+        try:
+            if pool:
+                # imap mantém a ordem das tarefas e entrega os resultados em lotes
+                chunksize = max(1, min(256, len(pendentes) // (processos * 8) or 1))
+                novos = pool.imap(worker, pendentes, chunksize=chunksize)
+            else:
+                novos = map(worker, pendentes)
             
-            for arquivo in sorted(arquivos_kicad):
+            progresso = ProgressCounter(len(tarefas), "Footprints", log)
+            for nome_pasta, caminho in tarefas:
+                progresso.update()
+                if caminho in em_cache:
+                    nome_arquivo, nome_footprint = os.path.basename(caminho), em_cache[caminho]
+                else:
+                    # Os pendentes saem do pool na mesma ordem em que aparecem em tarefas
+                    nome_pasta, nome_arquivo, nome_footprint, assinatura = next(novos)
+                    if cache:
+                        cache.put(caminho, nome_footprint, assinatura)
                 total_arquivos += 1
                 
-                # Extrai nome do footprint
-                nome_footprint = extrair_nome_footprint(arquivo)
-                nome_footprint = limpar_nome_footprint(nome_footprint)
-                
                 # Verifica se o nome parece válido
                 if not nome_footprint or len(nome_footprint) < 2:
-                    print(f"   ⚠️ Nome suspeito para {arquivo.name}: '{nome_footprint}'")
-                    erros.append(f"{pasta.name}:{arquivo.name} -> '{nome_footprint}'")
+                    log.debug(f"   ⚠️ Nome suspeito para {nome_arquivo}: '{nome_footprint}'")
+                    erros.append(f"{nome_pasta}:{nome_arquivo} -> '{nome_footprint}'")
                 
                 # Formato: NomeDaPasta (sem .pretty):nome_footprint
                 footprint_completo = f"{nome_pasta}:{nome_footprint}"
-                footprints.append(footprint_completo)
-                print(f"   ✓ {footprint_completo}")
+                log.debug(f"   ✓ {footprint_completo}")
+                
+                # Remove duplicatas mantendo a ordem
+                if footprint_completo not in vistos:
+                    vistos.add(footprint_completo)
+                    writer.writerow([footprint_completo])
+                    total_unicos += 1
+            progresso.close()
+        finally:
+            if pool:
+                pool.close()
+                pool.join()
     
-    # Remove duplicatas mantendo a ordem
-    footprints_unicos = []
-    vistos = set()
-    for fp in footprints:
-        if fp not in vistos:
-            vistos.add(fp)
-            footprints_unicos.append(fp)
+    if cache:
+        cache.prune(package_path, [caminho for _, caminho in tarefas])
+        cache.commit()
+        cache.close()
     
-    # Salva CSV com QUOTE_ALL para colocar aspas em TODAS as linhas
-    with open(arquivo_saida, 'w', newline='', encoding='utf-8') as f:
-        writer = csv.writer(f, quoting=csv.QUOTE_ALL)  # QUOTE_ALL força aspas em tudo
-        writer.writerow(['Footprint'])
-        for fp in sorted(footprints_unicos):
-            writer.writerow([fp])
+    duracao = time.perf_counter() - inicio
+    taxa = total_arquivos / duracao if duracao > 0 else 0
     
-    print(f"\n" + "=" * 60)
-    print(f"✅ RESUMO:")
-    print(f"   Pastas processadas: {total_pastas}")
-    print(f"   Arquivos .kicad_mod encontrados: {total_arquivos}")
-    print(f"   Footprints únicos salvos: {len(footprints_unicos)}")
-    print(f"   Arquivo gerado: {os.path.abspath(arquivo_saida)}")
-    print(f"   Formato: TODAS as linhas com aspas (QUOTE_ALL)")
+    log.info("\n" + "=" * 60)
+    log.info("✅ RESUMO:")
+    log.info(f"   Pastas processadas: {total_pastas}")
+    log.info(f"   Arquivos .kicad_mod encontrados: {total_arquivos}")
+    log.info(f"   Footprints únicos salvos: {total_unicos}")
+    log.info(f"   Tempo: {duracao:.2f}s ({taxa:.0f} arquivos/s, {processos if usar_pool else 1} processo(s))")
+    if cache:
+        log.info(f"   Cache: {len(em_cache)} reaproveitados, {len(pendentes)} lidos ({arquivo_cache})")
+    log.info(f"   Arquivo gerado: {os.path.abspath(arquivo_saida)}")
+    log.info("   Formato: TODAS as linhas com aspas (QUOTE_ALL)")
     
     if erros:
-        print(f"\n⚠️ {len(erros)} footprints com possíveis problemas:")
+        log.warning(f"\n⚠️ {len(erros)} footprints com possíveis problemas:")
         for erro in erros[:10]:  # Mostra apenas os primeiros 10
-            print(f"   {erro}")
+            log.warning(f"   {erro}")
         if len(erros) > 10:
-            print(f"   ... e mais {len(erros)-10}")
+            log.warning(f"   ... e mais {len(erros)-10}")
+    
+    return {
+        "pasta": str(package_path.resolve()),
+        "arquivo_saida": os.path.abspath(arquivo_saida),
+        "pastas": total_pastas,
+        "arquivos": total_arquivos,
+        "footprints_unicos": total_unicos,
+        "cache_reaproveitados": len(em_cache),
+        "arquivos_lidos": len(pendentes),
+        "processos": processos if usar_pool else 1,
+        "duracao_s": round(duracao, 3),
+        "arquivos_por_s": round(taxa, 1),
+        "nomes_suspeitos": erros,
+    }
 
 def listar_estrutura_pastas(caminho_package):
     """
@@ -148,11 +256,11 @@ def listar_estrutura_pastas(caminho_package):
     package_path = Path(caminho_package)
     
     if not package_path.exists():
-        print(f"❌ Pasta não encontrada: {package_path}")
+        log.error(f"❌ Pasta não encontrada: {package_path}")
         return
     
-    print(f"\n📁 Estrutura de pastas em: {package_path}")
-    print("=" * 60)
+    log.info(f"\n📁 Estrutura de pastas em: {package_path}")
+    log.info("=" * 60)
     
     for pasta in sorted(package_path.iterdir()):
         if pasta.is_dir():
@@ -161,52 +269,74 @@ def listar_estrutura_pastas(caminho_package):
             if nome_pasta.endswith('.pretty'):
                 nome_pasta = nome_pasta[:-7]
             
-            print(f"📂 {pasta.name} -> {nome_pasta} ({len(arquivos)} footprints)")
+            log.debug(f"📂 {pasta.name} -> {nome_pasta} ({len(arquivos)} footprints)")
 
 # EXECUTAR
 if __name__ == "__main__":
-    print("🔍 GERADOR DE FOOTPRINTS PARA DATABASE")
-    print("=" * 60)
-    
     # Pega o diretório onde o script está localizado
     script_dir = os.path.dirname(os.path.abspath(__file__))
     
+    parser = argparse.ArgumentParser(description="Gera lista de footprints a partir das pastas .pretty")
+    parser.add_argument("pasta", nargs="?", default=os.path.join(script_dir, 'Led'),
+                        help="Pasta com as subpastas .pretty (padrão: ./Led)")
+    parser.add_argument("-o", "--saida", default=os.path.join(script_dir, 'footprints_para_database_Led.csv'),
+                        help="Arquivo CSV de saída (padrão: footprints_para_database_Led.csv)")
+    parser.add_argument("-j", "--processos", type=int, default=None,
+                        help="Número de processos (padrão: todos os núcleos)")
+    parser.add_argument("--sem-cache", action="store_true", help="Não usa o cache de extração")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args.verbose, args.quiet)
+    
+    log.info("🔍 GERADOR DE FOOTPRINTS PARA DATABASE")
+    log.info("=" * 60)
+    
     # Define o caminho completo para a pasta Connectors
-    caminho_package = os.path.join(script_dir, 'Led')
+    caminho_package = args.pasta
     
     # Define o nome do arquivo de saída
-    arquivo_saida = os.path.join(script_dir, 'footprints_para_database_Led.csv')
+    arquivo_saida = args.saida
+    
+    # Cache dos nomes já extraídos (só arquivos alterados são lidos de novo)
+    arquivo_cache = None if args.sem_cache else os.path.join(script_dir, 'extracao_cache.sqlite')
     
-    print(f"📁 Script em: {script_dir}")
-    print(f"📁 Pasta Connectors: {caminho_package}")
-    print(f"📁 Arquivo de saída: {arquivo_saida}")
-    print("=" * 60)
+    log.info(f"📁 Script em: {script_dir}")
+    log.info(f"📁 Pasta Connectors: {caminho_package}")
+    log.info(f"📁 Arquivo de saída: {arquivo_saida}")
+    log.info("=" * 60)
+    
+    resumo = None
     
     # Verifica se a pasta Connectors existe
     if not os.path.exists(caminho_package):
-        print(f"\n❌ Pasta 'Connectors' não encontrada em: {caminho_package}")
-        print("   Certifique-se que o script está na mesma pasta que a pasta 'Connectors'")
-        print("\n   Estrutura esperada:")
-        print("   ./")
-        print("   ├── Setup_Database_Generator.py (este script)")
-        print("   └── Connectors/")
-        print("       ├── Connector_Phoenix.pretty/")
-        print("       ├── Connector_Molex.pretty/")
-        print("       └── ...")
+        log.error(f"\n❌ Pasta 'Connectors' não encontrada em: {caminho_package}")
+        log.error("   Certifique-se que o script está na mesma pasta que a pasta 'Connectors'")
+        log.info("\n   Estrutura esperada:")
+        log.info("   ./")
+        log.info("   ├── Setup_Database_Generator.py (este script)")
+        log.info("   └── Connectors/")
+        log.info("       ├── Connector_Phoenix.pretty/")
+        log.info("       ├── Connector_Molex.pretty/")
+        log.info("       └── ...")
         
         # Pergunta se quer listar o que existe no diretório atual
-        print("\n📁 Conteúdo do diretório atual:")
+        log.info("\n📁 Conteúdo do diretório atual:")
         for item in sorted(Path(script_dir).iterdir()):
             if item.is_dir():
-                print(f"   📂 {item.name}/")
+                log.info(f"   📂 {item.name}/")
             else:
-                print(f"   📄 {item.name}")
+                log.info(f"   📄 {item.name}")
     else:
         # Opcional: listar estrutura antes de processar
         listar_estrutura_pastas(caminho_package)
         
         # Executa a função principal
-        print("\n🚀 Iniciando processamento...")
-        gerar_footprints_csv(caminho_package, arquivo_saida)
+        log.info("\n🚀 Iniciando processamento...")
+        resumo = gerar_footprints_csv(caminho_package, arquivo_saida, args.processos, arquivo_cache=arquivo_cache)
         
-        print("\n✨ Processo concluído!")
\ No newline at end of file
+        log.info("\n✨ Processo concluído!")
+    
+    if args.json_summary:
+        write_json_summary(args.json_summary, resumo or {"erro": f"Pasta não encontrada: {caminho_package}"})
+    
+    sys.exit(0 if resumo is not None else 1)
@@ -5,198 +5,135 @@ Versão com debug para identificar problemas
 """
 
 import os
+import sys
 import csv
-import re
+import time
+import argparse
+import logging
 from pathlib import Path
 
+# Módulos compartilhados em PyGen/Common
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Common'))
+from Extraction_Cache import ExtractionCache, file_signature
+from KiCad_SExpr import iter_symbols
+from Extraction_Log import add_output_arguments, setup_logging, ProgressCounter, write_json_summary
+
+log = logging.getLogger("Extrair_Symbols")
+
+# Namespace do cache: mude a versão quando a extração de símbolos mudar
+CACHE_NAMESPACE = 'simbolos:v2'
+
 def extrair_todos_simbolos(arquivo):
     """
     Extrai TODOS os símbolos PRINCIPAIS de um arquivo .kicad_sym
-    Versão com debug e mais robusta
+    Uma única passada pelo arquivo (KiCad_SExpr): só os símbolos de primeiro
+    nível são devolvidos, sub-símbolos (unidades "Nome_0_1") ficam de fora
+    
+    Retorna (símbolos, erro): se a leitura falhou no meio, erro é a mensagem
+    e símbolos tem só os lidos antes da falha
     """
     simbolos_info = []
+    erro = None
     
     try:
-        with open(arquivo, 'r', encoding='utf-8', errors='ignore') as f:
-            conteudo = f.read()
+        log.debug(f"   📊 Tamanho do arquivo: {os.path.getsize(arquivo)} bytes")
         
-        print(f"   📊 Tamanho do arquivo: {len(conteudo)} caracteres")
-        
-        # Método 1: Dividir por símbolos (mais confiável)
-        # Primeiro, encontra todos os blocos que começam com (symbol
-        import re
-        blocos_raw = re.finditer(r'\(\s*symbol\s+', conteudo)
-        posicoes = [m.start() for m in blocos_raw]
-        
-        print(f"   🔍 Encontradas {len(posicoes)} ocorrências de '(symbol'")
-        
-        # Se não encontrou com regex, tenta método alternativo
-        if len(posicoes) == 0:
-            print("   ⚠️ Regex não encontrou símbolos, tentando método alternativo...")
-            linhas = conteudo.split('\n')
-            dentro_simbolo = False
-            simbolo_atual = []
-            nome_simbolo = ""
+        for nome_simbolo, propriedades in iter_symbols(arquivo):
+            info = {
+                'simbolo': nome_simbolo,
+                'value': '',
+                'footprint': '',
+                'description': '',
+                'keywords': '',
+                'fp_filters': '',
+                'datasheet': ''
+            }
             
-            for i, linha in enumerate(linhas):
-                if '(symbol' in linha and not dentro_simbolo:
-                    dentro_simbolo = True
-                    simbolo_atual = [linha]
-                    # Tenta extrair nome
-                    match = re.search(r'\(\s*symbol\s+"([^"]+)"', linha)
-                    if match:
-                        nome_simbolo = match.group(1)
-                    else:
-                        nome_simbolo = f"simbolo_{i}"
-                
-                elif dentro_simbolo:
-                    simbolo_atual.append(linha)
-                    # Fecha o símbolo (quando encontra fechamento no nível correto)
-                    if linha.strip() == ')' and simbolo_atual.count('(') <= simbolo_atual.count(')'):
-                        # Processa o símbolo
-                        bloco_conteudo = '\n'.join(simbolo_atual)
-                        
-                        # Pula se parecer sub-símbolo
-                        if re.search(r'_\d+_\d+$', nome_simbolo):
-                            print(f"     ⏭️ Ignorando sub-símbolo: {nome_simbolo}")
-                        else:
-                            info = {
-                                'simbolo': nome_simbolo,
-                                'value': '',
-                                'footprint': '',
-                                'description': '',
-                                'keywords': '',
-                                'fp_filters': '',
-                                'datasheet': ''
-                            }
-                            
-                            # Extrai propriedades
-                            info = extrair_propriedades(bloco_conteudo, info)
-                            simbolos_info.append(info)
-                            print(f"     ✓ Encontrado: {nome_simbolo}")
-                        
-                        dentro_simbolo = False
-                        simbolo_atual = []
-        
-        else:
-            # Método com posições (original melhorado)
-            for i, start in enumerate(posicoes):
-                # Encontra o fim do símbolo (balanceando parênteses)
-                balance = 1
-                pos = start + 8  # pula '(symbol '
-                
-                while balance > 0 and pos < len(conteudo):
-                    if conteudo[pos] == '(':
-                        balance += 1
-                    elif conteudo[pos] == ')':
-                        balance -= 1
-                    pos += 1
-                
-                bloco_conteudo = conteudo[start:pos]
-                
-                # Extrai nome do símbolo
-                match_nome = re.search(r'\(\s*symbol\s+"([^"]+)"', bloco_conteudo)
-                if not match_nome:
-                    match_nome = re.search(r'\(\s*symbol\s+([^\s\(]+)', bloco_conteudo)
-                
-                if match_nome:
-                    nome_simbolo = match_nome.group(1)
-                    
-                    # Pula sub-símbolos
-                    if re.search(r'_\d+_\d+$', nome_simbolo):
-                        print(f"     ⏭️ Ignorando sub-símbolo: {nome_simbolo}")
-                        continue
-                    
-                    info = {
-                        'simbolo': nome_simbolo,
-                        'value': '',
-                        'footprint': '',
-                        'description': '',
-                        'keywords': '',
-                        'fp_filters': '',
-                        'datasheet': ''
-                    }
-                    
-                    info = extrair_propriedades(bloco_conteudo, info)
-                    simbolos_info.append(info)
-                    print(f"     ✓ Encontrado: {nome_simbolo}")
-                else:
-                    print(f"     ⚠️ Não foi possível extrair nome do símbolo {i+1}")
+            info = extrair_propriedades(propriedades, info)
+            simbolos_info.append(info)
+            log.debug(f"     ✓ Encontrado: {nome_simbolo}")
         
     except Exception as e:
-        print(f"   ❌ Erro ao processar {arquivo.name}: {e}")
-        import traceback
-        traceback.print_exc()
+        log.error(f"   ❌ Erro ao processar {arquivo.name}: {e}", exc_info=log.isEnabledFor(logging.DEBUG))
+        erro = str(e)
     
-    return simbolos_info
+    return simbolos_info, erro
 
-def extrair_propriedades(bloco_conteudo, info):
-    """Extrai todas as propriedades de um bloco de símbolo"""
-    
-    # Extrai Value
-    value_match = re.search(r'\(\s*property\s+"Value"\s+"([^"]*)"', bloco_conteudo)
-    if value_match:
-        info['value'] = value_match.group(1)
-    
-    # Extrai Footprint
-    footprint_match = re.search(r'\(\s*property\s+"Footprint"\s+"([^"]*)"', bloco_conteudo)
-    if footprint_match:
-        info['footprint'] = footprint_match.group(1)
-    
-    # Extrai Description
-    description_match = re.search(r'\(\s*property\s+"Description"\s+"([^"]*)"', bloco_conteudo)
-    if description_match:
-        info['description'] = description_match.group(1)
-    
-    # Extrai ki_keywords (Tags)
-    keywords_match = re.search(r'\(\s*property\s+"ki_keywords"\s+"([^"]*)"', bloco_conteudo)
-    if keywords_match:
-        info['keywords'] = keywords_match.group(1)
-    
-    # Extrai ki_fp_filters (Footprint_Filter)
-    fp_filters_match = re.search(r'\(\s*property\s+"ki_fp_filters"\s+"([^"]*)"', bloco_conteudo)
-    if fp_filters_match:
-        info['fp_filters'] = fp_filters_match.group(1)
-    
-    # Extrai Datasheet
-    datasheet_match = re.search(r'\(\s*property\s+"Datasheet"\s+"([^"]*)"', bloco_conteudo)
-    if datasheet_match:
-        info['datasheet'] = datasheet_match.group(1)
-    
+# Propriedade do KiCad -> chave em info
+PROPRIEDADES = {
+    'Value': 'value',
+    'Footprint': 'footprint',
+    'Description': 'description',
+    'ki_keywords': 'keywords',        # Tags
+    'ki_fp_filters': 'fp_filters',    # Footprint_Filter
+    'Datasheet': 'datasheet',
+}
+
+def extrair_propriedades(propriedades, info):
+    """Copia as propriedades conhecidas ({nome: valor} do símbolo) para info"""
+    for nome, chave in PROPRIEDADES.items():
+        if nome in propriedades:
+            info[chave] = propriedades[nome]
     return info
 
-def gerar_simbolos_csv(caminho_pasta, arquivo_saida="simbolos_para_database.csv"):
+def gerar_simbolos_csv(caminho_pasta, arquivo_saida="simbolos_para_database.csv", arquivo_cache=None):
     """
     Gera CSV com informações dos símbolos .kicad_sym
+    Com arquivo_cache (SQLite), arquivos que não mudaram desde a última
+    execução não são analisados de novo
+    
+    Retorna um dicionário com o resumo da execução (ou None se a pasta não existe)
     """
     pasta_path = Path(caminho_pasta)
     
     if not pasta_path.exists():
-        print(f"❌ Pasta não encontrada: {pasta_path}")
-        return
+        log.error(f"❌ Pasta não encontrada: {pasta_path}")
+        return None
     
     todos_simbolos = []
     
-    print(f"\n📁 Analisando: {pasta_path}")
-    print("=" * 60)
+    log.info(f"\n📁 Analisando: {pasta_path}")
+    log.info("=" * 60)
+    
+    inicio = time.perf_counter()
     
     # Estatísticas
     total_arquivos = 0
     total_simbolos = 0
+    total_cache = 0
+    erros = []
+    
+    cache = ExtractionCache(arquivo_cache, CACHE_NAMESPACE) if arquivo_cache else None
+    arquivos = sorted(pasta_path.glob("*.kicad_sym"))
     
     # Processa arquivos .kicad_sym na pasta
-    for arquivo in sorted(pasta_path.glob("*.kicad_sym")):
+    progresso = ProgressCounter(len(arquivos), "Arquivos", log)
+    for arquivo in arquivos:
         total_arquivos += 1
+        progresso.update()
         
-        print(f"\n📄 [{total_arquivos}] {arquivo.name}")
-        print("-" * 40)
+        log.debug(f"\n📄 [{total_arquivos}] {arquivo.name}")
+        log.debug("-" * 40)
         
         try:
-            # Extrai TODOS os símbolos deste arquivo
-            simbolos = extrair_todos_simbolos(arquivo)
+            # Extrai TODOS os símbolos deste arquivo (ou reaproveita do cache)
+            simbolos = cache.get(arquivo) if cache else None
+            if simbolos is not None:
+                total_cache += 1
+                log.debug(f"   💾 {len(simbolos)} símbolos do cache")
+            else:
+                # Assinatura antes da leitura: uma edição durante ela invalida a entrada
+                assinatura = file_signature(arquivo) if cache else None
+                simbolos, erro = extrair_todos_simbolos(arquivo)
+                if erro:
+                    # Resultado parcial: entra no CSV, mas não no cache, para
+                    # o arquivo ser lido (e o erro aparecer) de novo na próxima vez
+                    erros.append(f"{arquivo.name}: {erro}")
+                elif cache:
+                    cache.put(arquivo, simbolos, assinatura)
             
             if not simbolos:
-                print(f"   ⚠️ Nenhum símbolo encontrado em {arquivo.name}")
+                log.warning(f"   ⚠️ Nenhum símbolo encontrado em {arquivo.name}")
             
             for info in simbolos:
                 total_simbolos += 1
@@ -216,8 +153,15 @@ def gerar_simbolos_csv(caminho_pasta, arquivo_saida="simbolos_para_database.csv"
                 })
                 
         except Exception as e:
-            print(f"   ❌ Erro fatal em {arquivo.name}: {e}")
+            log.error(f"   ❌ Erro fatal em {arquivo.name}: {e}")
+            erros.append(f"{arquivo.name}: {e}")
             continue
+    progresso.close()
+    
+    if cache:
+        cache.prune(pasta_path, arquivos)
+        cache.commit()
+        cache.close()
     
     # Salva CSV
     with open(arquivo_saida, 'w', newline='', encoding='utf-8') as f:
@@ -235,36 +179,71 @@ def gerar_simbolos_csv(caminho_pasta, arquivo_saida="simbolos_para_database.csv"
                 info['datasheet']
             ])
     
-    print(f"\n" + "=" * 60)
-    print(f"✅ RESUMO:")
-    print(f"   Arquivos .kicad_sym processados: {total_arquivos}")
-    print(f"   Símbolos encontrados: {total_simbolos}")
-    print(f"   Arquivo gerado: {os.path.abspath(arquivo_saida)}")
+    duracao = time.perf_counter() - inicio
+    
+    log.info("\n" + "=" * 60)
+    log.info("✅ RESUMO:")
+    log.info(f"   Arquivos .kicad_sym processados: {total_arquivos}")
+    log.info(f"   Símbolos encontrados: {total_simbolos}")
+    log.info(f"   Tempo: {duracao:.2f}s")
+    if cache:
+        log.info(f"   Cache: {total_cache} arquivos reaproveitados, {total_arquivos - total_cache} analisados")
+    log.info(f"   Arquivo gerado: {os.path.abspath(arquivo_saida)}")
+    
+    return {
+        "pasta": str(pasta_path.resolve()),
+        "arquivo_saida": os.path.abspath(arquivo_saida),
+        "arquivos": total_arquivos,
+        "simbolos": total_simbolos,
+        "cache_reaproveitados": total_cache,
+        "arquivos_analisados": total_arquivos - total_cache,
+        "duracao_s": round(duracao, 3),
+        "erros": erros,
+    }
 
 # EXECUTAR
 if __name__ == "__main__":
-    print("🔍 GERADOR DE SÍMBOLOS PARA DATABASE (DEBUG MODE)")
-    print("=" * 60)
-    
     script_dir = os.path.dirname(os.path.abspath(__file__))
-    caminho_pasta = os.path.join(script_dir, 'Filter')
-    arquivo_saida = os.path.join(script_dir, 'database_for_Filter.csv')
     
-    print(f"📁 Script em: {script_dir}")
-    print(f"📁 Pasta Connectores: {caminho_pasta}")
-    print(f"📁 Arquivo de saída: {arquivo_saida}")
-    print("=" * 60)
+    parser = argparse.ArgumentParser(description="Gera lista de símbolos a partir dos arquivos .kicad_sym")
+    parser.add_argument("pasta", nargs="?", default=os.path.join(script_dir, 'Filter'),
+                        help="Pasta com os arquivos .kicad_sym (padrão: ./Filter)")
+    parser.add_argument("-o", "--saida", default=os.path.join(script_dir, 'database_for_Filter.csv'),
+                        help="Arquivo CSV de saída (padrão: database_for_Filter.csv)")
+    parser.add_argument("--sem-cache", action="store_true", help="Não usa o cache de extração")
+    add_output_arguments(parser)
+    args = parser.parse_args()
+    setup_logging(args.verbose, args.quiet)
+    
+    log.info("🔍 GERADOR DE SÍMBOLOS PARA DATABASE")
+    log.info("=" * 60)
+    
+    caminho_pasta = args.pasta
+    arquivo_saida = args.saida
+    arquivo_cache = None if args.sem_cache else os.path.join(script_dir, 'extracao_cache.sqlite')
+    
+    log.info(f"📁 Script em: {script_dir}")
+    log.info(f"📁 Pasta Connectores: {caminho_pasta}")
+    log.info(f"📁 Arquivo de saída: {arquivo_saida}")
+    log.info("=" * 60)
+    
+    resumo = None
     
     if not os.path.exists(caminho_pasta):
-        print(f"\n❌ Pasta 'Connectores' não encontrada")
+        log.error(f"\n❌ Pasta 'Connectores' não encontrada")
     else:
         # Mostra todos os arquivos .kicad_sym encontrados
         arquivos = list(Path(caminho_pasta).glob("*.kicad_sym"))
-        print(f"\n📁 Encontrados {len(arquivos)} arquivos .kicad_sym:")
+        log.info(f"\n📁 Encontrados {len(arquivos)} arquivos .kicad_sym")
         for i, arq in enumerate(arquivos, 1):
-            print(f"   {i:2d}. {arq.name}")
+            log.debug(f"   {i:2d}. {arq.name}")
         
-        print("\n🚀 Iniciando processamento...")
-        gerar_simbolos_csv(caminho_pasta, arquivo_saida)
+        log.info("\n🚀 Iniciando processamento...")
+        resumo = gerar_simbolos_csv(caminho_pasta, arquivo_saida, arquivo_cache=arquivo_cache)
         
-        print("\n✨ Processo concluído!")
\ No newline at end of file
+        log.info("\n✨ Processo concluído!")
+    
+    if args.json_summary:
+        write_json_summary(args.json_summary, resumo or {"erro": f"Pasta não encontrada: {caminho_pasta}"})
+    
+    sys.exit(0 if resumo is not None else 1)
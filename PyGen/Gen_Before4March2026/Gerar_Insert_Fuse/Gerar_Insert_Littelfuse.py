@@ -1,9 +1,18 @@
 import os
 import sys
+import argparse
 
 # Diretório onde o script está localizado
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(SCRIPT_DIR)), 'Common'))
+from Bulk_Loader import BulkLoader, add_database_arguments, mode_from_args
+from MyPN_Allocator import MyPNAllocator, assign_stable_mypns
+
+TABLE = 'Fuse'
+MYPN_PREFIX = 'EL-FUSE-'
+MYPN_OWNER = 'Littelfuse'
+
 # Lista ordenada de todas as colunas da tabela Fuse (baseada no CREATE TABLE, exceto ID_Aux)
 TABLE_COLUMNS_ORDER = [
     'MyPN', 'Name', 'Description', 'Value', 'Info1', 'Info2',
@@ -80,7 +89,12 @@ def format_current(val):
     except:
         return str(val)
 
-def generate_insert(output_path=None, start_id=910001):
+def generate_insert(output_path=None, start_id=910001, loader=None, allocator=None):
+    """
+    Com loader grava direto no banco (MyPN estável pelo Manufacturer_PN, no
+    bloco de MYPN_OWNER via allocator); sem ele escreve o INSERT em
+    output_path (ou na saída padrão), numerando a partir de start_id.
+    """
     # Dados da série 154 Fast-Acting (fusíveis 451/453) extraídos da primeira imagem
     fuse_154_data = [
         {'current': 0.062, 'voltage': 125, 'interrupt': '', 'resistance': 5.5000, 'i2t': 0.00019},
@@ -298,6 +312,15 @@ def generate_insert(output_path=None, start_id=910001):
         print("Erro: Nenhuma coluna válida para inserir.")
         return
 
+    rows = [[None if data.get(col) in (None, '') else data[col] for col in final_columns]
+            for data in insert_data]
+    block = assign_stable_mypns(allocator, rows, final_columns, TABLE, MYPN_PREFIX,
+                                MYPN_OWNER, start_id)
+
+    if loader is not None:
+        loader.store(TABLE, final_columns, rows, block)
+        return
+
     # Preparar saída
     if output_path:
         output_path = os.path.abspath(output_path)
@@ -310,29 +333,37 @@ def generate_insert(output_path=None, start_id=910001):
 
     # Gerar os VALUES
     values_lines = []
-    for data in insert_data:
-        values = []
-        for col in final_columns:
-            val = data.get(col, None)
-            if val is None or val == '':
-                values.append('NULL')
-            else:
-                values.append(escape_sql_string(val))
+    for row in rows:
+        values = ['NULL' if val is None else escape_sql_string(val) for val in row]
         values_lines.append(f"({', '.join(values)})")
 
     # Montar o comando INSERT
     columns_str = ', '.join(final_columns)
     values_str = ',\n'.join(values_lines)
-    sql = f"INSERT INTO Fuse ({columns_str}) VALUES\n{values_str};\n"
+    sql = f"INSERT INTO {TABLE} ({columns_str}) VALUES\n{values_str};\n"
     out.write(sql)
 
     if output_path:
         out.close()
         print(f"Arquivo SQL gerado: {output_path}")
 
-def main():
-    output_file = os.path.join(SCRIPT_DIR, 'inserts_fuse_littelfuse.sql')
-    generate_insert(output_file, start_id=100)
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os fusíveis Littelfuse")
+    add_database_arguments(parser)
+    args = parser.parse_args(argv)
+
+    if not args.database:
+        output_file = os.path.join(SCRIPT_DIR, 'inserts_fuse_littelfuse.sql')
+        generate_insert(output_file, start_id=100)
+        return
+
+    loader = BulkLoader(args.database, mode_from_args(args))
+    try:
+        generate_insert(start_id=100, loader=loader, allocator=MyPNAllocator(loader.conn))
+        if args.relatorio:
+            print(f"Relatório: {loader.write_report(args.relatorio)} diferenças em {args.relatorio}")
+    finally:
+        loader.close()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -1,28 +1,20 @@
 import os
+import sys
+import time
+import argparse
 from datetime import datetime
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'Common'))
+from Bulk_Loader import BulkLoader, NOW, add_database_arguments, mode_from_args, write_sql_file
+from MyPN_Allocator import MyPNAllocator, assign_stable_mypns
+from E_Series import e_values, rkm_code
+from MPN_Codec import YAGEO_AA, YAGEO_PA
+
 # =============================================================================
 # CONSTANTES GLOBAIS
 # =============================================================================
-# Séries de valores normalizados (1 a 10) para a série AA
-E24_VALUES = [
-    1.0, 1.1, 1.2, 1.3, 1.5, 1.6, 1.8, 2.0, 2.2, 2.4, 2.7,
-    3.0, 3.3, 3.6, 3.9, 4.3, 4.7, 5.1, 5.6, 6.2, 6.8, 7.5, 8.2, 9.1
-]
-
-E96_VALUES = [
-    1.00, 1.02, 1.05, 1.07, 1.10, 1.13, 1.15, 1.18, 1.21, 1.24, 1.27, 1.30,
-    1.33, 1.37, 1.40, 1.43, 1.47, 1.50, 1.54, 1.58, 1.62, 1.65, 1.69, 1.74,
-    1.78, 1.82, 1.87, 1.91, 1.96, 2.00, 2.05, 2.10, 2.15, 2.21, 2.26, 2.32,
-    2.37, 2.43, 2.49, 2.55, 2.61, 2.67, 2.74, 2.80, 2.87, 2.94, 3.01, 3.09,
-    3.16, 3.24, 3.32, 3.40, 3.48, 3.57, 3.65, 3.74, 3.83, 3.92, 4.02, 4.12,
-    4.22, 4.32, 4.42, 4.53, 4.64, 4.75, 4.87, 4.99, 5.11, 5.23, 5.36, 5.49,
-    5.62, 5.76, 5.90, 6.04, 6.19, 6.34, 6.49, 6.65, 6.81, 6.98, 7.15, 7.32,
-    7.50, 7.68, 7.87, 8.06, 8.25, 8.45, 8.66, 8.87, 9.09, 9.31, 9.53, 9.76
-]
-
-# Décadas para gerar valores (de 1 a 10M) para a série AA
-DECADES_AA = [10**i for i in range(0, 8)]  # 1, 10, 100, ... 10M
+# Séries de valores da série AA (valores gerados por E_Series.e_values)
+AA_SERIES = ("E24", "E96")
 
 # =============================================================================
 # FUNÇÕES DE FORMATAÇÃO DE RESISTÊNCIA
@@ -38,30 +30,7 @@ def format_aa_resistance(value_ohms):
         2.2MΩ -> 2M2
         1MΩ   -> 1M
     """
-    v = round(value_ohms, 12)
-    if v < 1:
-        s = f"{v:.12f}".rstrip('0').rstrip('.')
-        return s.replace('.', 'R')
-    elif v < 1000:
-        if abs(v - round(v)) < 1e-9:
-            return f"{int(round(v))}R"
-        else:
-            s = f"{v:.12f}".rstrip('0').rstrip('.')
-            return s.replace('.', 'R')
-    elif v < 1e6:
-        k = v / 1000.0
-        if abs(k - round(k)) < 1e-9:
-            return f"{int(round(k))}K"
-        else:
-            s = f"{k:.12f}".rstrip('0').rstrip('.')
-            return s.replace('.', 'K')
-    else:
-        m = v / 1e6
-        if abs(m - round(m)) < 1e-9:
-            return f"{int(round(m))}M"
-        else:
-            s = f"{m:.12f}".rstrip('0').rstrip('.')
-            return s.replace('.', 'M')
+    return rkm_code(value_ohms)
 
 def format_pa_resistance(value_ohms):
     """
@@ -72,8 +41,7 @@ def format_pa_resistance(value_ohms):
         0.003Ω  -> 0R003
         0.1Ω    -> 0R1
     """
-    s = f"{value_ohms:.12f}".rstrip('0').rstrip('.')
-    return s.replace('.', 'R')
+    return rkm_code(value_ohms, (("R", 0),))
 
 # =============================================================================
 # CONFIGURAÇÕES POR SÉRIE (baseadas nos datasheets)
@@ -185,15 +153,7 @@ def generate_aa_resistances(spec):
     Gera dicionário {str_resistencia: valor_ohms} para a série AA,
     combinando E24 e E96 e filtrando pelo range do tamanho.
     """
-    unique = {}
-    for mult in DECADES_AA:
-        for val in E24_VALUES + E96_VALUES:
-            r = val * mult
-            if spec["r_min"] <= r <= spec["r_max"]:
-                r_rounded = round(r, 12)
-                unique[r_rounded] = r_rounded
-    sorted_items = sorted(unique.items())
-    return {format_aa_resistance(v): v for _, v in sorted_items}
+    return {format_aa_resistance(v): v for v in e_values(AA_SERIES, spec["r_min"], spec["r_max"])}
 
 def generate_pa_resistances(spec):
     """
@@ -232,131 +192,81 @@ def get_aa_tcr(size, res_ohms):
             return "±150ppm/°C"
 
 # =============================================================================
-# GERAÇÃO DOS ARQUIVOS SQL
+# GERAÇÃO DAS LINHAS
 # =============================================================================
-def main():
-    script_dir = os.path.dirname(os.path.abspath(__file__))
-    mypn_counter = 1
-    base_counter = 0  # Para separar os blocos de cada série/tamanho
+MYPN_PREFIX = "EL-RES-"
 
-    # -------------------------------------------------------------------------
-    # Série AA
-    # -------------------------------------------------------------------------
-    for size, spec in AA_SPECS.items():
-        mypn_counter = base_counter + 1
-        resistances = generate_aa_resistances(spec)
-
-        columns = [
-            "MyPN", "Name", "Description", "Value", "Info1", "Info2",
-            "Symbol", "Footprint", "Footprint_Filter", "Datasheet",
-            "Manufacturer", "Manufacturer_PN",
-            "Category", "Subcategory", "Package", "Mount",
-            "Temperature_Range", "REACH_Compliant", "RoHS_Compliant",
-            "Unit", "Tolerance", "Power_Rating", "Temperature_Coefficient",
-            "Resistance", "Technology_Material",
-            "Created_At", "Created_By"
-        ]
-
-        values_lines = []
-        tolerance = "1%"
-        manufacturer = "Yageo"
-        category = "Resistor"
-        subcategory = "Thick Film"          # conforme datasheet AA
-        mount = "SMD"
-        unit = "Ohm"
-        tech_material = "Thick Film"
-        reach = "Yes"
-        rohs = "Yes"
-        created_by = "Rogerio Fontanario"
-        datasheet_url = "https://yageogroup.com/content/datasheet/asset/file/PYU-AA_51_ROHS_L.pdf"
-        symbol = "MyLib_Resistor:RES_US"
-
-        for res_str, res_ohms in resistances.items():
-            tcr = get_aa_tcr(size, res_ohms)
-            packaging = spec["packaging"]
-            mfg_pn = f"AA{size}F{packaging}-07{res_str}L"  # 07 = 7" reel
+COLUMNS = [
+    "MyPN", "Name", "Description", "Value", "Info1", "Info2",
+    "Symbol", "Footprint", "Footprint_Filter", "Datasheet",
+    "Manufacturer", "Manufacturer_PN",
+    "Category", "Subcategory", "Package", "Mount",
+    "Temperature_Range", "REACH_Compliant", "RoHS_Compliant",
+    "Unit", "Tolerance", "Power_Rating", "Temperature_Coefficient",
+    "Resistance", "Technology_Material",
+    "Created_At", "Created_By"
+]
 
-            name = f"RES_{size}_{res_str}_{tolerance}"
-            description = f"Resistor SMD {size} {res_str} {tolerance} {spec['power']}"
-            value = res_str
-            info1 = tolerance
-            info2 = spec["power"]
-            mypn = f"EL-RES-{mypn_counter:06d}"
-            mypn_counter += 1
+def generate_aa_rows(size, spec):
+    """Linhas (na ordem de COLUMNS) da série AA de um tamanho, ainda sem MyPN"""
+    resistances = generate_aa_resistances(spec)
 
-            values = [
-                mypn, name, description, value, info1, info2,
-                symbol,
-                spec["footprint"],
-                spec["footprint_filter"],
-                datasheet_url,
-                manufacturer,
-                mfg_pn,
-                category,
-                subcategory,
-                size,
-                mount,
-                spec["temp_range"],
-                reach,
-                rohs,
-                unit,
-                tolerance,
-                spec["power"],
-                tcr,
-                res_str,
-                tech_material,
-                "datetime('now')",
-                created_by
-            ]
+    rows = []
+    tolerance = "1%"
+    manufacturer = "Yageo"
+    category = "Resistor"
+    subcategory = "Thick Film"          # conforme datasheet AA
+    mount = "SMD"
+    unit = "Ohm"
+    tech_material = "Thick Film"
+    reach = "Yes"
+    rohs = "Yes"
+    created_by = "Rogerio Fontanario"
+    datasheet_url = "https://yageogroup.com/content/datasheet/asset/file/PYU-AA_51_ROHS_L.pdf"
+    symbol = "MyLib_Resistor:RES_US"
 
-            formatted = []
-            for v in values:
-                if v is None:
-                    formatted.append("NULL")
-                elif isinstance(v, int):
-                    formatted.append(str(v))
-                elif v == "datetime('now')":
-                    formatted.append(v)
-                else:
-                    v_escaped = str(v).replace("'", "''")
-                    formatted.append(f"'{v_escaped}'")
-            values_lines.append("(" + ", ".join(formatted) + ")")
+    for res_str, res_ohms in resistances.items():
+        tcr = get_aa_tcr(size, res_ohms)
+        packaging = spec["packaging"]
+        mfg_pn = YAGEO_AA.encode(size=size, tolerance=tolerance, packaging=packaging, resistance=res_ohms)
 
-        if values_lines:
-            output_file = os.path.join(script_dir, f"insert_resistor_AA_{size}.sql")
-            header = f"INSERT INTO Resistor_{size} ({', '.join(columns)}) VALUES\n"
-            body = ",\n".join(values_lines) + ";"
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(f"-- Script de inserção para Resistor AA série - tamanho {size}\n")
-                f.write(f"-- Baseado no datasheet Yageo AA (Automotive Grade)\n")
-                f.write(f"-- Tolerância: 1% (séries E24 e E96)\n\n")
-                f.write(header)
-                f.write(body)
-                f.write("\n")
-            print(f"Arquivo gerado: {output_file} com {len(values_lines)} inserts")
+        name = f"RES_{size}_{res_str}_{tolerance}"
+        description = f"Resistor SMD {size} {res_str} {tolerance} {spec['power']}"
+        value = res_str
+        info1 = tolerance
+        info2 = spec["power"]
 
-        base_counter += 100000
+        rows.append([
+            None, name, description, value, info1, info2,
+            symbol,
+            spec["footprint"],
+            spec["footprint_filter"],
+            datasheet_url,
+            manufacturer,
+            mfg_pn,
+            category,
+            subcategory,
+            size,
+            mount,
+            spec["temp_range"],
+            reach,
+            rohs,
+            unit,
+            tolerance,
+            spec["power"],
+            tcr,
+            res_str,
+            tech_material,
+            NOW,
+            created_by
+        ])
+    return rows
 
-    # -------------------------------------------------------------------------
-    # Série PA (Current Sensor)
-    # -------------------------------------------------------------------------
-    size = "2512"
-    spec = PA_SPECS[size]
-    mypn_counter = base_counter + 1
+def generate_pa_rows(size, spec):
+    """Linhas (na ordem de COLUMNS) da série PA, ainda sem MyPN"""
     resistances = generate_pa_resistances(spec)
 
-    columns = [
-        "MyPN", "Name", "Description", "Value", "Info1", "Info2",
-        "Symbol", "Footprint", "Footprint_Filter", "Datasheet",
-        "Manufacturer", "Manufacturer_PN",
-        "Category", "Subcategory", "Package", "Mount",
-        "Temperature_Range", "REACH_Compliant", "RoHS_Compliant",
-        "Unit", "Tolerance", "Power_Rating", "Temperature_Coefficient",
-        "Resistance", "Technology_Material",
-        "Created_At", "Created_By"
-    ]
-
-    values_lines = []
+    rows = []
     tolerance = "1%"
     manufacturer = "Yageo"
     category = "Resistor"
@@ -370,24 +280,19 @@ def main():
     datasheet_url = "https://yageogroup.com/content/datasheet/asset/file/PYU-PA_E_51_ROHS.pdf"
     symbol = "MyLib_Resistor:RES_US"
 
-    # Mapeamentos conforme datasheet PA
-    tcr_code = {50: "E", 75: "M", 100: "F"}
-    power_taping = {"1W": "07", "2W": "7W", "3W": "7T"}  # 07, 7W, 7T
-
     for res_str, res_ohms in resistances.items():
         for power in spec["powers"]:
             for tcr in spec["tcrs"]:
-                mfg_pn = f"PA{size}F{spec['packaging']}{tcr_code[tcr]}{power_taping[power]}{res_str}E"
+                mfg_pn = YAGEO_PA.encode(size=size, tolerance=tolerance, packaging=spec["packaging"],
+                                         tcr=tcr, power=power, resistance=res_ohms)
                 name = f"RES_PA{size}_{res_str}_{tolerance}_{power}_{tcr}ppm"
                 description = f"Current Sensor Resistor {size} {res_str} {tolerance} {power} {tcr}ppm"
                 value = res_str
                 info1 = tolerance
                 info2 = power
-                mypn = f"EL-RES-{mypn_counter:06d}"
-                mypn_counter += 1
 
-                values = [
-                    mypn, name, description, value, info1, info2,
+                rows.append([
+                    None, name, description, value, info1, info2,
                     symbol,
                     spec["footprint"],
                     spec["footprint_filter"],
@@ -407,37 +312,80 @@ def main():
                     f"±{tcr}ppm/°C",
                     res_str,
                     tech_material,
-                    "datetime('now')",
+                    NOW,
                     created_by
-                ]
+                ])
+    return rows
+
+# =============================================================================
+# GRAVAÇÃO (banco direto ou arquivo .sql)
+# =============================================================================
+def save_rows(rows, table, output_file, comments, loader=None, owned=None):
+    """
+    Com loader grava as linhas direto na tabela do banco; sem loader escreve o
+    arquivo .sql (comentários + INSERT) para colar no DB Browser.
+    owned: MyPN do bloco do gerador (aponta as linhas que sumiram ao mesclar).
+    """
+    if not rows:
+        return
+    if loader is None:
+        write_sql_file(output_file, table, COLUMNS, rows, comments)
+        print(f"Arquivo gerado: {output_file} com {len(rows)} inserts")
+        return
+    loader.store(table, COLUMNS, rows, owned)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera os resistores Yageo AA e PA")
+    add_database_arguments(parser)
+    args = parser.parse_args(argv)
+
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    loader = BulkLoader(args.database, mode_from_args(args)) if args.database else None
+    allocator = MyPNAllocator(loader.conn) if loader is not None else None
+    inicio = time.perf_counter()
 
-                formatted = []
-                for v in values:
-                    if v is None:
-                        formatted.append("NULL")
-                    elif isinstance(v, int):
-                        formatted.append(str(v))
-                    elif v == "datetime('now')":
-                        formatted.append(v)
-                    else:
-                        v_escaped = str(v).replace("'", "''")
-                        formatted.append(f"'{v_escaped}'")
-                values_lines.append("(" + ", ".join(formatted) + ")")
+    try:
+        # Faixa histórica de cada série/tamanho: usada sem banco (.sql) e para
+        # adotar os MyPN já gravados; com banco cada peça mantém o MyPN gravado
+        # (pelo Manufacturer_PN) e o alocador numera só as novas
+        base_counter = 0
 
-    if values_lines:
-        output_file = os.path.join(script_dir, f"insert_resistor_PA_{size}.sql")
-        header = f"INSERT INTO Resistor_{size} ({', '.join(columns)}) VALUES\n"
-        body = ",\n".join(values_lines) + ";"
-        with open(output_file, "w", encoding="utf-8") as f:
-            f.write(f"-- Script de inserção para Resistor PA série - tamanho {size}\n")
-            f.write(f"-- Baseado no datasheet Yageo PA (Current Sensor)\n")
-            f.write(f"-- Tolerância: 1% (valores reais da série)\n\n")
-            f.write(header)
-            f.write(body)
-            f.write("\n")
-        print(f"Arquivo gerado: {output_file} com {len(values_lines)} inserts")
+        # ---------------------------------------------------------------------
+        # Série AA
+        # ---------------------------------------------------------------------
+        for size, spec in AA_SPECS.items():
+            rows = generate_aa_rows(size, spec)
+            block = assign_stable_mypns(allocator, rows, COLUMNS, f"Resistor_{size}", MYPN_PREFIX,
+                                        f"Yageo AA {size}", base_counter + 1)
+            save_rows(rows, f"Resistor_{size}",
+                      os.path.join(script_dir, f"insert_resistor_AA_{size}.sql"),
+                      [f"Script de inserção para Resistor AA série - tamanho {size}",
+                       "Baseado no datasheet Yageo AA (Automotive Grade)",
+                       "Tolerância: 1% (séries E24 e E96)"],
+                      loader, block)
+            base_counter += 100000
 
+        # ---------------------------------------------------------------------
+        # Série PA (Current Sensor)
+        # ---------------------------------------------------------------------
+        size = "2512"
+        rows = generate_pa_rows(size, PA_SPECS[size])
+        block = assign_stable_mypns(allocator, rows, COLUMNS, f"Resistor_{size}", MYPN_PREFIX,
+                                    f"Yageo PA {size}", base_counter + 1)
+        save_rows(rows, f"Resistor_{size}",
+                  os.path.join(script_dir, f"insert_resistor_PA_{size}.sql"),
+                  [f"Script de inserção para Resistor PA série - tamanho {size}",
+                   "Baseado no datasheet Yageo PA (Current Sensor)",
+                   "Tolerância: 1% (valores reais da série)"],
+                  loader, block)
+        if loader is not None:
+            print(f"{sum(loader.stats.values())} linhas gravadas em {time.perf_counter() - inicio:.2f}s")
+            if args.relatorio:
+                print(f"Relatório: {loader.write_report(args.relatorio)} diferenças em {args.relatorio}")
+    finally:
+        if loader is not None:
+            loader.close()
     print("Geração concluída.")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -3,9 +3,9 @@
 -- Para capacitores >= 1µF, TODAS as tensões foram mantidas.
 
 INSERT INTO Capacitor_0603 (MyPN, Name, Description, Value, Info1, Info2, Symbol, Footprint, Footprint_Filter, Datasheet, Manufacturer, Manufacturer_PN, Category, Subcategory, Package, Mount, Temperature_Range, REACH_Compliant, RoHS_Compliant, Unit, Tolerance, Voltage_Rating, Temperature_Coefficient, Capacitance, Dielectric_Type, Created_At, Created_By) VALUES
-('EL-CAP-100001', 'CAP_0603_0p2F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 0p2F 1% 50V C0G', '0p2', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB0R22', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p2', 'C0G', datetime('now'), 'Rogerio Fontanario'),
-('EL-CAP-100002', 'CAP_0603_0p5F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 0p5F 1% 50V C0G', '0p5', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB0R47', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p5', 'C0G', datetime('now'), 'Rogerio Fontanario'),
-('EL-CAP-100003', 'CAP_0603_0p8F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 0p8F 1% 50V C0G', '0p8', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB0R82', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p8', 'C0G', datetime('now'), 'Rogerio Fontanario'),
+('EL-CAP-100001', 'CAP_0603_0p22F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 0p22F 1% 50V C0G', '0p22', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB0R22', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p22', 'C0G', datetime('now'), 'Rogerio Fontanario'),
+('EL-CAP-100002', 'CAP_0603_0p47F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 0p47F 1% 50V C0G', '0p47', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB0R47', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p47', 'C0G', datetime('now'), 'Rogerio Fontanario'),
+('EL-CAP-100003', 'CAP_0603_0p82F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 0p82F 1% 50V C0G', '0p82', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB0R82', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p82', 'C0G', datetime('now'), 'Rogerio Fontanario'),
 ('EL-CAP-100004', 'CAP_0603_1pF_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 1pF 1% 50V C0G', '1p', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB1R0', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '1p', 'C0G', datetime('now'), 'Rogerio Fontanario'),
 ('EL-CAP-100005', 'CAP_0603_1p2F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 1p2F 1% 50V C0G', '1p2', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB1R2', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '1p2', 'C0G', datetime('now'), 'Rogerio Fontanario'),
 ('EL-CAP-100006', 'CAP_0603_1p5F_1%_C0G_50V', 'Capacitor Ceramic SMD 0603 1p5F 1% 50V C0G', '1p5', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0603_1608Metric', 'C_0603*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0603FRNPO9BB1R5', 'Capacitor', 'Ceramic', '0603', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '1p5', 'C0G', datetime('now'), 'Rogerio Fontanario'),
@@ -3,9 +3,9 @@
 -- Para capacitores >= 1µF, TODAS as tensões foram mantidas.
 
 INSERT INTO Capacitor_0805 (MyPN, Name, Description, Value, Info1, Info2, Symbol, Footprint, Footprint_Filter, Datasheet, Manufacturer, Manufacturer_PN, Category, Subcategory, Package, Mount, Temperature_Range, REACH_Compliant, RoHS_Compliant, Unit, Tolerance, Voltage_Rating, Temperature_Coefficient, Capacitance, Dielectric_Type, Created_At, Created_By) VALUES
-('EL-CAP-200001', 'CAP_0805_0p2F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 0p2F 1% 50V C0G', '0p2', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB0R22', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p2', 'C0G', datetime('now'), 'Rogerio Fontanario'),
-('EL-CAP-200002', 'CAP_0805_0p5F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 0p5F 1% 50V C0G', '0p5', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB0R47', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p5', 'C0G', datetime('now'), 'Rogerio Fontanario'),
-('EL-CAP-200003', 'CAP_0805_0p8F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 0p8F 1% 50V C0G', '0p8', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB0R82', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p8', 'C0G', datetime('now'), 'Rogerio Fontanario'),
+('EL-CAP-200001', 'CAP_0805_0p22F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 0p22F 1% 50V C0G', '0p22', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB0R22', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p22', 'C0G', datetime('now'), 'Rogerio Fontanario'),
+('EL-CAP-200002', 'CAP_0805_0p47F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 0p47F 1% 50V C0G', '0p47', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB0R47', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p47', 'C0G', datetime('now'), 'Rogerio Fontanario'),
+('EL-CAP-200003', 'CAP_0805_0p82F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 0p82F 1% 50V C0G', '0p82', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB0R82', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '0p82', 'C0G', datetime('now'), 'Rogerio Fontanario'),
 ('EL-CAP-200004', 'CAP_0805_1pF_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 1pF 1% 50V C0G', '1p', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB1R0', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '1p', 'C0G', datetime('now'), 'Rogerio Fontanario'),
 ('EL-CAP-200005', 'CAP_0805_1p2F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 1p2F 1% 50V C0G', '1p2', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB1R2', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '1p2', 'C0G', datetime('now'), 'Rogerio Fontanario'),
 ('EL-CAP-200006', 'CAP_0805_1p5F_1%_C0G_50V', 'Capacitor Ceramic SMD 0805 1p5F 1% 50V C0G', '1p5', '50V', '1%C0G', 'MyLib_Capacitor:CAP_US', 'MyLib_Capacitor_SMD:C_0805_2012Metric', 'C_0805*', 'https://octopart.com/datasheet/yageo-group/CC0603JRNPO9BN100', 'Yageo', 'CC0805FRNPO9BB1R5', 'Capacitor', 'Ceramic', '0805', 'SMD', '-55°C ~ 125°C', 'Yes', 'Yes', 'Farad', '1%', '50V', '±30ppm/°C', '1p5', 'C0G', datetime('now'), 'Rogerio Fontanario'),
@@ -1,6 +1,13 @@
 import csv
 import os
 import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'Common'))
+from Bulk_Loader import BulkLoader, add_database_arguments, mode_from_args, write_insert_sql
+from MyPN_Allocator import MyPNAllocator, assign_stable_mypns
 
 # Mapeamento dos arquivos para os nomes das tabelas e prefixos
 ARQUIVOS = [
@@ -20,12 +27,11 @@ COLUNAS_FIXAS = [
 # Coluna Info1 só será incluída para Oscillator
 COLUNAS_OSC = COLUNAS_FIXAS + ['Info1']
 
-def escape_sql(valor):
-    """Escapa aspas simples e trata nulos."""
+def valor_ou_nulo(valor):
+    """Texto vazio vira NULL no banco."""
     if valor is None or valor == '':
-        return 'NULL'
-    # Substitui aspas simples por duas aspas simples
-    return "'" + str(valor).replace("'", "''") + "'"
+        return None
+    return valor
 
 def extrair_frequencia(texto):
     """Extrai frequência (ex: 10MHz, 32.768kHz) do texto."""
@@ -39,7 +45,7 @@ def extrair_frequencia(texto):
     return None
 
 def processar_arquivo(caminho, tabela, prefixo):
-    """Lê o CSV e retorna uma lista de tuplas com os valores para INSERT."""
+    """Lê o CSV e retorna uma lista de tuplas (colunas, valores) para o INSERT."""
     dados = []
     try:
         with open(caminho, mode='r', encoding='utf-8-sig') as f:
@@ -49,9 +55,9 @@ def processar_arquivo(caminho, tabela, prefixo):
             if not expected.issubset(reader.fieldnames):
                 print(f"Aviso: {caminho} não contém todas as colunas esperadas. Colunas encontradas: {reader.fieldnames}")
 
-            for i, row in enumerate(reader, start=1):
-                # Gerar MyPN sequencial com 6 dígitos
-                mypn = f"EL-{prefixo}-{i:06d}"
+            for row in reader:
+                # MyPN é atribuído depois, pelo alocador (ou faixa histórica)
+                mypn = None
 
                 # Campos base
                 name = row.get('Value', '')
@@ -63,19 +69,19 @@ def processar_arquivo(caminho, tabela, prefixo):
                 datasheet = row.get('Datasheet', '')
                 notes = row.get('Tags', '')
 
-                # Escapar todos os textos
+                # Textos vazios viram NULL
                 valores = [
-                    escape_sql(mypn),
-                    escape_sql(name),
-                    escape_sql(description),
-                    escape_sql(value),
-                    escape_sql(symbol),
-                    escape_sql(footprint),
-                    escape_sql(footprint_filter),
-                    escape_sql(datasheet),
-                    escape_sql(notes),
-                    '1',  # Active
-                    '1'   # Version
+                    valor_ou_nulo(mypn),
+                    valor_ou_nulo(name),
+                    valor_ou_nulo(description),
+                    valor_ou_nulo(value),
+                    valor_ou_nulo(symbol),
+                    valor_ou_nulo(footprint),
+                    valor_ou_nulo(footprint_filter),
+                    valor_ou_nulo(datasheet),
+                    valor_ou_nulo(notes),
+                    1,  # Active
+                    1   # Version
                 ]
 
                 # Se for Oscillator, extrair Info1
@@ -84,8 +90,7 @@ def processar_arquivo(caminho, tabela, prefixo):
                     freq = extrair_frequencia(description)
                     if not freq:
                         freq = extrair_frequencia(value)
-                    info1 = escape_sql(freq) if freq else 'NULL'
-                    valores.append(info1)
+                    valores.append(valor_ou_nulo(freq))
                     colunas = COLUNAS_OSC
                 else:
                     colunas = COLUNAS_FIXAS
@@ -112,6 +117,33 @@ def localizar_arquivo(nome_arquivo):
         return os.path.abspath(caminho_script)
     return None
 
+def registros_por_tabela(allocator=None):
+    """
+    Gera (tabela, colunas, linhas, bloco de MyPN) para cada CSV de ARQUIVOS encontrado.
+    Com allocator cada linha mantém o MyPN já gravado para o mesmo símbolo e
+    as novas recebem números do banco; sem ele são EL-{prefixo}-000001 em diante.
+    """
+    for nome_arquivo, tabela, prefixo in ARQUIVOS:
+        caminho_csv = localizar_arquivo(nome_arquivo)
+        if caminho_csv is None:
+            print(f"Arquivo não encontrado: {nome_arquivo} (procurou no diretório atual e no diretório do script)")
+            continue
+
+        print(f"Processando {caminho_csv} -> tabela {tabela}")
+        registros = processar_arquivo(caminho_csv, tabela, prefixo)
+
+        if not registros:
+            print(f"Nenhum registro válido em {nome_arquivo}")
+            continue
+
+        # Pega as colunas do primeiro registro (todas iguais)
+        colunas = registros[0][0]
+        linhas = [vals for _, vals in registros]
+        # Sem Manufacturer_PN nestes CSVs: a peça é identificada pelo símbolo
+        bloco = assign_stable_mypns(allocator, linhas, colunas, tabela, f"EL-{prefixo}-", nome_arquivo, 1,
+                                    key='Symbol')
+        yield tabela, colunas, linhas, bloco
+
 def gerar_sql(arquivo_saida='insert_components.sql'):
     """
     Gera o arquivo SQL no mesmo diretório do script (ou onde os CSVs estão).
@@ -127,36 +159,34 @@ def gerar_sql(arquivo_saida='insert_components.sql'):
         caminho_saida = arquivo_saida
 
     with open(caminho_saida, 'w', encoding='utf-8') as out:
-        for nome_arquivo, tabela, prefixo in ARQUIVOS:
-            caminho_csv = localizar_arquivo(nome_arquivo)
-            if caminho_csv is None:
-                print(f"Arquivo não encontrado: {nome_arquivo} (procurou no diretório atual e no diretório do script)")
-                continue
-
-            print(f"Processando {caminho_csv} -> tabela {tabela}")
-            registros = processar_arquivo(caminho_csv, tabela, prefixo)
-
-            if not registros:
-                print(f"Nenhum registro válido em {nome_arquivo}")
-                continue
-
-            # Pega as colunas do primeiro registro (todas iguais)
-            colunas, primeiro = registros[0]
-            colunas_str = ', '.join(colunas)
-
-            # Escreve o cabeçalho do INSERT
-            out.write(f"INSERT INTO {tabela} ({colunas_str}) VALUES\n")
-
-            # Escreve as linhas de valores
-            linhas_valores = []
-            for _, vals in registros:
-                linha = '(' + ', '.join(vals) + ')'
-                linhas_valores.append(linha)
-
-            out.write(',\n'.join(linhas_valores))
-            out.write(';\n\n')
+        for tabela, colunas, linhas, _ in registros_por_tabela():
+            write_insert_sql(out, tabela, colunas, linhas)
+            out.write('\n')
 
         print(f"Arquivo SQL gerado em: {caminho_saida}")
 
+def gravar_banco(caminho_banco, modo='insert', relatorio=None):
+    """
+    Grava os registros direto nas tabelas do banco, uma transação por tabela,
+    sem passar por arquivo .sql. modo: 'insert', 'replace' ou 'merge'
+    (só grava o que mudou; relatorio recebe o CSV das diferenças).
+    """
+    inicio = time.perf_counter()
+    with BulkLoader(caminho_banco, modo) as loader:
+        allocator = MyPNAllocator(loader.conn)
+        for tabela, colunas, linhas, bloco in registros_por_tabela(allocator):
+            loader.store(tabela, colunas, linhas, bloco)
+        total = sum(loader.stats.values())
+        if relatorio:
+            print(f"Relatório: {loader.write_report(relatorio)} diferenças em {relatorio}")
+    print(f"{total} linhas gravadas em {time.perf_counter() - inicio:.2f}s")
+    return total
+
 if __name__ == '__main__':
-    gerar_sql()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Gera Filter, Oscillator, Mechanical e Switch a partir dos CSVs")
+    add_database_arguments(parser)
+    args = parser.parse_args()
+    if args.database:
+        gravar_banco(args.database, mode_from_args(args), args.relatorio)
+    else:
+        gerar_sql()
@@ -1,5 +1,7 @@
 import os
 
+from Index_Advisor import plan_indexes
+
 def main():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     tables_file = os.path.join(script_dir, "Tables_names.txt")
@@ -194,11 +196,8 @@ def main():
         "Plate_Voltage_Max TEXT"
     ]
 
-    # Índices base (sem o nome da tabela)
-    base_indexes = [
-        ("idx_my_pn", "MyPN"),
-        ("idx_name", "Name"),
-    ]
+    # Nomes das colunas (para o plano de índices)
+    column_names = [col.split()[0] for col in columns]
 
     output_file = os.path.join(script_dir, "create_tables.sqlite")
 
@@ -214,10 +213,9 @@ def main():
                 out.write(f"    {col}{comma}\n")
             out.write(");\n\n")
 
-            # Cria os índices com nomes únicos (incluindo o nome da tabela)
-            for base_name, col in base_indexes:
-                index_name = f"{base_name}_{table}"
-                out.write(f"CREATE INDEX {index_name} ON {table} ({col});\n")
+            # Cria os índices do plano (Index_Advisor.py); MyPN já tem o índice do UNIQUE
+            for index_name, index_columns in plan_indexes(table, column_names):
+                out.write(f"CREATE INDEX {index_name} ON {table} ({', '.join(index_columns)});\n")
             out.write("\n")
 
     print(f"Arquivo gerado com sucesso: {output_file}")
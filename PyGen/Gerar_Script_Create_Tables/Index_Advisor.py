@@ -0,0 +1,342 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Planejamento de índices das tabelas de componentes
+Arquivo: PyGen/Gerar_Script_Create_Tables/Index_Advisor.py
+
+plan_indexes() é a etapa de índices dos geradores de DDL
+(Gerar_Script_Create_Tables*.py):
+    - não cria índice em MyPN: a coluna é UNIQUE e o SQLite já mantém um
+      índice para isso, um segundo só deixa as gravações mais lentas
+    - índices cobrindo os campos visible_in_chooser do .kicad_dbl
+      (Value, Info1, Info2 por padrão) + MyPN
+    - índices para os filtros das ferramentas: Footprint, Manufacturer_PN,
+      Category/Subcategory (todos terminando em MyPN, para cobrir a consulta)
+
+No banco já existente:
+    python Index_Advisor.py --db banco.sqlite plan [--aplicar] [--dbl arquivo.kicad_dbl]
+        mostra (e com --aplicar executa) os DROP dos índices redundantes e os
+        CREATE dos índices planejados que faltam
+    python Index_Advisor.py --db banco.sqlite replay consultas.log
+        roda as consultas de um log (SELECT/WITH) numa cópia em memória do
+        banco, sugere índices para as que leem a tabela inteira (SCAN) e
+        mostra o tempo antes/depois de cada índice sugerido
+
+O log é o texto das consultas, uma por linha ou terminadas em ';', como o
+gerado por enable_query_log(conn, arquivo) (sqlite3 set_trace_callback) ou
+pelo .trace do sqlite3 de linha de comando.
+"""
+
+import re
+import sys
+import json
+import time
+import sqlite3
+import argparse
+from collections import Counter
+from pathlib import Path
+
+# Campos visible_in_chooser do Setup_Database_Generator (usados sem --dbl)
+CHOOSER_FIELDS = ('Value', 'Info1', 'Info2')
+
+# Índices dos filtros das ferramentas: (nome base, colunas); MyPN é acrescentado
+FILTER_INDEXES = [
+    ('idx_name', ('Name',)),
+    ('idx_footprint', ('Footprint',)),
+    ('idx_mpn', ('Manufacturer_PN',)),
+    ('idx_category', ('Category', 'Subcategory')),
+]
+
+KEY_COLUMN = 'MyPN'
+
+# Ganho mínimo (fração do tempo original) para o replay sugerir um índice
+MIN_GAIN = 0.2
+
+# Repetições de cada consulta no replay (vale o menor tempo)
+REPEAT = 5
+
+READ_ONLY = re.compile(r'\s*(SELECT|WITH)\b', re.I)
+_FROM = re.compile(r'\b(?:FROM|JOIN)\s+"?(\w+)"?(?:\s+(?:AS\s+)?(?!WHERE|JOIN|ON|LEFT|INNER|CROSS|ORDER|GROUP|LIMIT|USING)(\w+))?', re.I)
+_PREDICATE = re.compile(r'(?:"?(\w+)"?\.)?"?(\w+)"?\s*(==|=|\bIS\b|\bIN\b|>=|<=|>|<|\bBETWEEN\b|\bLIKE\b|\bGLOB\b)', re.I)
+_SCAN = re.compile(r'^SCAN (\w+)(?! VIRTUAL)')
+_EQUALITY = {'=', '==', 'IS', 'IN'}
+
+
+def chooser_fields(dbl_path=None):
+    """Campos visible_in_chooser do .kicad_dbl (união de todas as bibliotecas)"""
+    if not dbl_path:
+        return CHOOSER_FIELDS
+    with open(dbl_path, encoding='utf-8') as f:
+        config = json.load(f)
+    fields = []
+    for library in config.get('libraries', []):
+        for field in library.get('fields', []):
+            if field.get('visible_in_chooser') and field['column'] not in fields:
+                fields.append(field['column'])
+    return tuple(fields) or CHOOSER_FIELDS
+
+
+def plan_indexes(table, columns, chooser=CHOOSER_FIELDS):
+    """
+    Índices planejados para uma tabela: lista de (nome, colunas).
+    Só entram colunas que existem na tabela; nenhum índice começa em MyPN.
+    """
+    present = set(columns)
+    plan = []
+    chooser = tuple(c for c in chooser if c in present and c != KEY_COLUMN)
+    if chooser:
+        plan.append((f"idx_chooser_{table}", chooser + (KEY_COLUMN,)))
+    for base, index_columns in FILTER_INDEXES:
+        index_columns = tuple(c for c in index_columns if c in present)
+        if index_columns:
+            plan.append((f"{base}_{table}", index_columns + (KEY_COLUMN,)))
+    return plan
+
+
+def create_index_sql(table, name, columns):
+    quoted = ', '.join(f'"{c}"' for c in columns)
+    return f'CREATE INDEX IF NOT EXISTS "{name}" ON "{table}" ({quoted})'
+
+
+# =============================================================================
+# BANCO EXISTENTE
+# =============================================================================
+def table_columns(conn, table):
+    return [row[1] for row in conn.execute("SELECT * FROM pragma_table_info(?)", (table,))]
+
+
+def part_tables(conn):
+    """Tabelas com MyPN (as de componentes; All_Parts e MyPN_* ficam de fora)"""
+    return [name for (name,) in conn.execute(
+        "SELECT DISTINCT m.name FROM sqlite_master m JOIN pragma_table_info(m.name) p "
+        "WHERE m.type = 'table' AND p.name = ? AND m.name NOT LIKE 'All\\_Parts%' ESCAPE '\\' "
+        "ORDER BY m.name", (KEY_COLUMN,))]
+
+
+def existing_indexes(conn, table):
+    """{nome: (colunas, unique, origem)}; origem 'c' = CREATE INDEX, 'u'/'pk' = restrição"""
+    indexes = {}
+    for _, name, unique, origin, _ in conn.execute(f'PRAGMA index_list("{table}")'):
+        columns = tuple(row[2] for row in conn.execute(f'PRAGMA index_info("{name}")'))
+        indexes[name] = (columns, bool(unique), origin)
+    return indexes
+
+
+def redundant_indexes(indexes):
+    """
+    Índices criados à mão (origem 'c', não UNIQUE) cujas colunas são o começo
+    de outro índice: o outro já atende as mesmas buscas. Lista de (nome, o outro).
+    """
+    redundant = []
+    for name, (columns, unique, origin) in sorted(indexes.items()):
+        if origin != 'c' or unique or None in columns:
+            continue
+        for other, (other_columns, _, _) in sorted(indexes.items()):
+            if other == name or other_columns[:len(columns)] != columns:
+                continue
+            # Dois iguais: fica o de restrição ou o de menor nome
+            if other_columns == columns and indexes[other][2] == 'c' and other > name:
+                continue
+            redundant.append((name, other))
+            break
+    return redundant
+
+
+def plan_database(conn, chooser=CHOOSER_FIELDS):
+    """
+    Comparação do banco com o plano: lista de (tabela, sql, motivo).
+    DROP dos redundantes primeiro, depois os CREATE que faltam.
+    """
+    statements = []
+    for table in part_tables(conn):
+        indexes = existing_indexes(conn, table)
+        dropped = set()
+        for name, covered_by in redundant_indexes(indexes):
+            statements.append((table, f'DROP INDEX "{name}"', f"coberto por {covered_by}"))
+            dropped.add(name)
+        existing = {columns for name, (columns, _, _) in indexes.items() if name not in dropped}
+        for name, columns in plan_indexes(table, table_columns(conn, table), chooser):
+            if any(have[:len(columns)] == columns for have in existing):
+                continue
+            if name in indexes and name not in dropped:
+                # Nome do plano já usado com outras colunas: recria
+                statements.append((table, f'DROP INDEX "{name}"', "colunas fora do plano"))
+            statements.append((table, create_index_sql(table, name, columns), "planejado"))
+    return statements
+
+
+# =============================================================================
+# REPLAY DE LOG DE CONSULTAS
+# =============================================================================
+def enable_query_log(conn, path):
+    """Grava em path cada comando executado por conn (uma linha por comando)"""
+    log = open(path, 'a', encoding='utf-8')
+    conn.set_trace_callback(lambda sql: log.write(' '.join(sql.split()) + ';\n') or log.flush())
+    return log
+
+
+def read_query_log(path):
+    """Comandos do log, na ordem (multilinha se terminam em ';', senão um por linha)"""
+    with open(path, encoding='utf-8') as f:
+        lines = [line for line in f.read().splitlines() if line.strip() and not line.lstrip().startswith('--')]
+    if not any(line.rstrip().endswith(';') for line in lines):
+        return [line.strip() for line in lines]
+    statements = []
+    buffer = ''
+    for line in lines:
+        buffer += line + '\n'
+        if sqlite3.complete_statement(buffer):
+            statements.append(buffer.strip().rstrip(';').strip())
+            buffer = ''
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def time_query(conn, sql, repeat=REPEAT):
+    """Menor tempo (ms) de repeat execuções da consulta"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def scanned_tables(conn, sql):
+    """Tabelas lidas inteiras (SCAN sem índice) pelo plano da consulta"""
+    aliases = {}
+    for table, alias in _FROM.findall(sql):
+        aliases[table] = table
+        if alias:
+            aliases[alias] = table
+    scanned = []
+    for row in conn.execute("EXPLAIN QUERY PLAN " + sql):
+        match = _SCAN.match(row[3])
+        if match and not row[3].startswith(f"SCAN {match.group(1)} USING"):
+            table = aliases.get(match.group(1), match.group(1))
+            if table not in scanned:
+                scanned.append(table)
+    return scanned
+
+
+def candidate_index(conn, sql, table):
+    """
+    Índice sugerido para a consulta na tabela: colunas com igualdade primeiro,
+    depois uma coluna de faixa (a ordem em que o SQLite consegue usá-las).
+    None se a consulta não filtra nenhuma coluna da tabela.
+    """
+    columns = set(table_columns(conn, table))
+    where = re.split(r'\bWHERE\b', sql, maxsplit=1, flags=re.I)
+    if len(where) < 2:
+        return None
+    equality, ranges = [], []
+    for _, column, operator in _PREDICATE.findall(where[1]):
+        if column not in columns:
+            continue
+        target = equality if operator.upper() in _EQUALITY else ranges
+        if column not in equality and column not in ranges:
+            target.append(column)
+    index_columns = tuple(equality + ranges[:1])
+    return index_columns or None
+
+
+def replay(db_path, statements, min_gain=MIN_GAIN, repeat=REPEAT):
+    """
+    Roda as consultas só-leitura numa cópia em memória do banco e avalia um
+    índice candidato por (tabela, colunas). Retorna lista de dicts com
+    tabela, colunas, sql, consultas, vezes, antes_ms, depois_ms, aceito.
+    """
+    # URI montada pelo pathlib: espaços, '#' e '?' no caminho ficam escapados
+    source = sqlite3.connect(Path(db_path).resolve().as_uri() + "?mode=ro", uri=True)
+    conn = sqlite3.connect(":memory:")
+    source.backup(conn)
+    source.close()
+
+    counts = Counter(s for s in statements if READ_ONLY.match(s))
+    candidates = {}
+    for sql in counts:
+        try:
+            scanned = scanned_tables(conn, sql)
+        except sqlite3.Error as e:
+            print(f"⚠️ Consulta ignorada ({e}): {sql[:80]}")
+            continue
+        for table in scanned:
+            columns = candidate_index(conn, sql, table)
+            if columns:
+                candidates.setdefault((table, columns), []).append(sql)
+
+    results = []
+    for (table, columns), queries in candidates.items():
+        before = {sql: time_query(conn, sql, repeat) for sql in queries}
+        name = f"idx_advisor_{table}_{'_'.join(columns)}"
+        conn.execute(create_index_sql(table, name, columns))
+        after = {sql: time_query(conn, sql, repeat) for sql in queries}
+        conn.execute(f'DROP INDEX "{name}"')
+
+        total_before = sum(before[sql] * counts[sql] for sql in queries)
+        total_after = sum(after[sql] * counts[sql] for sql in queries)
+        accepted = total_before > 0 and (total_before - total_after) / total_before >= min_gain
+        results.append({
+            'tabela': table,
+            'colunas': columns,
+            'sql': create_index_sql(table, name, columns),
+            'consultas': len(queries),
+            'vezes': sum(counts[sql] for sql in queries),
+            'antes_ms': total_before,
+            'depois_ms': total_after,
+            'aceito': accepted,
+        })
+    conn.close()
+    results.sort(key=lambda r: r['antes_ms'] - r['depois_ms'], reverse=True)
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Planeja índices e avalia índices com um log de consultas")
+    parser.add_argument("--db", required=True, help="Banco da biblioteca")
+    sub = parser.add_subparsers(dest="command", required=True)
+    plan = sub.add_parser("plan", help="Compara os índices do banco com o plano")
+    plan.add_argument("--dbl", help=".kicad_dbl de onde ler os campos visible_in_chooser")
+    plan.add_argument("--aplicar", action="store_true", help="Executa os DROP/CREATE")
+    replay_parser = sub.add_parser("replay", help="Sugere índices a partir de um log de consultas")
+    replay_parser.add_argument("log", help="Arquivo com as consultas")
+    replay_parser.add_argument("--ganho-minimo", type=float, default=MIN_GAIN,
+                               help="Fração mínima de tempo economizado para sugerir (padrão 0.2)")
+    args = parser.parse_args(argv)
+
+    if args.command == "plan":
+        conn = sqlite3.connect(args.db, isolation_level=None)
+        statements = plan_database(conn, chooser_fields(args.dbl))
+        for table, sql, reason in statements:
+            print(f"{sql};  -- {reason}")
+        if not statements:
+            print("✅ Índices de acordo com o plano")
+        elif args.aplicar:
+            conn.execute("BEGIN")
+            for _, sql, _ in statements:
+                conn.execute(sql)
+            conn.execute("COMMIT")
+            conn.execute("ANALYZE")
+            print(f"✅ {len(statements)} comandos aplicados")
+        conn.close()
+        return 0
+
+    statements = read_query_log(args.log)
+    results = replay(args.db, statements, args.ganho_minimo)
+    print(f"{len(statements)} comandos no log, {len(results)} índices candidatos")
+    for r in results:
+        mark = "✅" if r['aceito'] else "  "
+        print(f"{mark} {r['antes_ms']:9.2f} ms -> {r['depois_ms']:9.2f} ms  "
+              f"({r['consultas']} consultas, {r['vezes']}x)  {r['tabela']}({', '.join(r['colunas'])})")
+    accepted = [r['sql'] for r in results if r['aceito']]
+    if accepted:
+        print("\nSugestão:")
+        for sql in accepted:
+            print(f"{sql};")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -2,16 +2,67 @@
 """
 Setup_Database_Generator.py
 Generates .kicad_dbl files by reading all tables from MyKiCadDatabase.sqlite
+
+Usage:
+    python Setup_Database_Generator.py                  # full rebuild, timestamped file
+    python Setup_Database_Generator.py --incremental    # update MyKiCadLibDatabase_Setup.kicad_dbl in place
+    python Setup_Database_Generator.py --watch          # keep updating it while the database changes
 """
 
+import argparse
+import hashlib
 import json
 import sqlite3
 import os
 import sys
 import re
-from typing import Dict, List, Any, Optional, Tuple
+import tempfile
+import time
+from typing import Dict, List, Any, Optional, Tuple, NamedTuple
 from datetime import datetime
 
+
+class ColumnSchema(NamedTuple):
+    """Immutable description of a single table column (one PRAGMA table_info row)"""
+    cid: int
+    name: str
+    type: str
+    notnull: bool
+    default: Optional[str]
+    pk: int
+
+
+class TableSchema(NamedTuple):
+    """Immutable description of a table and its columns, in declaration order"""
+    name: str
+    columns: Tuple[ColumnSchema, ...]
+
+    @property
+    def column_names(self) -> List[str]:
+        return [column.name for column in self.columns]
+
+    @property
+    def fingerprint(self) -> str:
+        """Hash of the column names, order and declared types"""
+        signature = json.dumps([[column.name, column.type] for column in self.columns])
+        return hashlib.sha1(signature.encode('utf-8')).hexdigest()
+
+
+class DatabaseSchema(NamedTuple):
+    """Immutable snapshot of every user table in the database, sorted by name"""
+    db_path: str
+    tables: Tuple[TableSchema, ...]
+
+    def table_names(self) -> List[str]:
+        return [table.name for table in self.tables]
+
+    def get_table(self, table_name: str) -> Optional[TableSchema]:
+        for table in self.tables:
+            if table.name == table_name:
+                return table
+        return None
+
+
 class KiCadDBLGeneratorFromDB:
     """Generator for KiCad database library (.kicad_dbl) files from SQLite database"""
     
@@ -26,6 +77,17 @@ class KiCadDBLGeneratorFromDB:
     # Tables to exclude from the library (system tables)
     EXCLUDE_TABLES = ['sqlite_sequence', 'sqlite_master', 'sqlite_temp_master']
     
+    # Internal tables kept by the PyGen/Common tools (All_Parts + its FTS5
+    # shadow tables, MyPN allocator); they are not part libraries
+    EXCLUDE_TABLE_PREFIXES = ['All_Parts', 'MyPN_']
+    
+    # Internal columns kept by the PyGen/Common tools (Parametric.SHADOW_SUFFIX:
+    # numeric SI shadows of parameter columns); they are not KiCad fields
+    EXCLUDE_COLUMN_SUFFIXES = ['_SI']
+    
+    # Bump when the field/library rules change, so incremental runs rebuild everything
+    FINGERPRINT_VERSION = 2
+    
     def __init__(self, db_path: str, library_name: str = "My KiCad Database", 
                  description: str = "A database of electronic components for KiCAD"):
         """
@@ -44,42 +106,103 @@ class KiCadDBLGeneratorFromDB:
         # Verify database exists
         if not os.path.exists(self.db_path):
             raise FileNotFoundError(f"Database file not found: {self.db_path}")
+        
+        # Shared connection and cached schema snapshot (see read_schema)
+        self._conn: Optional[sqlite3.Connection] = None
+        self._schema: Optional[DatabaseSchema] = None
     
-    def get_all_tables(self) -> List[Tuple[str, List[str]]]:
+    def connect(self) -> sqlite3.Connection:
         """
-        Get all tables from the SQLite database
+        Return the shared SQLite connection, opening it on first use
         
+        Every read done by the generator goes through this single connection,
+        so a full regeneration pays for exactly one open/close cycle.
+        """
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.db_path)
+        return self._conn
+    
+    def close(self) -> None:
+        """Close the shared connection (it is reopened on demand)"""
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    def read_schema(self, refresh: bool = False) -> DatabaseSchema:
+        """
+        Read the schema of all user tables with a single joined query
+        
+        sqlite_master is joined with the pragma_table_info() table-valued
+        function, so all tables and all of their columns come back in one
+        round trip. The result is cached; pass refresh=True to re-read it.
+        
+        Args:
+            refresh: Ignore the cached snapshot and query the database again
+            
         Returns:
-            List of tuples (table_name, list_of_columns)
+            Immutable DatabaseSchema snapshot
         """
+        if self._schema is not None and not refresh:
+            return self._schema
+        
+        placeholders = ','.join(['?'] * len(self.EXCLUDE_TABLES))
+        prefix_filter = ''.join(" AND substr(m.name, 1, ?) <> ?" for _ in self.EXCLUDE_TABLE_PREFIXES)
+        prefix_params = [value for prefix in self.EXCLUDE_TABLE_PREFIXES for value in (len(prefix), prefix)]
+        query = f"""
+            SELECT m.name, p.cid, p.name, p.type, p."notnull", p.dflt_value, p.pk
+            FROM sqlite_master AS m
+            JOIN pragma_table_info(m.name) AS p
+            WHERE m.type='table' AND m.name NOT IN ({placeholders}){prefix_filter}
+            ORDER BY m.name, p.cid
+        """
+        
+        try:
+            rows = self.connect().execute(query, self.EXCLUDE_TABLES + prefix_params).fetchall()
+        except sqlite3.Error as e:
+            raise Exception(f"Error reading database: {e}")
+        
         tables = []
+        current_name = None
+        current_columns = []
+        for table_name, cid, name, col_type, notnull, default, pk in rows:
+            if table_name != current_name:
+                if current_name is not None:
+                    tables.append(TableSchema(current_name, tuple(current_columns)))
+                current_name = table_name
+                current_columns = []
+            current_columns.append(ColumnSchema(cid, name, col_type, bool(notnull), default, pk))
+        if current_name is not None:
+            tables.append(TableSchema(current_name, tuple(current_columns)))
+        
+        self._schema = DatabaseSchema(self.db_path, tuple(tables))
+        return self._schema
+    
+    def get_schema_version(self) -> int:
+        """
+        Return SQLite's schema cookie, which changes on every CREATE/ALTER/DROP
         
+        Used by the incremental mode to skip introspection entirely when the
+        schema has not been touched since the last run.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            
-            # Get all table names
-            placeholders = ','.join(['?'] * len(self.EXCLUDE_TABLES))
-            cursor.execute(f"""
-                SELECT name FROM sqlite_master 
-                WHERE type='table' AND name NOT IN ({placeholders})
-                ORDER BY name
-            """, self.EXCLUDE_TABLES)
-            
-            table_names = [row[0] for row in cursor.fetchall()]
-            
-            # Get columns for each table
-            for table_name in table_names:
-                cursor.execute(f"PRAGMA table_info({table_name})")
-                columns = [row[1] for row in cursor.fetchall()]  # column name is at index 1
-                tables.append((table_name, columns))
-            
-            conn.close()
-            
+            return self.connect().execute("PRAGMA schema_version").fetchone()[0]
         except sqlite3.Error as e:
             raise Exception(f"Error reading database: {e}")
+    
+    def get_all_tables(self) -> List[Tuple[str, List[str]]]:
+        """
+        Get all tables from the SQLite database
         
-        return tables
+        Returns:
+            List of tuples (table_name, list_of_columns)
+        """
+        return [(table.name, table.column_names) for table in self.read_schema().tables]
     
     def get_table_preview(self, table_name: str, limit: int = 1) -> Optional[Dict[str, Any]]:
         """
@@ -93,17 +216,11 @@ class KiCadDBLGeneratorFromDB:
             First row of data or None if table is empty
         """
         try:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-            
-            cursor.execute(f"SELECT * FROM {table_name} LIMIT {limit}")
+            cursor = self.connect().execute(f'SELECT * FROM "{table_name}" LIMIT {int(limit)}')
             row = cursor.fetchone()
             
-            conn.close()
-            
             if row:
-                return dict(row)
+                return {description[0]: value for description, value in zip(cursor.description, row)}
             return None
             
         except sqlite3.Error:
@@ -123,23 +240,22 @@ class KiCadDBLGeneratorFromDB:
         # Just remove quotes if present, keep everything else
         return table_name.strip('"')
     
-    def generate_field_configs(self, table_name: str, columns: List[str]) -> List[Dict[str, Any]]:
+    def generate_field_configs(self, table: TableSchema) -> List[Dict[str, Any]]:
         """
         Generate field configurations for all columns
         
         Args:
-            table_name: Name of the table
-            columns: List of column names
+            table: Schema of the table
             
         Returns:
             List of field configuration dictionaries
         """
         fields = []
         
-        # Get preview data (optional, not used for inherit_properties anymore)
-        preview_data = self.get_table_preview(table_name)
-        
-        for column in columns:
+        for column in table.column_names:
+            if column.endswith(tuple(self.EXCLUDE_COLUMN_SUFFIXES)):
+                continue
+            
             # Start with default configuration (all False)
             field_config = {
                 "column": column,
@@ -187,17 +303,19 @@ class KiCadDBLGeneratorFromDB:
         
         return properties
     
-    def generate_library_config(self, table_name: str, columns: List[str]) -> Dict[str, Any]:
+    def generate_library_config(self, table: TableSchema) -> Dict[str, Any]:
         """
         Generate library configuration for a single table
         
         Args:
-            table_name: Name of the table
-            columns: List of column names
+            table: Schema of the table
             
         Returns:
             Library configuration dictionary
         """
+        table_name = table.name
+        columns = table.column_names
+        
         # Determine key column (prefer MyPN, then ID, then first column)
         key_column = "MyPN" if "MyPN" in columns else \
                     "KeyId" if "KeyId" in columns else \
@@ -221,7 +339,7 @@ class KiCadDBLGeneratorFromDB:
             "key": key_column,
             "symbols": symbol_column,
             "footprints": footprint_column,
-            "fields": self.generate_field_configs(table_name, columns),
+            "fields": self.generate_field_configs(table),
             "properties": self.generate_properties_mapping(columns)
         }
     
@@ -240,16 +358,18 @@ class KiCadDBLGeneratorFromDB:
             Dictionary with the complete DBL configuration
         """
         # Get all tables
-        all_tables = self.get_all_tables()
+        schema = self.read_schema()
         
-        if not all_tables:
+        if not schema.tables:
             raise Exception("No tables found in database")
         
         # Filter tables
         libraries = []
         skipped_tables = []
         
-        for table_name, columns in all_tables:
+        for table in schema.tables:
+            table_name = table.name
+            
             # Apply include filter
             if include_tables and table_name not in include_tables:
                 skipped_tables.append(f"{table_name} (excluded by include filter)")
@@ -261,7 +381,7 @@ class KiCadDBLGeneratorFromDB:
                 continue
             
             try:
-                library_config = self.generate_library_config(table_name, columns)
+                library_config = self.generate_library_config(table)
                 libraries.append(library_config)
                 print(f"✓ Added table: {table_name} -> Library: {library_config['name']}")
             except Exception as e:
@@ -278,7 +398,24 @@ class KiCadDBLGeneratorFromDB:
         
         print(f"\nTotal libraries generated: {len(libraries)}")
         
-        dbl_config = {
+        dbl_config = self.build_dbl_config(libraries)
+        
+        if output_file:
+            # Ensure directory exists
+            os.makedirs(os.path.dirname(os.path.abspath(output_file)) or '.', exist_ok=True)
+            
+            # Write to file with pretty formatting
+            write_json_atomic(output_file, dbl_config)
+            
+            print(f"\n✅ Generated {output_file} successfully!")
+            print(f"   Database: {self.db_path}")
+            print(f"   Tables included: {len(libraries)}")
+        
+        return dbl_config
+    
+    def build_dbl_config(self, libraries: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """Wrap a list of library configurations with the DBL header"""
+        return {
             "meta": {
                 "version": 0
             },
@@ -294,20 +431,108 @@ class KiCadDBLGeneratorFromDB:
             },
             "libraries": libraries
         }
+    
+    def generate_dbl_file_incremental(self, output_file: str,
+                                      include_tables: Optional[List[str]] = None,
+                                      exclude_tables: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Regenerate a .kicad_dbl file in place, rebuilding only changed tables
         
-        if output_file:
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(os.path.abspath(output_file)) or '.', exist_ok=True)
+        A fingerprint file (see fingerprint_path) stored next to the output keeps
+        the schema cookie and one fingerprint per table. When the cookie is
+        unchanged the run ends without reading the schema; otherwise only the
+        libraries[] entries whose fingerprint changed are regenerated, the rest
+        are copied from the existing file. The output is replaced atomically.
+        
+        Args:
+            output_file: Path of the .kicad_dbl file to update
+            include_tables: Optional list of tables to include (if None, include all)
+            exclude_tables: Optional list of tables to exclude
             
-            # Write to file with pretty formatting
-            with open(output_file, 'w', encoding='utf-8') as f:
-                json.dump(dbl_config, f, indent=2, ensure_ascii=False)
+        Returns:
+            Summary dictionary with the added/changed/removed/unchanged table
+            names and whether the output file was rewritten
+        """
+        state_file = fingerprint_path(output_file)
+        options = {
+            "fingerprint_version": self.FINGERPRINT_VERSION,
+            "library_name": self.library_name,
+            "description": self.description,
+            "connection_string": self.connection_string,
+            "include_tables": sorted(include_tables) if include_tables else None,
+            "exclude_tables": sorted(exclude_tables) if exclude_tables else None,
+        }
+        summary = {"added": [], "changed": [], "removed": [], "unchanged": [], "written": False}
+        
+        previous_state = load_json(state_file) if os.path.exists(output_file) else None
+        if previous_state and previous_state.get("options") != options:
+            previous_state = None
+        
+        # Fast path: nothing in the schema changed since the last run
+        schema_version = self.get_schema_version()
+        if previous_state and previous_state.get("schema_version") == schema_version:
+            summary["unchanged"] = list(previous_state.get("tables", {}))
+            return summary
+        
+        old_fingerprints = previous_state.get("tables", {}) if previous_state else {}
+        old_libraries = {}
+        if previous_state:
+            old_config = load_json(output_file) or {}
+            old_libraries = {lib.get("table"): lib for lib in old_config.get("libraries", [])}
+        
+        schema = self.read_schema(refresh=True)
+        libraries = []
+        fingerprints = {}
+        
+        for table in schema.tables:
+            table_name = table.name
+            if include_tables and table_name not in include_tables:
+                continue
+            if exclude_tables and table_name in exclude_tables:
+                continue
             
-            print(f"\n✅ Generated {output_file} successfully!")
-            print(f"   Database: {self.db_path}")
-            print(f"   Tables included: {len(libraries)}")
+            fingerprint = table.fingerprint
+            fingerprints[table_name] = fingerprint
+            
+            if old_fingerprints.get(table_name) == fingerprint and table_name in old_libraries:
+                libraries.append(old_libraries[table_name])
+                summary["unchanged"].append(table_name)
+                continue
+            
+            try:
+                libraries.append(self.generate_library_config(table))
+            except Exception as e:
+                print(f"✗ Error processing table {table_name}: {e}")
+                del fingerprints[table_name]
+                continue
+            
+            if table_name in old_fingerprints:
+                summary["changed"].append(table_name)
+                print(f"↻ Updated table: {table_name}")
+            else:
+                summary["added"].append(table_name)
+                print(f"✓ Added table: {table_name}")
         
-        return dbl_config
+        summary["removed"] = [name for name in old_fingerprints if name not in fingerprints]
+        for table_name in summary["removed"]:
+            print(f"- Removed table: {table_name}")
+        
+        if not libraries:
+            raise Exception("No valid tables found to include in library")
+        
+        if summary["added"] or summary["changed"] or summary["removed"] or not previous_state:
+            os.makedirs(os.path.dirname(os.path.abspath(output_file)) or '.', exist_ok=True)
+            write_json_atomic(output_file, self.build_dbl_config(libraries))
+            summary["written"] = True
+        
+        # The fingerprint file is written last, so an interrupted run rebuilds
+        write_json_atomic(state_file, {
+            "schema_version": schema_version,
+            "options": options,
+            "tables": fingerprints
+        })
+        
+        return summary
     
     def list_tables(self) -> None:
         """List all tables in the database with their column counts"""
@@ -326,6 +551,41 @@ class KiCadDBLGeneratorFromDB:
         print(f"Total tables: {len(tables)}")
 
 
+# Fixed output name used by --incremental (rewritten in place on every run)
+INCREMENTAL_OUTPUT_NAME = "MyKiCadLibDatabase_Setup.kicad_dbl"
+
+
+def fingerprint_path(output_file: str) -> str:
+    """Path of the fingerprint file kept next to a generated .kicad_dbl"""
+    return os.path.splitext(output_file)[0] + ".fingerprints.json"
+
+
+def load_json(path: str) -> Optional[Dict[str, Any]]:
+    """Load a JSON file, returning None if it is missing or unreadable"""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def write_json_atomic(path: str, data: Dict[str, Any]) -> None:
+    """
+    Write JSON to a temporary file in the target directory and rename it over
+    the destination, so readers (KiCad, CI) never see a half-written file
+    """
+    directory = os.path.dirname(os.path.abspath(path)) or '.'
+    fd, tmp_path = tempfile.mkstemp(prefix=".tmp_", suffix=".json", dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
 def get_project_paths():
     """
     Get all relevant paths based on the script location
@@ -359,10 +619,127 @@ def generate_output_filename(base_name="MyKiCadLibDatabase_Setup"):
     return f"{base_name}_{timestamp}.kicad_dbl"
 
 
-def main():
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line options"""
+    parser = argparse.ArgumentParser(description="Generate a KiCad .kicad_dbl file from the SQLite database")
+    parser.add_argument("--database", help="SQLite database file (default: Library/1_Database_Library/MyKiCadLibDatabase.sqlite)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Update a fixed .kicad_dbl in place, regenerating only tables whose schema changed")
+    parser.add_argument("--output", help="Output .kicad_dbl file (default: timestamped file, or "
+                        f"{INCREMENTAL_OUTPUT_NAME} with --incremental)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Keep running and regenerate incrementally whenever the database changes")
+    parser.add_argument("--debounce", type=float, default=2.0,
+                        help="Seconds without writes before a rebuild is triggered in --watch mode (default: 2.0)")
+    parser.add_argument("--poll-interval", type=float, default=0.5,
+                        help="Seconds between file checks in --watch mode (default: 0.5)")
+    return parser.parse_args(argv)
+
+
+def create_default_generator(database_file: str) -> KiCadDBLGeneratorFromDB:
+    """Create the generator with the library name/description used by main()"""
+    return KiCadDBLGeneratorFromDB(
+        db_path=database_file,
+        library_name="My KiCad Database Library",
+        description="Database library for electronic components"
+    )
+
+
+def run_incremental(database_file: str, output_path: str,
+                    generator: Optional[KiCadDBLGeneratorFromDB] = None) -> int:
+    """Run one incremental regeneration and print a one-line summary"""
+    try:
+        if generator is not None:
+            summary = generator.generate_dbl_file_incremental(output_path)
+        else:
+            with create_default_generator(database_file) as generator:
+                summary = generator.generate_dbl_file_incremental(output_path)
+    except Exception as e:
+        print(f"❌ ERROR: {e}")
+        return 1
+    
+    if summary["written"]:
+        print(f"✅ Updated {output_path}: {len(summary['added'])} added, {len(summary['changed'])} changed, "
+              f"{len(summary['removed'])} removed, {len(summary['unchanged'])} unchanged")
+    else:
+        print(f"✅ {output_path} is up to date ({len(summary['unchanged'])} tables)")
+    return 0
+
+
+def database_file_state(database_file: str) -> Tuple[Tuple[str, float, int], ...]:
+    """
+    Return (path, mtime, size) for the database and its -wal/-journal files
+    
+    DB Browser commits into the WAL file first, so the main file alone may not
+    change until a checkpoint; all three are compared to detect a write.
+    """
+    state = []
+    for path in (database_file, database_file + "-wal", database_file + "-journal"):
+        try:
+            stat = os.stat(path)
+            state.append((path, stat.st_mtime, stat.st_size))
+        except OSError:
+            state.append((path, 0.0, -1))
+    return tuple(state)
+
+
+def watch_database(database_file: str, output_path: str,
+                   debounce: float = 2.0, poll_interval: float = 0.5) -> int:
+    """
+    Watch the database and regenerate the .kicad_dbl incrementally on changes
+    
+    The files are polled every poll_interval seconds. A burst of writes is
+    coalesced: the rebuild only runs once no further change has been seen for
+    debounce seconds. A single generator (and its connection) is kept for the
+    whole session. Stops with Ctrl+C.
+    """
+    print(f"👀 Watching {database_file} (debounce {debounce:g}s). Press Ctrl+C to stop.")
+    
+    generator = create_default_generator(database_file)
+    run_incremental(database_file, output_path, generator)
+    
+    last_state = database_file_state(database_file)
+    pending_since = None
+    
+    try:
+        while True:
+            time.sleep(poll_interval)
+            state = database_file_state(database_file)
+            
+            if state != last_state:
+                last_state = state
+                pending_since = time.monotonic()
+                continue
+            
+            if pending_since is not None and time.monotonic() - pending_since >= debounce:
+                pending_since = None
+                print(f"[{datetime.now().strftime('%H:%M:%S')}] Change detected, regenerating...")
+                run_incremental(database_file, output_path, generator)
+    except KeyboardInterrupt:
+        print("\nStopped watching.")
+    finally:
+        generator.close()
+    
+    return 0
+
+
+def main(argv: Optional[List[str]] = None):
     """Main entry point"""
+    args = parse_args(argv)
+    
     # Get all project paths
     paths = get_project_paths()
+    if args.database:
+        paths['database_file'] = os.path.abspath(args.database)
+    
+    if args.incremental or args.watch:
+        if not os.path.exists(paths['database_file']):
+            print(f"❌ ERROR: Database file not found at: {paths['database_file']}")
+            return 1
+        output_path = args.output or os.path.join(paths['database_setup_dir'], INCREMENTAL_OUTPUT_NAME)
+        if args.watch:
+            return watch_database(paths['database_file'], output_path, args.debounce, args.poll_interval)
+        return run_incremental(paths['database_file'], output_path)
     
     print("=" * 60)
     print("Setup_Database_Generator.py")
@@ -384,8 +761,11 @@ def main():
     os.makedirs(paths['database_setup_dir'], exist_ok=True)
     
     # Generate output filename with timestamp
-    output_filename = generate_output_filename()
-    output_path = os.path.join(paths['database_setup_dir'], output_filename)
+    if args.output:
+        output_path = os.path.abspath(args.output)
+    else:
+        output_filename = generate_output_filename()
+        output_path = os.path.join(paths['database_setup_dir'], output_filename)
     
     print(f"\n📁 Output file: {output_path}")
     print("-" * 60)
@@ -398,20 +778,23 @@ def main():
             description="Database library for electronic components"
         )
         
-        # First, list all tables found
-        print("\n📊 Reading database tables...")
-        tables = generator.get_all_tables()
-        print(f"Found {len(tables)} tables:")
-        for table_name, columns in tables[:10]:  # Show first 10
-            print(f"  - {table_name} ({len(columns)} columns)")
-        if len(tables) > 10:
-            print(f"  ... and {len(tables) - 10} more")
-        
-        # Generate DBL file
-        print("\n⚙️ Generating KiCad DBL file...")
-        generator.generate_dbl_file(
-            output_file=output_path
-        )
+        try:
+            # First, list all tables found
+            print("\n📊 Reading database tables...")
+            tables = generator.get_all_tables()
+            print(f"Found {len(tables)} tables:")
+            for table_name, columns in tables[:10]:  # Show first 10
+                print(f"  - {table_name} ({len(columns)} columns)")
+            if len(tables) > 10:
+                print(f"  ... and {len(tables) - 10} more")
+        
+            # Generate DBL file (reuses the schema snapshot read above)
+            print("\n⚙️ Generating KiCad DBL file...")
+            generator.generate_dbl_file(
+                output_file=output_path
+            )
+        finally:
+            generator.close()
         
         print("\n" + "=" * 60)
         print("✅ SUCCESS!")
@@ -1,5 +1,13 @@
+# Converte um dump .sql para o layout V2. Para migrar um banco direto
+# (sem exportar), use PyGen/Common/Schema_Migrations.py
+#
+# O dump é lido em fluxo: uma tupla de VALUES por vez (que pode ocupar
+# várias linhas se tiver texto com quebra de linha) e cada tupla convertida
+# já vai para a saída, então a memória não cresce com o tamanho do dump.
 import re
 import os
+import sys
+from operator import itemgetter
 
 COLUNAS_DESTINO = [
     'ID_Aux', 'MyPN', 'Name', 'Description', 'Value', 'Info1', 'Info2',
@@ -15,9 +23,22 @@ COLUNAS_DESTINO = [
     'Exclude_from_BOM', 'Exclude_from_Board'
 ]
 
+PADRAO_INSERT = re.compile(r'INSERT INTO "([^"]+)" \(([^)]+)\) VALUES')
+
+TERMINADORES = ('),', ');', ')')
+
+# Marca interna das vírgulas que separam valores (não aparece em dumps de texto)
+SEPARADOR = '\0'
+
+# Regras de valor do layout V2: {coluna: valor original -> valor novo}
+REGRAS = {
+    'Version': lambda val: "'1.0'" if val == '1' else val,
+    'Created_At': lambda val: 'CURRENT_TIMESTAMP',
+    'Created_By': lambda val: "'Rogerio Fontanario'",
+}
+
 def extrair_nome_e_colunas(linha):
-    padrao = r'INSERT INTO "([^"]+)" \(([^)]+)\) VALUES'
-    match = re.match(padrao, linha.strip())
+    match = PADRAO_INSERT.match(linha.strip())
     if match:
         tabela = match.group(1)
         colunas = [c.strip().strip('"') for c in match.group(2).split(',')]
@@ -25,121 +46,126 @@ def extrair_nome_e_colunas(linha):
     return None, None
 
 def parse_valores(linha):
-    """Recebe uma linha de valores e retorna lista de strings."""
+    """
+    Recebe uma tupla de valores e retorna lista de strings (sem strip).
+    Separar por aspas deixa o texto de fora das strings nas posições pares
+    (o '' escapado do SQL vira um pedaço vazio e não muda a paridade); só as
+    vírgulas desses pedaços separam valores. Tudo em métodos de str, sem
+    laço por caractere.
+    """
     linha = linha.strip()
     if linha.startswith('('):
         linha = linha[1:]
-    if linha.endswith('),'):
-        linha = linha[:-2]
-    elif linha.endswith(');'):
-        linha = linha[:-2]
-    elif linha.endswith(')'):
-        linha = linha[:-1]
-
-    valores = []
-    atual = []
-    entre_aspas = False
-    escape = False
-
-    for ch in linha:
-        if ch == "'" and not escape:
-            entre_aspas = not entre_aspas
-            atual.append(ch)
-        elif ch == '\\' and entre_aspas:
-            escape = True
-            atual.append(ch)
+    for terminador in TERMINADORES:
+        if linha.endswith(terminador):
+            linha = linha[:-len(terminador)]
+            break
+    pedacos = linha.split("'")
+    pedacos[::2] = [p.replace(',', SEPARADOR) for p in pedacos[::2]]
+    return "'".join(pedacos).split(SEPARADOR)
+
+def ler_dump(arquivo):
+    """
+    Percorre o dump e gera ('insert', tabela, colunas) a cada cabeçalho
+    INSERT INTO e ('tupla', texto) a cada tupla de VALUES completa. Uma tupla
+    termina quando as aspas estão fechadas (número par de ') e a linha acaba
+    em ')', '),' ou ');'. Linhas fora de um INSERT são ignoradas.
+    """
+    dentro_insert = False
+    partes = []
+    aspas = 0
+    for linha in arquivo:
+        if partes:
+            partes.append(linha)
+            aspas += linha.count("'")
         else:
-            if escape:
-                escape = False
-            if ch == ',' and not entre_aspas:
-                valores.append(''.join(atual).strip())
-                atual = []
-            else:
-                atual.append(ch)
-    if atual:
-        valores.append(''.join(atual).strip())
-    return valores
+            limpa = linha.strip()
+            if not limpa:
+                continue
+            if limpa.startswith('INSERT INTO'):
+                tabela, colunas = extrair_nome_e_colunas(limpa)
+                dentro_insert = tabela is not None
+                if dentro_insert:
+                    yield 'insert', tabela, colunas
+                continue
+            if not dentro_insert:
+                continue
+            partes = [linha]
+            aspas = linha.count("'")
+
+        if aspas % 2 == 0 and linha.rstrip().endswith(TERMINADORES):
+            tupla = ''.join(partes).strip()
+            partes = []
+            if tupla.endswith(';'):
+                dentro_insert = False
+            yield 'tupla', tupla
+
+    if partes:
+        print("Aviso: dump terminou no meio de uma tupla (aspas não fechadas). Ignorada.")
+
+def montar_conversao(colunas_orig):
+    """
+    Função que leva os valores de uma tupla (na ordem de colunas_orig) para
+    a ordem de COLUNAS_DESTINO, com NULL nas colunas que faltam e REGRAS nas
+    que existem na origem.
+    """
+    indice_orig = {nome: idx for idx, nome in enumerate(colunas_orig)}
+    # Coluna ausente aponta para o NULL acrescentado no fim dos valores
+    ausente = len(colunas_orig)
+    pegar = itemgetter(*[indice_orig.get(col, ausente) for col in COLUNAS_DESTINO])
+    regras = [(pos, REGRAS[col]) for pos, col in enumerate(COLUNAS_DESTINO)
+              if col in REGRAS and col in indice_orig]
+
+    def converter(valores):
+        valores.append('NULL')
+        novos = list(map(str.strip, pegar(valores)))
+        for pos, regra in regras:
+            novos[pos] = regra(novos[pos])
+        return novos
+    return converter
 
 def processar_arquivo(entrada, saida):
-    with open(entrada, 'r', encoding='utf-8') as f:
-        linhas = f.readlines()
-
-    i = 0
-    total = len(linhas)
-    blocos = []
-
-    while i < total:
-        linha = linhas[i].strip()
-        if not linha.startswith('INSERT INTO'):
-            i += 1
-            continue
-
-        tabela, colunas_orig = extrair_nome_e_colunas(linha)
-        if not tabela:
-            i += 1
-            continue
-
-        # Índices das colunas originais
-        indice_orig = {nome: idx for idx, nome in enumerate(colunas_orig)}
-
-        # Índices a manter na ordem de COLUNAS_DESTINO
-        indices_manter = [indice_orig.get(col) for col in COLUNAS_DESTINO]
-
-        i += 1
-        linhas_valores = []
-        while i < total:
-            linha_val = linhas[i].strip()
-            if not linha_val:
-                i += 1
+    colunas_destino_str = ', '.join(f'"{c}"' for c in COLUNAS_DESTINO)
+    blocos = 0
+    tuplas = 0
+
+    with open(entrada, 'r', encoding='utf-8') as f, open(saida, 'w', encoding='utf-8') as out:
+        primeira_do_bloco = True
+        for evento in ler_dump(f):
+            if evento[0] == 'insert':
+                _, tabela, colunas_orig = evento
+                converter = montar_conversao(colunas_orig)
+                if blocos:
+                    out.write('\n\n')
+                out.write(f'INSERT INTO "{tabela}" ({colunas_destino_str}) VALUES\n')
+                blocos += 1
+                primeira_do_bloco = True
                 continue
-            if linha_val.startswith('INSERT INTO'):
-                break
-            linhas_valores.append(linha_val)
-            i += 1
 
-        novos_valores = []
-        for linha_val in linhas_valores:
+            linha_val = evento[1]
             valores = parse_valores(linha_val)
             if len(valores) != len(colunas_orig):
                 print(f"Aviso: número de valores ({len(valores)}) diferente de colunas ({len(colunas_orig)}) em uma linha. Pulando.")
                 continue
 
-            novos = []
-            for idx_dest in indices_manter:
-                if idx_dest is None:
-                    novos.append('NULL')
-                else:
-                    val = valores[idx_dest]
-                    nome_col = colunas_orig[idx_dest]
-                    if nome_col == 'Version' and val == '1':
-                        val = "'1.0'"
-                    elif nome_col == 'Created_At':
-                        val = 'CURRENT_TIMESTAMP'
-                    elif nome_col == 'Created_By':
-                        val = "'Rogerio Fontanario'"
-                    novos.append(val)
-
-            linha_nova = '(' + ', '.join(novos) + ')'
+            linha_nova = '(' + ', '.join(converter(valores)) + ')'
             if linha_val.endswith(');'):
                 linha_nova += ';'
             elif linha_val.endswith('),'):
                 linha_nova += ','
-            novos_valores.append(linha_nova)
-
-        colunas_destino_str = ', '.join(f'"{c}"' for c in COLUNAS_DESTINO)
-        insert_novo = f'INSERT INTO "{tabela}" ({colunas_destino_str}) VALUES\n'
-        insert_novo += '\n'.join(novos_valores)
-        blocos.append(insert_novo)
+            if not primeira_do_bloco:
+                out.write('\n')
+            out.write(linha_nova)
+            primeira_do_bloco = False
+            tuplas += 1
 
-    with open(saida, 'w', encoding='utf-8') as f:
-        f.write('\n\n'.join(blocos))
-    print(f"Arquivo gerado: {saida}")
+    print(f"Arquivo gerado: {saida} ({blocos} INSERTs, {tuplas} linhas)")
 
 if __name__ == '__main__':
     diretorio = os.path.dirname(os.path.abspath(__file__))
-    entrada = os.path.join(diretorio, 'TXT.txt')
-    saida = os.path.join(diretorio, 'saida.sql')
+    entrada = sys.argv[1] if len(sys.argv) > 1 else os.path.join(diretorio, 'TXT.txt')
+    saida = sys.argv[2] if len(sys.argv) > 2 else os.path.join(diretorio, 'saida.sql')
     if not os.path.exists(entrada):
         print(f"Erro: arquivo {entrada} não encontrado.")
     else:
-        processar_arquivo(entrada, saida)
\ No newline at end of file
+        processar_arquivo(entrada, saida)